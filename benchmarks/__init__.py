@@ -0,0 +1 @@
+"""Runnable benchmarks. Run each one from the repository root with `python -m benchmarks.<name> --help`."""
@@ -0,0 +1,42 @@
+"""Recipe.Builder with many ingredients, added one by one, in one batch, and merged.
+
+    python -m benchmarks.builder [--sizes 100 500]
+"""
+import argparse
+from datetime import date
+
+from recipe.domain import Description, Id, Ingredient, Name, Quantity, Recipe, Title, Unit, Username
+
+from .common import best_of, microseconds, milliseconds, report, words
+
+
+def new_builder() -> Recipe.Builder:
+    return Recipe.Builder(Id(1), Title('Pancakes'), Username('alice'), Description('Easy pancakes.'), date.today(),
+                          None)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500])
+    args = parser.parse_args(argv)
+    flour = Ingredient(Name('flour'), Quantity(1), Unit('kg'))
+    rows = [('1 ingredient', microseconds(best_of(lambda: new_builder().with_ingredient(flour), 2000)),
+             '', '')]
+    for size in args.sizes:
+        ingredients = [Ingredient(Name(name), Quantity(1), Unit('g')) for name in words(size, seed=4)]
+
+        def one_by_one():
+            builder = new_builder()
+            for ingredient in ingredients:
+                builder.with_ingredient(ingredient)
+            return builder.build()
+
+        rows.append((f'{size} ingredients', milliseconds(best_of(one_by_one, 5)),
+                     milliseconds(best_of(lambda: new_builder().with_ingredients(ingredients).build(), 5)),
+                     milliseconds(best_of(lambda: new_builder().with_ingredients(ingredients + ingredients[:10],
+                                                                                 merge=True).build(), 5))))
+    report('Building a recipe', ('case', 'one by one', 'with_ingredients', 'with_ingredients merge'), rows)
+
+
+if __name__ == '__main__':
+    main()
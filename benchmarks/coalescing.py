@@ -0,0 +1,37 @@
+"""Upstream hits of concurrent identical GETs, which DealerRecipes coalesces into one request.
+
+    python -m benchmarks.coalescing [--threads 16] [--rounds 10] [--latency 0.05]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from recipe.domain import DealerRecipes
+
+from .common import milliseconds, report, synthetic_recipes
+from .http_session import serve
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args(argv)
+    server = serve(json.dumps(synthetic_recipes(10)).encode(), delay=args.latency)
+    api = f'http://127.0.0.1:{server.server_address[1]}/api/v1'
+    start = time.perf_counter()
+    with DealerRecipes(api_server=api, cache=None, pool_size=args.threads) as dealer:
+        with ThreadPoolExecutor(args.threads) as executor:
+            for _ in range(args.rounds):
+                list(executor.map(lambda _: dealer.show_all_recipes(), range(args.threads)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    report(f'{args.threads} concurrent identical GETs, {args.rounds} rounds, {args.latency * 1e3:g} ms server latency',
+           ('', 'value'), [('calls', args.rounds * args.threads), ('upstream hits', server.hits),
+                           ('time per round', milliseconds(elapsed / args.rounds))])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import random
+import time
+from typing import Any, Callable, Iterable, List, Sequence, Tuple
+
+_SYLLABLES = ('ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'zo')
+_UNITS = ('g', 'kg', 'ml', 'cl', 'l', 'cup', 'n/a')
+
+
+def words(count: int, seed: int = 0) -> List[str]:
+    generator = random.Random(seed)
+    found = {}
+    while len(found) < count:
+        word = ''.join(generator.choice(_SYLLABLES) for _ in range(generator.randint(2, 4)))
+        found.setdefault(word, None)
+    return list(found)
+
+
+def synthetic_recipes(count: int, ingredients: int = 5, vocabulary: int = 2000, authors: int = 500,
+                      seed: int = 0) -> List[dict]:
+    """Recipe dicts shaped like the API's, with values every domain validator accepts."""
+    generator = random.Random(seed)
+    vocabulary = words(vocabulary, seed)
+    author_names = [f'user{index:04d}' for index in range(authors)]
+    recipes = []
+    for index in range(1, count + 1):
+        title = ' '.join(generator.sample(vocabulary, 2))
+        names = generator.sample(vocabulary, ingredients)
+        recipes.append({
+            'id': index,
+            'title': title,
+            'author': generator.choice(author_names),
+            'description': f'A {title} with {names[0]} and {names[1]}.',
+            'ingredients': [{'name': name, 'quantity': generator.randint(1, 500), 'unit': generator.choice(_UNITS)}
+                            for name in names],
+            'created_at': f'20{generator.randint(10, 23)}-{generator.randint(1, 12):02d}-'
+                          f'{generator.randint(1, 28):02d}',
+        })
+    return recipes
+
+
+def best_of(func: Callable[[], Any], number: int = 1, repeat: int = 3) -> float:
+    """Seconds per call of `func`, best of `repeat` runs of `number` calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def percentiles(func: Callable[[Any], Any], inputs: Iterable[Any], points: Sequence[float] = (50, 99)) -> List[float]:
+    """Seconds per call of `func` over `inputs`, at the given percentiles."""
+    samples = []
+    for value in inputs:
+        start = time.perf_counter()
+        func(value)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return [samples[min(len(samples) - 1, int(len(samples) * point / 100))] for point in points]
+
+
+def report(title: str, header: Tuple[str, ...], rows: Iterable[Tuple[Any, ...]]) -> None:
+    rows = [header] + [tuple(str(value) for value in row) for row in rows]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+    print(title)
+    for row in rows:
+        print('  ' + '  '.join(value.rjust(width) if column else value.ljust(width)
+                               for column, (value, width) in enumerate(zip(row, widths))))
+    print()
+
+
+def milliseconds(seconds: float) -> str:
+    return f'{seconds * 1e3:.3f} ms'
+
+
+def microseconds(seconds: float) -> str:
+    return f'{seconds * 1e6:.1f} us'
@@ -0,0 +1,30 @@
+"""Recipes per second through the single and the batch JSON deserializers.
+
+The numbers depend on SECURE_RECIPE_TYPECHECK.
+
+    python -m benchmarks.deserialization [--recipes 2000]
+"""
+import argparse
+
+from recipe.domain import JsonHandler
+from validation import TYPECHECK_MODE
+
+from .common import best_of, microseconds, report, synthetic_recipes
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=2000)
+    args = parser.parse_args(argv)
+    recipes = synthetic_recipes(args.recipes)
+    rows = []
+    for name, parse in [('create_recipe_from_json', lambda: [JsonHandler.create_recipe_from_json(r) for r in recipes]),
+                        ('create_recipes_from_json', lambda: JsonHandler.create_recipes_from_json(recipes))]:
+        seconds = best_of(parse) / args.recipes
+        rows.append((name, microseconds(seconds), f'{1 / seconds:,.0f}'))
+    report(f'Deserializing {args.recipes:,} recipes, SECURE_RECIPE_TYPECHECK={TYPECHECK_MODE}',
+           ('deserializer', 'per recipe', 'recipes/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Requests per second against a local stub server, with a fresh requests.get per call and the pooled session.
+
+    python -m benchmarks.http_session [--requests 2000]
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from recipe.domain import DealerRecipes
+
+from .common import best_of, report, synthetic_recipes
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body: bytes, delay: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.body, self.delay, self.hits = body, delay, 0
+        self.hits_lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.hits_lock:
+            self.server.hits += 1
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(body: bytes, delay: float = 0.0) -> _StubServer:
+    """A stub API answering every GET with `body` after `delay` seconds, and counting the GETs in `hits`."""
+    server = _StubServer(body, delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args(argv)
+    server = serve(json.dumps(synthetic_recipes(10)).encode())
+    api = f'http://127.0.0.1:{server.server_address[1]}/api/v1'
+    with DealerRecipes(api_server=api, cache=None) as dealer:
+        pooled = best_of(dealer.show_all_recipes, args.requests)
+        fresh = best_of(lambda: requests.get(f'{api}/recipes/', timeout=10).json(), args.requests)
+    server.shutdown()
+    report('Sequential GET /recipes/ (10 recipes)', ('client', 'requests/s'),
+           [('requests.get per call', f'{1 / fresh:,.0f}'), ('pooled DealerRecipes', f'{1 / pooled:,.0f}')])
+
+
+if __name__ == '__main__':
+    main()
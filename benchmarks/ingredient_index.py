@@ -0,0 +1,44 @@
+"""Multi-ingredient AND/OR/NOT queries on the snapshot's inverted ingredient index.
+
+    python -m benchmarks.ingredient_index [--recipes 100000] [--queries 200]
+"""
+import argparse
+import random
+import time
+
+from recipe.domain import Name, RecipeSnapshot
+
+from .common import milliseconds, percentiles, report, synthetic_recipes, words
+from .snapshot import Catalog
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+    recipes = synthetic_recipes(args.recipes)
+    generator = random.Random(1)
+    vocabulary = words(2000)
+    snapshot = RecipeSnapshot(Catalog(recipes), max_age=float('inf'))
+    start = time.perf_counter()
+    snapshot.refresh()
+    refreshed = time.perf_counter() - start
+    samples = generator.choices(recipes, k=args.queries)
+    rows = [('refresh (builds the index)', milliseconds(refreshed), '')]
+    for name, query in [
+            ('1 ingredient', lambda r: snapshot.filter_by_ingredients(all_of=[Name(r['ingredients'][0]['name'])])),
+            ('2 all_of', lambda r: snapshot.filter_by_ingredients(
+                all_of=[Name(i['name']) for i in r['ingredients'][:2]])),
+            ('3 any_of', lambda _: snapshot.filter_by_ingredients(
+                any_of=[Name(generator.choice(vocabulary)) for _ in range(3)])),
+            ('all_of + none_of', lambda r: snapshot.filter_by_ingredients(
+                all_of=[Name(r['ingredients'][0]['name'])], none_of=[Name(r['ingredients'][1]['name'])]))]:
+        p50, p99 = percentiles(query, samples)
+        rows.append((name, milliseconds(p50), milliseconds(p99)))
+    report(f'Ingredient queries over {args.recipes:,} recipes, {args.queries} queries each', ('query', 'p50', 'p99'),
+           rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Construction time and memory of the interned value objects.
+
+Titles are built the first time and again once interned. Then `--recipes` recipes are parsed by the batch and the
+single-recipe deserializers, with and without interning, and the memory they keep is measured with tracemalloc.
+Memory does not depend on SECURE_RECIPE_TYPECHECK, but tracing is much faster with it off.
+
+    SECURE_RECIPE_TYPECHECK=off python -m benchmarks.interning [--recipes 100000] [--values 5000]
+"""
+import argparse
+import gc
+import tracemalloc
+from unittest.mock import patch
+
+from recipe import domain
+from recipe.domain import JsonHandler, Title, Unit
+
+from .common import best_of, microseconds, report, synthetic_recipes, words
+
+
+def construction(count: int) -> None:
+    fresh = [word.capitalize() for word in words(count + 1000, seed=3)[1000:]]
+    first = best_of(lambda: [Title(value) for value in fresh], repeat=1) / count
+    interned = best_of(lambda: [Title(value) for value in fresh]) / count
+    report(f'Constructing {count:,} titles', ('case', 'per value'),
+           [('Title, first construction', microseconds(first)), ('Title, interned', microseconds(interned)),
+            ('Unit, interned', microseconds(best_of(lambda: Unit('kg'), 10000)))])
+
+
+def traced(parse, recipes: list, interned: bool) -> tuple:
+    """Bytes still allocated after parsing `recipes`, the peak while parsing, and the distinct Name objects."""
+    domain._intern_pools.clear()
+    gc.collect()
+    with patch.object(domain, '_INTERN_LIMIT', domain._INTERN_LIMIT if interned else 0):
+        tracemalloc.start()
+        try:
+            parsed = parse(recipes)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    names = {id(ingredient.name) for recipe in parsed for ingredient in recipe.ingredients}
+    return current, peak, len(names)
+
+
+def memory(count: int) -> None:
+    recipes = synthetic_recipes(count)
+    rows = []
+    for path, parse in (('create_recipes_from_json', JsonHandler.create_recipes_from_json),
+                        ('create_recipe_from_json', lambda rs: [JsonHandler.create_recipe_from_json(r) for r in rs])):
+        for interned in (True, False):
+            current, peak, names = traced(parse, recipes, interned)
+            rows.append((path, 'yes' if interned else 'no', f'{current / 2 ** 20:,.1f} MiB',
+                         f'{current / count:,.0f} B', f'{peak / 2 ** 20:,.1f} MiB', f'{names:,}'))
+    domain._intern_pools.clear()
+    report(f'Memory of {count:,} parsed recipes', ('parser', 'interned', 'kept', 'per recipe', 'peak', 'Name objects'),
+           rows)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--values', type=int, default=5000)
+    args = parser.parse_args(argv)
+    construction(args.values)
+    memory(args.recipes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Saving a RecipeStore snapshot and reading rows back through MappedRecipeStore.
+
+    python -m benchmarks.mapped_store [--recipes 10000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from recipe.domain import MappedRecipeStore
+
+from .common import milliseconds, percentiles, report
+from .store import build
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+    _, store, _, _ = build(args.recipes)
+    rows = random.Random(2).choices(range(args.recipes), k=args.queries)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recipes.snapshot')
+        start = time.perf_counter()
+        store.save(path)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        with MappedRecipeStore(path) as mapped:
+            opened = time.perf_counter() - start
+            results = [(f'RecipeStore.save, {size / 2 ** 20:,.1f} MiB', milliseconds(saved), ''),
+                       ('MappedRecipeStore open', milliseconds(opened), '')]
+            for name, store_of in (('RecipeStore[row]', store), ('MappedRecipeStore[row]', mapped)):
+                p50, p99 = percentiles(store_of.__getitem__, rows)
+                results.append((name, milliseconds(p50), milliseconds(p99)))
+    report(f'Memory-mapped snapshot of {args.recipes:,} recipes, {args.queries} rows read',
+           ('operation', 'p50', 'p99'), results)
+
+
+if __name__ == '__main__':
+    main()
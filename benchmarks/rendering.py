@@ -0,0 +1,79 @@
+"""Terminal rendering throughput.
+
+Recipes are written one `Recipe.print` at a time, or in one batch with RecipeRenderer in the detailed and table
+views. The menu is printed once per `ApplicationForUser.run`. Output goes to a null sink and, where available,
+to a pseudo-terminal drained by a background thread.
+
+    python -m benchmarks.rendering [--recipes 1000]
+"""
+import argparse
+import contextlib
+import os
+import threading
+from unittest.mock import patch
+
+from recipe.app import ApplicationForUser
+from recipe.domain import JsonHandler, RecipeRenderer
+
+from .common import best_of, milliseconds, report, synthetic_recipes
+
+try:
+    import pty
+except ImportError:
+    pty = None
+
+
+@contextlib.contextmanager
+def null_sink():
+    with open(os.devnull, 'w') as sink:
+        yield sink
+
+
+@contextlib.contextmanager
+def terminal():
+    master, slave = pty.openpty()
+
+    def drain():
+        try:
+            while os.read(master, 1 << 16):
+                pass
+        except OSError:
+            pass
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        with open(slave, 'w', closefd=True) as sink:
+            yield sink
+    finally:
+        os.close(master)
+        reader.join()
+
+
+def measure(sink, recipes: list) -> list:
+    with contextlib.redirect_stdout(sink):
+        one_by_one = best_of(lambda: [recipe.print() for recipe in recipes])
+        with patch('builtins.input', return_value='0'):
+            menu = best_of(lambda: ApplicationForUser().run(), 20)
+    detail = best_of(lambda: RecipeRenderer(stream=sink).render(recipes))
+    table = best_of(lambda: RecipeRenderer(table=True, stream=sink).render(recipes))
+    return [('Recipe.print per recipe', milliseconds(one_by_one), f'{len(recipes) / one_by_one:,.0f}'),
+            ('RecipeRenderer, detailed', milliseconds(detail), f'{len(recipes) / detail:,.0f}'),
+            ('RecipeRenderer, table', milliseconds(table), f'{len(recipes) / table:,.0f}'),
+            ('menu, one run to exit', milliseconds(menu), '')]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=1000)
+    args = parser.parse_args(argv)
+    recipes = JsonHandler.create_recipes_from_json(synthetic_recipes(args.recipes))
+    sinks = [('null sink', null_sink)] + ([('pty', terminal)] if pty is not None else [])
+    for name, sink in sinks:
+        with sink() as stream:
+            rows = measure(stream, recipes)
+        report(f'Rendering {args.recipes:,} recipes to a {name}', ('case', 'time', 'recipes/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
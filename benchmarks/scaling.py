@@ -0,0 +1,47 @@
+"""Ingredient totals with the dict and numpy paths, and recipe scaling.
+
+    python -m benchmarks.scaling [--rows 1000000] [--recipes 200]
+"""
+import argparse
+import random
+
+from recipe.domain import JsonHandler, QuantityEngine, numpy
+
+from .common import best_of, milliseconds, report, synthetic_recipes, words
+
+
+def totals(rows: int) -> None:
+    generator = random.Random(5)
+    vocabulary = words(2000)
+    names = [generator.choice(vocabulary) for _ in range(rows)]
+    quantities = [generator.randint(1, 1000) for _ in range(rows)]
+    units = [generator.choice(('g', 'kg', 'ml', 'cl', 'l', 'cup', 'n/a')) for _ in range(rows)]
+    results = [('dict', milliseconds(best_of(lambda: QuantityEngine(vectorized=False).totals(names, quantities,
+                                                                                            units))))]
+    if numpy is not None:
+        results.append(('numpy', milliseconds(best_of(lambda: QuantityEngine().totals(names, quantities, units)))))
+    report(f'QuantityEngine.totals over {rows:,} rows', ('path', 'time'), results)
+
+
+def scaling(count: int) -> None:
+    recipes = JsonHandler.create_recipes_from_json(synthetic_recipes(count, seed=6))
+    engine = QuantityEngine()
+    rows = []
+    for factor in (0.5, 1.5, 2):
+        seconds = best_of(lambda: [engine.scale(recipe, factor) for recipe in recipes])
+        rounded = sum(len(engine.scale(recipe, factor).rounded) for recipe in recipes)
+        rows.append((f'{factor:g}', milliseconds(seconds), f'{count / seconds:,.0f}', f'{rounded:,}'))
+    report(f'QuantityEngine.scale over {count:,} recipes', ('factor', 'time', 'recipes/s', 'rounded'), rows)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--recipes', type=int, default=200)
+    args = parser.parse_args(argv)
+    totals(args.rows)
+    scaling(args.recipes)
+
+
+if __name__ == '__main__':
+    main()
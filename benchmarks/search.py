@@ -0,0 +1,72 @@
+"""Fuzzy and prefix search with TitleSearchIndex, and the memory the index takes.
+
+The index is built over the titles and descriptions of `--recipes` synthetic recipes, once timed and once traced
+with tracemalloc, then queried with exact words, prefixes, typos and completions.
+
+    python -m benchmarks.search [--recipes 100000] [--queries 200]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from recipe.domain import TitleSearchIndex
+
+from .common import milliseconds, percentiles, report, synthetic_recipes
+
+
+def build(entries: list) -> TitleSearchIndex:
+    index = TitleSearchIndex()
+    index.add_many(entries)
+    return index
+
+
+def traced(entries: list) -> tuple:
+    """Bytes kept by an index over `entries`, and the peak while building it."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        index = build(entries)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del index
+    return current, peak
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+    recipes = synthetic_recipes(args.recipes)
+    entries = [(recipe['id'], recipe['title'], recipe['description']) for recipe in recipes]
+    start = time.perf_counter()
+    index = build(entries)
+    built = time.perf_counter() - start
+    current, peak = traced(entries)
+    report(f'TitleSearchIndex over {args.recipes:,} recipes', ('', 'value'),
+           [('build', milliseconds(built)), ('kept', f'{current / 2 ** 20:,.1f} MiB'),
+            ('kept per recipe', f'{current / args.recipes:,.0f} B'),
+            ('peak while building', f'{peak / 2 ** 20:,.1f} MiB')])
+
+    generator = random.Random(1)
+    words = [recipe['title'].split()[0] for recipe in generator.choices(recipes, k=args.queries)]
+
+    def typo(word: str) -> str:
+        position = generator.randrange(len(word))
+        return word[:position] + word[position + 1:]
+
+    rows = []
+    for name, query in [('exact word', index.search),
+                        ('prefix', lambda word: index.search(word[:3])),
+                        ('typo', lambda word: index.search(typo(word))),
+                        ('complete', lambda word: index.complete(word[:2]))]:
+        p50, p99 = percentiles(query, words)
+        rows.append((name, milliseconds(p50), milliseconds(p99)))
+    report(f'TitleSearchIndex queries, {args.queries} each', ('query', 'p50', 'p99'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Shopping lists over many recipes.
+
+`--recipes` recipes are fetched from a dealer that answers after `--latency` seconds, at several concurrencies.
+Then recipes that carry their ingredients are merged without any fetch, at each of `--merge-sizes`. The merge
+grows linearly with the number of recipes.
+
+    python -m benchmarks.shopping_list [--recipes 200] [--latency 0.01] [--merge-sizes 1000 4000 16000]
+"""
+import argparse
+import threading
+
+from recipe.domain import Id, QuantityEngine, ShoppingList
+
+from .common import best_of, milliseconds, report, synthetic_recipes
+
+
+class SlowDealer:
+    def __init__(self, recipes: list, latency: float):
+        self.recipes = {recipe['id']: recipe for recipe in recipes}
+        self.latency = latency
+
+    def show_specific_recipe(self, index: Id):
+        threading.Event().wait(self.latency)
+        return self.recipes[index.id]
+
+
+def fetched(count: int, latency: float) -> None:
+    dealer = SlowDealer(synthetic_recipes(count, seed=7), latency)
+    rows = []
+    for concurrency in (1, 4, 16):
+        seconds = best_of(lambda: list(ShoppingList(dealer, concurrency).fetch(range(1, count + 1))), repeat=1)
+        rows.append((concurrency, milliseconds(seconds), f'{count / seconds:,.0f}'))
+    report(f'ShoppingList.fetch over {count:,} recipes, {latency * 1e3:g} ms per request',
+           ('concurrency', 'time', 'recipes/s'), rows)
+
+
+def merged(sizes: list) -> None:
+    rows = []
+    for count in sizes:
+        recipes = synthetic_recipes(count, vocabulary=5000, seed=8)
+        shopping_list = best_of(lambda: list(ShoppingList(None).fetch(recipes)), repeat=1)
+        aggregated = best_of(lambda: QuantityEngine(vectorized=False).aggregate(recipes), repeat=1)
+        rows.append((f'{count:,}', milliseconds(shopping_list), milliseconds(aggregated)))
+    report('Merging recipes that carry their ingredients, 5000-name vocabulary',
+           ('recipes', 'ShoppingList', 'QuantityEngine.aggregate'), rows)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--merge-sizes', type=int, nargs='+', default=[1000, 4000, 16000])
+    args = parser.parse_args(argv)
+    fetched(args.recipes, args.latency)
+    merged(args.merge_sizes)
+
+
+if __name__ == '__main__':
+    main()
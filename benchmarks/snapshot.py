@@ -0,0 +1,47 @@
+"""Sorts and filters answered by RecipeSnapshot over a large synthetic catalog.
+
+    python -m benchmarks.snapshot [--recipes 100000] [--queries 200]
+"""
+import argparse
+import random
+import time
+
+from recipe.domain import Name, RecipeSnapshot, Title, Username
+
+from .common import milliseconds, percentiles, report, synthetic_recipes
+
+
+class Catalog:
+    def __init__(self, recipes: list):
+        self.recipes = recipes
+
+    def show_all_recipes(self):
+        return self.recipes
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+    recipes = synthetic_recipes(args.recipes)
+    snapshot = RecipeSnapshot(Catalog(recipes), max_age=float('inf'))
+    start = time.perf_counter()
+    snapshot.refresh()
+    refreshed = time.perf_counter() - start
+    samples = random.Random(1).choices(recipes, k=args.queries)
+    rows = [('refresh (sorts and indexes)', milliseconds(refreshed), '')]
+    for name, query in [
+            ('sort_by_title', lambda _: snapshot.sort_by_title()),
+            ('sort_by_date', lambda _: snapshot.sort_by_date()),
+            ('filter_by_author', lambda r: snapshot.filter_by_author(Username(r['author']))),
+            ('filter_by_title', lambda r: snapshot.filter_by_title(Title(r['title']))),
+            ('filter_by_ingredient', lambda r: snapshot.filter_by_ingredient(Name(r['ingredients'][0]['name'])))]:
+        p50, p99 = percentiles(query, samples)
+        rows.append((name, milliseconds(p50), milliseconds(p99)))
+    report(f'RecipeSnapshot over {args.recipes:,} recipes, {args.queries} queries each', ('query', 'p50', 'p99'),
+           rows)
+
+
+if __name__ == '__main__':
+    main()
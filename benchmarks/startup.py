@@ -0,0 +1,67 @@
+"""Time from launch to the first menu prompt, per SECURE_RECIPE_TYPECHECK mode.
+
+Each run is a fresh interpreter that replaces `input` and reports how long it took to be asked for the first
+choice. The modules, and their direct imports, that cost the most on the way are listed after the timings. With
+`--budget` the exit status is non-zero when a mode's best run is slower than its budget, in milliseconds.
+
+    python -m benchmarks.startup [--runs 7] [--budget strict=180 off=135]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from validation import TYPECHECK_MODES
+
+from .common import milliseconds, report
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_PROMPT = '''
+import builtins, sys, time
+start = time.perf_counter()
+def first_prompt(prompt):
+    sys.stderr.write(f'{time.perf_counter() - start}\\n')
+    return '0'
+builtins.input = first_prompt
+import recipe.app
+recipe.app.ApplicationForUser().run()
+'''
+
+
+def _run(mode: str, *options: str) -> str:
+    environment = dict(os.environ, SECURE_RECIPE_TYPECHECK=mode)
+    return subprocess.run([sys.executable, *options, '-c', _FIRST_PROMPT], cwd=_ROOT, env=environment,
+                          capture_output=True, text=True, check=True).stderr
+
+
+def first_prompt(mode: str, runs: int) -> float:
+    return min(float(_run(mode).split()[0]) for _ in range(runs))
+
+
+def heaviest_imports(mode: str, count: int = 10) -> list:
+    rows = [line.split('|') for line in _run(mode, '-X', 'importtime').splitlines() if line.startswith('import time:')]
+    shallow = [(name.strip(), int(cumulative)) for _, cumulative, name in rows[1:] if not name.startswith(' ' * 5)]
+    return sorted(shallow, key=lambda row: -row[1])[:count]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget', nargs='+', default=[], metavar='MODE=MS')
+    args = parser.parse_args(argv)
+    budgets = {mode: float(ms) / 1e3 for mode, ms in (budget.split('=') for budget in args.budget)}
+    results = {mode: first_prompt(mode, args.runs) for mode in TYPECHECK_MODES}
+    report(f'Launch to first prompt, best of {args.runs}', ('mode', 'time', 'budget'),
+           [(mode, milliseconds(seconds), milliseconds(budgets[mode]) if mode in budgets else '')
+            for mode, seconds in results.items()])
+    for mode in TYPECHECK_MODES:
+        report(f'Heaviest imports before the first prompt, SECURE_RECIPE_TYPECHECK={mode}', ('module', 'time'),
+               [(name, milliseconds(microseconds / 1e6)) for name, microseconds in heaviest_imports(mode)])
+    over = [mode for mode, budget in budgets.items() if results[mode] > budget]
+    if over:
+        sys.exit(f'Over budget: {", ".join(over)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Row access, sorts and filters in the columnar RecipeStore.
+
+    python -m benchmarks.store [--recipes 10000] [--queries 200]
+"""
+import argparse
+import random
+import time
+
+from recipe.domain import JsonHandler, RecipeStore, Username
+
+from .common import milliseconds, percentiles, report, synthetic_recipes
+
+
+def build(count: int) -> tuple:
+    """Recipes parsed from `count` synthetic dicts, the RecipeStore holding them, and the seconds each step took."""
+    start = time.perf_counter()
+    parsed = JsonHandler.create_recipes_from_json(synthetic_recipes(count))
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    store = RecipeStore.from_recipes(parsed)
+    return parsed, store, parse, time.perf_counter() - start
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+    parsed, store, parse, built = build(args.recipes)
+    rows = random.Random(2).choices(range(args.recipes), k=args.queries)
+    authors = [Username(parsed[row].author.value) for row in rows]
+    results = [('parse with create_recipes_from_json', milliseconds(parse), ''),
+               ('RecipeStore.from_recipes', milliseconds(built), '')]
+    for name, query, inputs in [('RecipeStore[row]', store.__getitem__, rows),
+                                ('RecipeStore.sort_by_title', lambda _: store.sort_by_title(), rows),
+                                ('RecipeStore.sort_by_date', lambda _: store.sort_by_date(), rows),
+                                ('RecipeStore.filter_by_author', store.filter_by_author, authors)]:
+        p50, p99 = percentiles(query, inputs)
+        results.append((name, milliseconds(p50), milliseconds(p99)))
+    report(f'RecipeStore over {args.recipes:,} recipes, {args.queries} queries each', ('operation', 'p50', 'p99'),
+           results)
+
+
+if __name__ == '__main__':
+    main()
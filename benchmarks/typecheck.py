@@ -0,0 +1,66 @@
+"""Per-call overhead of each SECURE_RECIPE_TYPECHECK mode.
+
+The mode is read once at import, so the cases run in one child process per mode.
+
+    python -m benchmarks.typecheck [--recipes 2000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+
+from recipe.domain import Description, Id, Ingredient, JsonHandler, Name, Quantity, Recipe, Title, Unit, Username
+from recipe.menu import Entry
+from validation import TYPECHECK_MODES
+
+from .common import best_of, microseconds, report, synthetic_recipes, words
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _one_pass(function, values) -> float:
+    return best_of(lambda: [function(value) for value in values], repeat=1) / len(values)
+
+
+def measure(count: int) -> dict:
+    """Seconds per call of each case in this process."""
+    recipes = synthetic_recipes(count)
+    fresh = [word.capitalize() for word in words(count + 1000, seed=3)[1000:]]
+    flour = Ingredient(Name('flour'), Quantity(1), Unit('kg'))
+    return {
+        'create_recipe_from_json': _one_pass(JsonHandler.create_recipe_from_json, recipes),
+        'create_recipes_from_json': best_of(lambda: JsonHandler.create_recipes_from_json(recipes), repeat=1) / count,
+        'Title, first construction': _one_pass(Title, fresh),
+        'Description': _one_pass(Description, fresh),
+        'Entry.create': best_of(lambda: Entry.create('1', 'Sign up'), 2000),
+        'Builder().with_ingredient': best_of(lambda: Recipe.Builder(
+            Id(1), Title('Pancakes'), Username('alice'), Description('Easy pancakes.'), date.today(), None
+        ).with_ingredient(flour), 2000),
+    }
+
+
+def measure_in_child(mode: str, recipes: int) -> dict:
+    environment = dict(os.environ, SECURE_RECIPE_TYPECHECK=mode)
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.typecheck', '--child', '--recipes', str(recipes)],
+                            cwd=_ROOT, env=environment, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=2000)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(measure(args.recipes)))
+        return
+    results = {mode: measure_in_child(mode, args.recipes) for mode in TYPECHECK_MODES}
+    cases = results[TYPECHECK_MODES[0]]
+    report(f'Per-call cost by SECURE_RECIPE_TYPECHECK mode, {args.recipes:,} recipes', ('case',) + TYPECHECK_MODES,
+           [(case,) + tuple(microseconds(results[mode][case]) for mode in TYPECHECK_MODES) for case in cases])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Cost of the precompiled validator registry.
+
+A registered validator is compared with looking its pattern up on every call, one by one and in batches with
+`validate_many`, and inside the value objects and menu entries that use it.
+
+    python -m benchmarks.validators [--values 5000]
+"""
+import argparse
+
+from recipe.domain import Description
+from recipe.menu import Entry
+from validation import pattern, validate_many, validator
+
+from .common import best_of, microseconds, report, words
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--values', type=int, default=5000)
+    args = parser.parse_args(argv)
+    values = [word.capitalize() for word in words(args.values, seed=3)]
+    title = validator('recipe.title')
+    rows = []
+    for name, run in [
+            ('pattern() looked up per call', lambda: [pattern(title.regex)(value) for value in values]),
+            ('registered validator call', lambda: [title(value) for value in values]),
+            ('validate_many', lambda: validate_many('recipe.title', values)),
+            ('Description', lambda: [Description(value) for value in values]),
+            ('Entry.create', lambda: [Entry.create('1', value) for value in values])]:
+        seconds = best_of(run) / len(values)
+        rows.append((name, microseconds(seconds), f'{1 / seconds:,.0f}'))
+    report(f'Validating {args.values:,} titles', ('case', 'per value', 'values/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
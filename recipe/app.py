@@ -1,40 +1,68 @@
-import getpass
+import os
 import sys
-from typing import Callable, Any
+from typing import Callable, Any, Iterable, Optional
 
-from typeguard import typechecked
-from valid8 import ValidationError
+from validation import lazy_import, typechecked
 
 from .domain import DealerRecipes, Title, Description, Name, Quantity, Unit, Password, Username, Id
-from .domain import JsonHandler, Email
+from .domain import JsonHandler, Email, RecipeSnapshot, RecipePager, RecipePage, RecipeRenderer, QuantityEngine
+from .domain import ShoppingList
+from .database import LocalRecipeDatabase
+from .exporter import RecipeExporter
+from .importer import RecipeImporter, read_records
 from .menu import Menu, Entry, Description as Description_
 
+getpass = lazy_import('getpass')
+requests = lazy_import('requests')
+valid8 = lazy_import('valid8')
+
+
+_ANYONE, _LOGGED_IN, _LOGGED_OUT = None, True, False
+_TABLE_CHUNK = 20
+
+# key, description, action, whether the action needs the server, who sees the entry
+_MENU_TABLE = (
+    ('1', 'Sign up', 'sign_up', True, _LOGGED_OUT),
+    ('2', 'Login', 'login', True, _LOGGED_OUT),
+    ('3', 'Show all the recipes', 'show_all_recipes', False, _ANYONE),
+    ('4', 'Show a recipe given a key', 'show_specific_recipe', False, _ANYONE),
+    ('5', 'Sort all recipes by date', 'sort_by_date', False, _ANYONE),
+    ('6', 'Sort all recipes by title', 'sort_by_title', False, _ANYONE),
+    ('7', 'Sort my recipes by date', 'sort_my_recipes_by_date', False, _LOGGED_IN),
+    ('8', 'Sort my recipes by title', 'sort_my_recipes_by_title', False, _LOGGED_IN),
+    ('9', 'Add recipe', 'add_new_recipe', True, _LOGGED_IN),
+    ('10', 'Delete recipe', 'delete_recipe', True, _LOGGED_IN),
+    ('11', 'Filter by author', 'filter_by_author', False, _ANYONE),
+    ('12', 'Filter by title', 'filter_by_title', False, _ANYONE),
+    ('13', 'Filter by ingredient', 'filter_by_ingredient', False, _ANYONE),
+    ('14', 'Update an existing recipe', 'update_my_recipe', True, _LOGGED_IN),
+    ('15', 'Log out', 'logout', True, _LOGGED_IN),
+    ('16', 'Filter by many ingredients', 'filter_by_ingredients', False, _ANYONE),
+    ('17', 'Browse recipes page by page', 'browse_recipes', True, _ANYONE),
+    ('18', 'Switch between detailed and table view', 'switch_view', False, _ANYONE),
+    ('19', 'Search recipes by title or description', 'search_recipes', False, _ANYONE),
+    ('20', 'Import recipes from a file', 'import_recipes', True, _LOGGED_IN),
+    ('21', 'Export all the recipes to a file', 'export_recipes', True, _ANYONE),
+    ('22', 'Scale a recipe', 'scale_recipe', False, _ANYONE),
+    ('23', 'Shopping list for selected recipes', 'shopping_list', False, _ANYONE),
+)
+
 
 class ApplicationForUser:
-    def __init__(self):
-        self.__menu = Menu.Builder(Description_('Secure Recipe Application from Command Line'),
-                                   auto_select=lambda: print('Welcome to Secure Recipe!')) \
-            .with_entry(Entry.create('1', 'Sign up', on_selected=lambda: self.__sign_up())) \
-            .with_entry(Entry.create('2', 'Login', on_selected=lambda: self.__login())) \
-            .with_entry(Entry.create('3', 'Show all the recipes', on_selected=lambda: self.__show_all_recipes())) \
-            .with_entry(
-            Entry.create('4', 'Show a recipe given a key', on_selected=lambda: self.__show_specific_recipe())) \
-            .with_entry(Entry.create('5', 'Sort all recipes by date', on_selected=lambda: self.__sort_by_date())) \
-            .with_entry(Entry.create('6', 'Sort all recipes by title', on_selected=lambda: self.__sort_by_title())) \
-            .with_entry(Entry.create('7', 'Sort my recipes by date',
-                                     on_selected=lambda: self.__sort_my_recipes_by_date())) \
-            .with_entry(Entry.create('8', 'Sort my recipes by title',
-                                     on_selected=lambda: self.__sort_my_recipes_by_title())) \
-            .with_entry(Entry.create('9', 'Add recipe', on_selected=lambda: self.__add_new_recipe())) \
-            .with_entry(Entry.create('10', 'Delete recipe', on_selected=lambda: self.__delete_recipe())) \
-            .with_entry(Entry.create('11', 'Filter by author', on_selected=lambda: self.__filter_by_author())) \
-            .with_entry(Entry.create('12', 'Filter by title', on_selected=lambda: self.__filter_by_title())) \
-            .with_entry(Entry.create('13', 'Filter by ingredient', on_selected=lambda: self.__filter_by_ingredient())) \
-            .with_entry(Entry.create('14', 'Update an existing recipe', on_selected=lambda: self.__update_my_recipe())) \
-            .with_entry(Entry.create('15', 'Log out', on_selected=lambda: self.__logout())) \
+    def __init__(self, database_path: Optional[str] = None):
+        builder = Menu.Builder(Description_('Secure Recipe Application from Command Line'),
+                               auto_select=lambda: print('Welcome to Secure Recipe!'))
+        for key, description, action, online, who in _MENU_TABLE:
+            builder.with_entry(Entry.create(key, description, on_selected=self.__on_selected(action, online),
+                                            is_visible=self.__is_visible(who)))
+        self.__menu = builder \
             .with_entry(Entry.create('0', 'Exit', on_selected=lambda: print('Bye bye!'), is_exit=True)) \
             .build()
         self.__dealer = DealerRecipes()
+        self.__database = LocalRecipeDatabase(self.__dealer, database_path) if database_path else None
+        self.__snapshot = RecipeSnapshot(self.__database or self.__dealer)
+        self.__renderer = RecipeRenderer()
+        self.__quantities = QuantityEngine()
         self.__my_key = ''
 
     @typechecked
@@ -51,7 +79,7 @@ class ApplicationForUser:
                     line = int(line.strip())
                 res = builder(line)
                 return res
-            except ValidationError as e:
+            except valid8.ValidationError as e:
                 self.__error(f'Invalid {prompt}.\n {e.help_msg}')
             except (TypeError, ValueError) as e:
                 self.__error(f'Invalid {prompt}.\n {e}')
@@ -65,6 +93,26 @@ class ApplicationForUser:
             else:
                 self.__error(f'Invalid selection.')
 
+    def __online(self, action: Callable[[], None]) -> None:
+        try:
+            action()
+        except requests.RequestException:
+            self.__error('The server is unreachable. Recipes can only be read until it is back.')
+
+    def __on_selected(self, action: str, online: bool) -> Callable[[], None]:
+        name = f'_ApplicationForUser__{action}'
+        if online:
+            return lambda: self.__online(getattr(self, name))
+        return lambda: getattr(self, name)()
+
+    def __is_visible(self, who: Optional[bool]) -> Callable[[], bool]:
+        return (lambda: True) if who is _ANYONE else lambda: self.__is_logged() == who
+
+    def __invalidate(self) -> None:
+        self.__snapshot.invalidate()
+        if self.__database is not None:
+            self.__database.invalidate()
+
     def __is_logged(self):
         return self.__my_key != ''
 
@@ -117,6 +165,7 @@ class ApplicationForUser:
         input_description = self.__read_from_input('Description', Description)
         ingredients = self.__read_ingredients_from_input()
         result = self.__dealer.add_new_recipe(self.__my_key, input_title, input_description, ingredients)
+        self.__invalidate()
         self.__print_result_from_request(result)
 
     def __delete_recipe(self):
@@ -125,51 +174,207 @@ class ApplicationForUser:
             return
         input_id = self.__read_from_input('Id', Id, to_convert=True)
         result = self.__dealer.delete_recipe(self.__my_key, input_id)
+        if self.__database is not None and result == 'The recipe is cancelled!':
+            self.__database.forget(input_id)
+        self.__invalidate()
         if result == 'The recipe is cancelled!':
             print(result)
         else:
             self.__error(result)
 
+    def __import_recipes(self):
+        if not self.__is_logged():
+            self.__error('You can not perform this action without login.')
+            return
+        input_path = self.__read_from_input('File (.json, .jsonl or .csv)', str)
+        counts = {}
+        try:
+            for result in RecipeImporter(self.__dealer, self.__my_key).run(read_records(input_path)):
+                counts[result.status] = counts.get(result.status, 0) + 1
+                print(result)
+        except (OSError, ValueError) as e:
+            self.__error(f'Import interrupted.\n {e}')
+        finally:
+            if counts.get('added'):
+                self.__invalidate()
+        print(', '.join(f'{count} {status}' for status, count in counts.items()) or 'No recipe to import.')
+
+    def __export_recipes(self):
+        input_path = self.__read_from_input('File (.jsonl, .csv or .parquet)', str)
+        recipes = self.__database.iter_all_recipes() if self.__database is not None \
+            else self.__dealer.stream_all_recipes()
+        try:
+            print(RecipeExporter().export(recipes, input_path))
+        except valid8.ValidationError as e:
+            self.__error(f'Export interrupted.\n {e.help_msg}')
+        except (OSError, ValueError) as e:
+            self.__error(f'Export interrupted.\n {e}')
+
     def __show_all_recipes(self):
-        result = self.__dealer.show_all_recipes()
-        self.__print_result_from_request(result)
+        if self.__database is not None:
+            self.__print_result_from_request(self.__database.show_all_recipes())
+            return
+        chunk, chunk_size = [], _TABLE_CHUNK if self.__renderer.table else 1
+        for result in self.__dealer.stream_all_recipes():
+            is_recipe = type(result) is dict and 'title' in result and 'detail' not in result
+            if is_recipe:
+                chunk.append(JsonHandler.create_recipe_from_json(result))
+            if chunk and (not is_recipe or len(chunk) >= chunk_size):
+                self.__renderer.render(chunk)
+                chunk = []
+            if not is_recipe:
+                self.__print_result_from_request(result)
+        if chunk:
+            self.__renderer.render(chunk)
+
+    def __browse_recipes(self):
+        views = {'a': '/recipes/', 't': '/recipes/sort-by-title/', 'd': '/recipes/sort-by-date/'}
+        order = self.__read_choice_from_input('Order by (a)dding, (t)itle or (d)ate', views.keys())
+        with RecipePager(self.__database or self.__dealer, view=views[order]) as pager:
+            result = pager.page(1)
+            while type(result) is RecipePage:
+                self.__print_result_from_request(result.items)
+                print(f'Page {result.number} of {result.pages or "?"}')
+                command = input('Type n for the next page, p for the previous one, '
+                                'a page number to jump to it, anything else to stop: ').strip()
+                if command == 'n' and result.has_next:
+                    result = pager.page(result.number + 1)
+                elif command == 'p' and result.has_previous:
+                    result = pager.page(result.number - 1)
+                elif command.isdigit() and int(command) >= 1:
+                    result = pager.page(int(command))
+                elif command not in ('n', 'p'):
+                    return
+            self.__print_result_from_request(result)
+
+    @typechecked
+    def __read_choice_from_input(self, prompt: str, choices: Iterable[str]) -> str:
+        choices = list(choices)
+        while True:
+            line = input(f'{prompt}: ').strip()
+            if line in choices:
+                return line
+            else:
+                self.__error(f'Invalid selection.')
+
+    def __switch_view(self):
+        self.__renderer = RecipeRenderer(table=not self.__renderer.table)
+        print('Recipes are now shown as a table.' if self.__renderer.table else 'Recipes are now shown in detail.')
 
     def __show_specific_recipe(self):
         input_id: Id = self.__read_from_input('Id', Id, to_convert=True)
-        result = self.__dealer.show_specific_recipe(input_id)
+        result = (self.__database or self.__dealer).show_specific_recipe(input_id)
         self.__print_result_from_request(result)
 
     def __sort_by_title(self):
-        result = self.__dealer.sort_by_title()
+        result = self.__snapshot.sort_by_title()
         self.__print_result_from_request(result)
 
     def __sort_by_date(self):
-        result = self.__dealer.sort_by_date()
+        result = self.__snapshot.sort_by_date()
         self.__print_result_from_request(result)
 
     def __sort_my_recipes_by_title(self):
-        result = self.__dealer.sort_my_recipes_by_title(self.__my_key)
+        if not self.__is_logged():
+            self.__error('You can not perform this action without login.')
+            return
+        result = (self.__database or self.__dealer).sort_my_recipes_by_title(self.__my_key)
         self.__print_result_from_request(result)
 
     def __sort_my_recipes_by_date(self):
-        result = self.__dealer.sort_my_recipes_by_date(self.__my_key)
+        if not self.__is_logged():
+            self.__error('You can not perform this action without login.')
+            return
+        result = (self.__database or self.__dealer).sort_my_recipes_by_date(self.__my_key)
         self.__print_result_from_request(result)
 
     def __filter_by_author(self):
         input_author: Username = self.__read_from_input('Username', Username)
-        result = self.__dealer.filter_by_author(input_author)
+        result = self.__snapshot.filter_by_author(input_author)
         self.__print_result_from_request(result)
 
     def __filter_by_title(self):
         input_title: Title = self.__read_from_input('Title', Title)
-        result = self.__dealer.filter_by_title(input_title)
+        result = self.__snapshot.filter_by_title(input_title)
         self.__print_result_from_request(result)
 
     def __filter_by_ingredient(self):
         input_ingredient_name: Name = self.__read_from_input('Name', Name)
-        result = self.__dealer.filter_by_ingredient(input_ingredient_name)
+        result = self.__snapshot.filter_by_ingredient(input_ingredient_name)
+        self.__print_result_from_request(result)
+
+    def __filter_by_ingredients(self):
+        print('If you want to do something digit "y", otherwise digit "n".')
+        all_of = self.__read_names_from_input('Do you want ingredients that must all be present?')
+        any_of = self.__read_names_from_input('Do you want ingredients of which at least one must be present?')
+        none_of = self.__read_names_from_input('Do you want ingredients that must not be present?')
+        if not all_of + any_of + none_of:
+            self.__error('Please, insert at least one ingredient.')
+            return
+        result = self.__snapshot.filter_by_ingredients(all_of, any_of, none_of)
+        self.__print_result_from_request(result)
+
+    def __search_recipes(self):
+        input_text: Description = self.__read_from_input('Search', Description)
+        result = self.__snapshot.search(input_text.value)
+        if result == []:
+            self.__error('No recipe matches the search.')
+            return
         self.__print_result_from_request(result)
 
+    def __scale_recipe(self):
+        input_id: Id = self.__read_from_input('Id', Id, to_convert=True)
+        result = (self.__database or self.__dealer).show_specific_recipe(input_id)
+        if type(result) is not dict or 'title' not in result:
+            self.__print_result_from_request(result)
+            return
+        servings: Quantity = self.__read_from_input('Servings of the recipe', Quantity, to_convert=True)
+        wanted: Quantity = self.__read_from_input('Servings wanted', Quantity, to_convert=True)
+        try:
+            scaled = self.__quantities.scale(JsonHandler.create_recipe_from_json(result),
+                                             wanted.value / servings.value)
+        except valid8.ValidationError as e:
+            self.__error(e.help_msg)
+            return
+        self.__renderer.render([scaled.recipe])
+        for rounding in scaled.rounded:
+            print(f'Rounded {rounding}.')
+
+    def __shopping_list(self):
+        choice = self.__read_choice_from_input('Select the recipes by id (i), author (a) or ingredient (n)', 'ian')
+        if choice == 'a':
+            recipes = self.__snapshot.filter_by_author(self.__read_from_input('Username', Username))
+        elif choice == 'n':
+            recipes = self.__snapshot.filter_by_ingredient(self.__read_from_input('Name', Name))
+        else:
+            recipes = [self.__read_from_input('Id', Id, to_convert=True)]
+            while self.__read_yes_or_not_from_input('Do you want to add another recipe?') == 'y':
+                recipes.append(self.__read_from_input('Id', Id, to_convert=True))
+        if type(recipes) is not list:
+            self.__print_result_from_request(recipes)
+            return
+        shopping_list = ShoppingList(self.__database or self.__dealer)
+        for index, result in shopping_list.fetch(recipes):
+            if 'title' in result:
+                print(f'Added {result["title"]}.')
+            else:
+                self.__error(f'Recipe {index}: {result.get("detail", result)}')
+        totals = shopping_list.totals()
+        if not totals:
+            self.__error('No ingredient to buy.')
+            return
+        print('Shopping list:')
+        for total in totals:
+            print(f'\t-{total.format()}')
+
+    def __read_names_from_input(self, prompt: str) -> list:
+        names = []
+        choose_char = self.__read_yes_or_not_from_input(prompt)
+        while choose_char == 'y':
+            names.append(self.__read_from_input('Name', Name))
+            choose_char = self.__read_yes_or_not_from_input('Do you want to insert another one?')
+        return names
+
     def __update_my_recipe(self):
         if not self.__is_logged():
             self.__error('You can not perform this action without login.')
@@ -179,7 +384,7 @@ class ApplicationForUser:
         if 'detail' in recipe_to_change:
             self.__error(recipe_to_change['detail'])
             return
-        JsonHandler.create_recipe_from_json(recipe_to_change).print()
+        self.__renderer.render([JsonHandler.create_recipe_from_json(recipe_to_change)])
         print('If you want to do something digit "y", otherwise digit "n".')
         if self.__read_yes_or_not_from_input('Do you want to change the title?') == 'y':
             recipe_to_change['title'] = self.__read_from_input('Title', Title).value
@@ -188,6 +393,7 @@ class ApplicationForUser:
         if self.__read_yes_or_not_from_input('Do you want to change the ingredients?') == 'y':
             recipe_to_change['ingredients'] = self.__read_ingredients_from_input()
         result = self.__dealer.update_my_recipe(self.__my_key, input_id_to_change, recipe_to_change)
+        self.__invalidate()
         self.__print_result_from_request(result)
 
     def __read_ingredients_from_input(self):
@@ -206,15 +412,12 @@ class ApplicationForUser:
     @typechecked
     def __print_result_from_request(self, result: Any):
         if type(result) is list:
-            for r in result:
-                my_recipe = JsonHandler.create_recipe_from_json(r)
-                my_recipe.print()
+            self.__renderer.render(JsonHandler.create_recipes_from_json(result))
         else:
             if 'detail' in result:
                 self.__error(result['detail'])
             elif 'title' in result:
-                my_recipe = JsonHandler.create_recipe_from_json(result)
-                my_recipe.print()
+                self.__renderer.render([JsonHandler.create_recipe_from_json(result)])
             else:
                 self.__error(result)
 
@@ -243,11 +446,15 @@ class ApplicationForUser:
             self.__run()
         except:
             print('Error during execution!', file=sys.stderr)
+        finally:
+            if self.__database is not None:
+                self.__database.close()
+            self.__dealer.close()
 
 
 def main(name: str):
     if name == '__main__':
-        ApplicationForUser().run()
+        ApplicationForUser(os.environ.get('SECURE_RECIPE_DB')).run()
 
 
 main(__name__)
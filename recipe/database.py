@@ -0,0 +1,254 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from validation import lazy_import, typechecked, validate
+
+from .domain import DealerRecipes, Id, Name, RecipePage, Title, Username
+
+requests = lazy_import('requests')
+sqlite3 = lazy_import('sqlite3')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_title ON recipes (title COLLATE NOCASE, id);
+CREATE INDEX IF NOT EXISTS recipes_author ON recipes (author COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS recipes_created_at ON recipes (created_at, id);
+CREATE TABLE IF NOT EXISTS ingredients (
+    recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+);
+CREATE INDEX IF NOT EXISTS ingredients_name ON ingredients (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS personal_recipes (
+    owner TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+    PRIMARY KEY (owner, recipe_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+_PAGE_ORDERS = {'/recipes/': 'id', '/recipes/sort-by-title/': 'title COLLATE NOCASE, id',
+                '/recipes/sort-by-date/': 'created_at DESC, id DESC'}
+
+
+@typechecked
+@dataclass(frozen=True)
+class LocalRecipeDatabase:
+    """On-disk mirror of the recipes served by the API.
+
+    Reads are answered from SQLite. Before answering, the mirror pulls only the recipes changed since the
+    last `updated_at` (or `created_at`) watermark, at most once every `sync_interval` seconds. The first sync
+    of each session and `sync(full=True)` download everything and drop the recipes the server no longer has.
+    When the server cannot be reached the last mirrored data is served and `is_online()` becomes false.
+    """
+    dealer: DealerRecipes
+    path: str = field(default=':memory:')
+    sync_interval: float = field(default=30.0)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    __connection: Any = field(default=None, repr=False, init=False, compare=False)
+    __state: dict = field(default_factory=dict, repr=False, init=False, compare=False)
+    __lock: Any = field(default_factory=threading.RLock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('sync_interval', self.sync_interval, min_value=0,
+                 help_msg='The sync interval is invalid. Check the value.')
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.executescript(_SCHEMA)
+        object.__setattr__(self, '_LocalRecipeDatabase__connection', connection)
+
+    def __enter__(self) -> 'LocalRecipeDatabase':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def is_online(self) -> bool:
+        return self.__state.get('online', False)
+
+    @staticmethod
+    def __owner(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def __get_state(self, name: str) -> Optional[str]:
+        row = self.__connection.execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def __set_state(self, name: str, value: str) -> None:
+        self.__connection.execute('INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)', (name, value))
+
+    def __fetch(self, view: str, **kwargs) -> Optional[list]:
+        try:
+            result = self.dealer.get_request(view, **kwargs)
+        except requests.RequestException:
+            self.__state['online'] = False
+            return None
+        self.__state['online'] = True
+        return result if type(result) is list else None
+
+    def __upsert(self, recipes: list) -> None:
+        for recipe in recipes:
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO recipes (id, title, author, created_at, updated_at, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (recipe['id'], recipe['title'], recipe['author'], recipe['created_at'], recipe.get('updated_at'),
+                 json.dumps(recipe)))
+            self.__connection.execute('DELETE FROM ingredients WHERE recipe_id = ?', (recipe['id'],))
+            self.__connection.executemany(
+                'INSERT INTO ingredients (recipe_id, position, name, quantity, unit) VALUES (?, ?, ?, ?, ?)',
+                [(recipe['id'], position, i['name'], i['quantity'], i['unit'])
+                 for position, i in enumerate(recipe['ingredients'])])
+
+    def sync(self, full: bool = False) -> bool:
+        with self.__lock:
+            watermark = self.__get_state('recipes.watermark')
+            full = full or watermark is None or 'synced_at' not in self.__state
+            result = self.__fetch('/recipes/' if full else f'/recipes/?updated_since={watermark}')
+            if result is None:
+                return False
+            with self.__connection:
+                self.__upsert(result)
+                if full:
+                    self.__connection.execute('CREATE TEMP TABLE IF NOT EXISTS synced_ids (id INTEGER PRIMARY KEY)')
+                    self.__connection.execute('DELETE FROM synced_ids')
+                    self.__connection.executemany('INSERT OR IGNORE INTO synced_ids (id) VALUES (?)',
+                                                  [(r['id'],) for r in result])
+                    self.__connection.execute('DELETE FROM recipes WHERE id NOT IN (SELECT id FROM synced_ids)')
+                watermark = self.__connection.execute(
+                    'SELECT MAX(COALESCE(updated_at, created_at)) FROM recipes').fetchone()[0]
+                if watermark is not None:
+                    self.__set_state('recipes.watermark', watermark)
+            self.__state['synced_at'] = self.clock()
+            return True
+
+    @typechecked
+    def sync_personal(self, key: str) -> bool:
+        with self.__lock:
+            result = self.__fetch('/personal-area/sort-by-title/', headers={'Authorization': f'Token {key}'})
+            if result is None:
+                return False
+            owner = self.__owner(key)
+            with self.__connection:
+                self.__upsert(result)
+                self.__connection.execute('DELETE FROM personal_recipes WHERE owner = ?', (owner,))
+                self.__connection.executemany('INSERT INTO personal_recipes (owner, recipe_id) VALUES (?, ?)',
+                                              [(owner, r['id']) for r in result])
+            self.__state[owner] = self.clock()
+            return True
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            for name in self.__state:
+                if name != 'online':
+                    self.__state[name] = None
+
+    @typechecked
+    def forget(self, index: Id) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute('DELETE FROM recipes WHERE id = ?', (index.id,))
+
+    def __refresh(self, name: str = 'synced_at', sync: Callable[[], bool] = None) -> None:
+        synced_at = self.__state.get(name)
+        if synced_at is None or self.clock() - synced_at >= self.sync_interval:
+            (sync or self.sync)()
+
+    def __select(self, where: str = '', order_by: str = 'id', parameters: tuple = ()) -> List[dict]:
+        with self.__lock:
+            rows = self.__connection.execute(f'SELECT payload FROM recipes {where} ORDER BY {order_by}', parameters)
+            return [json.loads(payload) for payload, in rows]
+
+    def show_all_recipes(self):
+        self.__refresh()
+        return self.__select()
+
+    def iter_all_recipes(self, batch_size: int = 500):
+        validate('batch_size', batch_size, min_value=1, help_msg='The batch size is invalid. Check the value.')
+        self.__refresh()
+        last = -1
+        while True:
+            with self.__lock:
+                rows = self.__connection.execute(
+                    'SELECT id, payload FROM recipes WHERE id > ? ORDER BY id LIMIT ?', (last, batch_size)).fetchall()
+            for last, payload in rows:
+                yield json.loads(payload)
+            if len(rows) < batch_size:
+                return
+
+    def show_recipes_page(self, number: int, page_size: int = 10, view: str = '/recipes/'):
+        validate('page.number', number, min_value=1, help_msg='The page number is invalid. Check the value.')
+        validate('page.page_size', page_size, min_value=1, max_value=100,
+                 help_msg='The page size is invalid. Check the value.')
+        validate('page.view', view, custom=lambda v: v in _PAGE_ORDERS, help_msg='The view cannot be paged locally.')
+        self.__refresh()
+        offset = (number - 1) * page_size
+        with self.__lock:
+            count, = self.__connection.execute('SELECT COUNT(*) FROM recipes').fetchone()
+            rows = self.__connection.execute(
+                f'SELECT payload FROM recipes ORDER BY {_PAGE_ORDERS[view]} LIMIT ? OFFSET ?', (page_size, offset))
+            items = [json.loads(payload) for payload, in rows]
+        return RecipePage(items, number, page_size, count, offset + page_size < count)
+
+    @typechecked
+    def show_specific_recipe(self, index: Id):
+        self.__refresh()
+        result = self.__select('WHERE id = ?', parameters=(index.id,))
+        return result[0] if result else {'detail': 'Not found.'}
+
+    def sort_by_title(self):
+        self.__refresh()
+        return self.__select(order_by='title COLLATE NOCASE, id')
+
+    def sort_by_date(self):
+        self.__refresh()
+        return self.__select(order_by='created_at DESC, id DESC')
+
+    @typechecked
+    def filter_by_author(self, author: Username):
+        self.__refresh()
+        return self.__select('WHERE author = ? COLLATE NOCASE', parameters=(author.value,))
+
+    @typechecked
+    def filter_by_title(self, title: Title):
+        self.__refresh()
+        return self.__select('WHERE title = ? COLLATE NOCASE', parameters=(title.value,))
+
+    @typechecked
+    def filter_by_ingredient(self, ingredient: Name):
+        self.__refresh()
+        return self.__select('WHERE id IN (SELECT recipe_id FROM ingredients WHERE name = ? COLLATE NOCASE)',
+                             parameters=(ingredient.value,))
+
+    def __my_recipes(self, key: str, order_by: str) -> List[dict]:
+        owner = self.__owner(key)
+        self.__refresh(owner, lambda: self.sync_personal(key))
+        return self.__select('WHERE id IN (SELECT recipe_id FROM personal_recipes WHERE owner = ?)', order_by,
+                             (owner,))
+
+    @typechecked
+    def sort_my_recipes_by_title(self, key: str):
+        return self.__my_recipes(key, 'title COLLATE NOCASE, id')
+
+    @typechecked
+    def sort_my_recipes_by_date(self, key: str):
+        return self.__my_recipes(key, 'created_at DESC, id DESC')
@@ -1,27 +1,77 @@
+import bisect
+import codecs
+import contextvars
+import functools
+import hashlib
+import heapq
+import io
 import json
+import math
+import re
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, InitVar, field
-from typing import Any, Optional, List, Dict
-
-import requests
-from typeguard import typechecked
-from valid8 import validate
+from typing import Any, Optional, List, Dict, Iterable, Callable, Tuple, Iterator, Set
 
 from datetime import date, datetime
-from validation.regex import pattern
+from validation import lazy_import, register, typechecked, validate
+
+asyncio = lazy_import('asyncio')
+futures = lazy_import('concurrent.futures')
+mmap = lazy_import('mmap')
+requests = lazy_import('requests')
+numpy = lazy_import('numpy', optional=True)
+
+_TITLE_PATTERN = register('recipe.title', r'^[a-zA-Z ]+$')
+_USERNAME_PATTERN = register('recipe.username', r'^[a-zA-Z0-9_\-\.]+$')
+_DESCRIPTION_PATTERN = register('recipe.description', r'^[a-zA-Z0-9À-ú \'!;\.,\n]+')
+_NAME_PATTERN = register('recipe.name', r'^[a-zA-ZÀ-ú ]+$')
+_PASSWORD_PATTERN = register('recipe.password', r'^[a-zA-Z0-9_\-@#*\.!?$^=+]+$')
+_EMAIL_PATTERN = register('recipe.email', r'^[a-zA-Z0-9\.]+@[a-z]+\.[a-z]+$')
+_API_SERVER_PATTERN = register('dealer.api_server', r'^https?://[^\s/]+(/[^\s]*[^\s/])?$')
+
+_INTERN_LIMIT = 1 << 16
+_intern_pools: Dict[type, Dict[Tuple[type, Any], Any]] = {}
+
+
+class _Interned(type):
+    def __call__(cls, *args, **kwargs):
+        if len(args) + len(kwargs) != 1 or (kwargs and 'value' not in kwargs):
+            return super().__call__(*args, **kwargs)
+        value = args[0] if args else kwargs['value']
+        return _intern(cls, value, lambda: super(_Interned, cls).__call__(*args, **kwargs))
+
+
+def _intern(cls: type, value: Any, create: Callable[[], Any]) -> Any:
+    pool = _intern_pools.setdefault(cls, {})
+    key = (type(value), value)
+    try:
+        instance = pool.get(key)
+    except TypeError:
+        return create()
+    if instance is None:
+        instance = create()
+        if len(pool) < _INTERN_LIMIT:
+            pool[key] = instance
+    return instance
 
 
 @typechecked
-@dataclass(frozen=True, order=True)
-class Title:
+@dataclass(frozen=True, order=True, slots=True)
+class Title(metaclass=_Interned):
     value: str
 
     def __post_init__(self):
-        validate('title', self.value, min_len=1, max_len=30, custom=pattern(r'^[a-zA-Z ]+$'),
+        validate('title', self.value, min_len=1, max_len=30, custom=_TITLE_PATTERN,
                  help_msg='The title is invalid. Check the length or the syntax.')
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Id:
     id: int
 
@@ -30,37 +80,37 @@ class Id:
 
 
 @typechecked
-@dataclass(frozen=True, order=True)
-class Username:
+@dataclass(frozen=True, order=True, slots=True)
+class Username(metaclass=_Interned):
     value: str
 
     def __post_init__(self):
-        validate('password', self.value, min_len=4, max_len=30, custom=pattern(r'^[a-zA-Z0-9_\-\.]+$'),
+        validate('password', self.value, min_len=4, max_len=30, custom=_USERNAME_PATTERN,
                  help_msg='The username is invalid. Check the length or the syntax.')
 
 
 @typechecked
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Description:
     value: str
 
     def __post_init__(self):
-        validate('title', self.value, min_len=1, max_len=500, custom=pattern(r'^[a-zA-Z0-9À-ú \'!;\.,\n]+'),
+        validate('title', self.value, min_len=1, max_len=500, custom=_DESCRIPTION_PATTERN,
                  help_msg='The description is invalid. Check the length or the syntax.')
 
 
 @typechecked
-@dataclass(frozen=True, order=True)
-class Name:
+@dataclass(frozen=True, order=True, slots=True)
+class Name(metaclass=_Interned):
     value: str
 
     def __post_init__(self):
-        validate('name', self.value, min_len=1, max_len=30, custom=pattern(r'^[a-zA-ZÀ-ú ]+$'),
+        validate('name', self.value, min_len=1, max_len=30, custom=_NAME_PATTERN,
                  help_msg='The name is invalid. Check the length or the syntax.')
 
 
 @typechecked
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Quantity:
     value: int
 
@@ -70,8 +120,8 @@ class Quantity:
 
 
 @typechecked
-@dataclass(frozen=True)
-class Unit:
+@dataclass(frozen=True, slots=True)
+class Unit(metaclass=_Interned):
     value: str
     _my_units = ['kg', 'g', 'l', 'cl', 'ml', 'cup', 'n/a']
 
@@ -85,13 +135,49 @@ class Unit:
 
 
 @typechecked
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Ingredient:
     name: Name
     quantity: Quantity
     unit: Unit
 
 
+_UNIT_SCALES = {'g': ('g', 1), 'kg': ('g', 1000), 'ml': ('ml', 1), 'cl': ('ml', 10), 'l': ('ml', 1000),
+                'cup': ('cup', 1), 'n/a': ('n/a', 1)}
+_BASE_UNITS = ('cup', 'g', 'ml', 'n/a')
+
+
+_ROUNDING_TOLERANCE = 0.01
+
+
+def _normalize(quantity: int, unit: str) -> Tuple[int, str]:
+    base, scale = _UNIT_SCALES[unit]
+    return quantity * scale, base
+
+
+def _express(amount: float, base: str, tolerance: float = 0.0) -> Optional[Tuple[int, str]]:
+    best = None
+    for unit, (unit_base, scale) in _UNIT_SCALES.items():
+        if unit_base == base and amount > 0:
+            value = min(1000, max(1, math.floor(amount / scale + 0.5)))
+            error = abs(value * scale - amount) / amount
+            if best is None or (error, -scale) < best[0]:
+                best = (error, -scale), value, unit
+    if best is None or best[0][0] > tolerance:
+        return None
+    return best[1], best[2]
+
+
+def _merge_ingredients(first: Ingredient, second: Ingredient) -> Ingredient:
+    base, first_scale = _UNIT_SCALES[first.unit.value]
+    second_base, second_scale = _UNIT_SCALES[second.unit.value]
+    validate('ingredient.unit', second_base, equals=base, help_msg=f'The units of {first.name.value} cannot be merged.')
+    merged = _express(first.quantity.value * first_scale + second.quantity.value * second_scale, base)
+    validate('ingredient.quantity', merged,
+             help_msg=f'The merged quantity of {first.name.value} cannot be written in a single unit.')
+    return Ingredient(first.name, Quantity(merged[0]), Unit(merged[1]))
+
+
 @typechecked
 @dataclass(frozen=True)
 class Recipe:
@@ -105,34 +191,55 @@ class Recipe:
     __map_of_ingredients: Dict[Name, Ingredient] = field(default_factory=dict, repr=False, init=False)
     create_key: InitVar[Any] = field(default='None')
 
-    def print(self) -> None:
-        print('-' * 50)
-        print(self.title.value)
-        print('-' * 50)
-        print(f'Id: {self.id.id}')
-        print(f'Description: {self.description.value}')
-        print(f'Author: {self.author.value}')
-        print(f'Created_at: {self.created_at.__str__()}')
+    def format(self) -> str:
+        lines = ['-' * 50, self.title.value, '-' * 50,
+                 f'Id: {self.id.id}',
+                 f'Description: {self.description.value}',
+                 f'Author: {self.author.value}',
+                 f'Created_at: {self.created_at.__str__()}']
         if self.updated_at is not None:
-            print(f'Updated_at: {self.updated_at.__str__()}')
-        print('Ingredients:')
+            lines.append(f'Updated_at: {self.updated_at.__str__()}')
+        lines.append('Ingredients:')
         for ingredient in self.__ingredients:
-            print(f'\t-{ingredient.name.value}: {ingredient.quantity.value} {ingredient.unit.value}')
-        print('')
+            lines.append(f'\t-{ingredient.name.value}: {ingredient.quantity.value} {ingredient.unit.value}')
+        lines.append('\n')
+        return '\n'.join(lines)
+
+    def print(self) -> None:
+        print(self.format(), end='')
 
     def __post_init__(self, create_key: Any):
         validate('create_key', create_key, custom=Recipe.Builder.is_valid_key)
 
-    @typechecked
-    def _add_ingredient(self, ingredient: Ingredient, create_key: Any) -> None:
+    def _add_ingredients(self, ingredients: Iterable[Ingredient], create_key: Any, merge: bool = False) -> None:
         validate('create_key', create_key, custom=Recipe.Builder.is_valid_key)
-        validate('ingredient.name', ingredient.name, custom=lambda v: v not in self.__map_of_ingredients)
-        self.__ingredients.append(ingredient)
-        self.__map_of_ingredients[ingredient.name] = ingredient
+        known = self.__map_of_ingredients
+        pending = {}
+        for ingredient in ingredients:
+            if type(ingredient) is not Ingredient:
+                raise TypeError(f'type of ingredient must be Ingredient; got {type(ingredient).__name__} instead')
+            name = ingredient.name
+            previous = pending.get(name) or known.get(name)
+            if previous is None:
+                pending[name] = ingredient
+            elif merge:
+                pending[name] = _merge_ingredients(previous, ingredient)
+            else:
+                validate('ingredient.name', name, custom=lambda v: v not in known and v not in pending)
+        for name, ingredient in pending.items():
+            if name in known:
+                self.__ingredients[self.__ingredients.index(known[name])] = ingredient
+            else:
+                self.__ingredients.append(ingredient)
+            known[name] = ingredient
 
     def _has_at_least_one_ingredient(self):
         return len(self.__ingredients) >= 1
 
+    @property
+    def ingredients(self) -> Tuple[Ingredient, ...]:
+        return tuple(self.__ingredients)
+
     @typechecked
     @dataclass()
     class Builder:
@@ -150,7 +257,13 @@ class Recipe:
         @typechecked
         def with_ingredient(self, ingredient: Ingredient) -> 'Recipe.Builder':
             validate('recipe', self.__recipe)
-            self.__recipe._add_ingredient(ingredient, self.__create_key)
+            self.__recipe._add_ingredients((ingredient,), self.__create_key)
+            return self
+
+        @typechecked
+        def with_ingredients(self, ingredients: Iterable[Ingredient], merge: bool = False) -> 'Recipe.Builder':
+            validate('recipe', self.__recipe)
+            self.__recipe._add_ingredients(ingredients, self.__create_key, merge)
             return self
 
         def build(self) -> 'Recipe':
@@ -166,7 +279,7 @@ class Password:
     value: str
 
     def __post_init__(self):
-        validate('password', self.value, min_len=8, max_len=30, custom=pattern(r'^[a-zA-Z0-9_\-@#*\.!?$^=+]+$'),
+        validate('password', self.value, min_len=8, max_len=30, custom=_PASSWORD_PATTERN,
                  help_msg='The password is invalid. Check the length or the syntax.')
 
 
@@ -176,10 +289,235 @@ class Email:
     value: str
 
     def __post_init__(self):
-        validate('email', self.value, min_len=8, max_len=30, custom=pattern(r'^[a-zA-Z0-9\.]+@[a-z]+\.[a-z]+$'),
+        validate('email', self.value, min_len=8, max_len=30, custom=_EMAIL_PATTERN,
                  help_msg='The email is invalid. Check the length or the syntax.')
 
 
+@dataclass(frozen=True, order=True)
+class IngredientTotal:
+    name: str
+    amount: int
+    unit: str
+
+    def format(self) -> str:
+        scale, unit = max((scale, unit) for unit, (base, scale) in _UNIT_SCALES.items()
+                          if base == self.unit and scale <= max(self.amount, 1))
+        return f'{self.name}: {self.amount / scale:g} {unit}'
+
+
+@dataclass(frozen=True)
+class Rounding:
+    name: str
+    exact: float
+    quantity: int
+    unit: str
+
+    def __str__(self) -> str:
+        return f'{self.name} from {self.exact:g} {self.unit} to {self.quantity} {self.unit}'
+
+
+@dataclass(frozen=True)
+class ScaledRecipe:
+    recipe: Recipe
+    rounded: Tuple[Rounding, ...] = field(default=())
+
+
+@typechecked
+@dataclass(frozen=True)
+class QuantityEngine:
+    """Converts ingredient quantities to base units, scales recipes and sums ingredients over many recipes.
+
+    The base units are g (for g and kg), ml (for ml, cl and l), cup and n/a. An amount is written in the unit that
+    rounds it the least. `express` refuses it when even that unit is more than 1% off, while `scale` rounds it to a
+    whole quantity and reports each ingredient rounded by more than 1%. Totals are computed on whole columns with
+    numpy when it is installed and `vectorized` is true, and with a dict otherwise.
+    """
+    vectorized: bool = field(default=True)
+
+    @staticmethod
+    def normalize(quantity: Quantity, unit: Unit) -> Tuple[int, str]:
+        return _normalize(quantity.value, unit.value)
+
+    @staticmethod
+    def express(amount: float, base: str) -> Tuple[Quantity, Unit]:
+        validate('base', base, custom=lambda v: v in _BASE_UNITS, help_msg='The base unit is invalid.')
+        expressed = _express(amount, base, _ROUNDING_TOLERANCE)
+        validate('amount', expressed,
+                 help_msg=f'{amount:g} {base} cannot be written in a single unit without rounding it by more than '
+                          f'{_ROUNDING_TOLERANCE:.0%}.')
+        return Quantity(expressed[0]), Unit(expressed[1])
+
+    @typechecked
+    def scale(self, recipe: Recipe, factor: float) -> ScaledRecipe:
+        validate('factor', factor, min_value=0, min_strict=True, help_msg='The scale factor is invalid.')
+        scaled, rounded = [], []
+        for ingredient in recipe.ingredients:
+            amount, base = _normalize(ingredient.quantity.value, ingredient.unit.value)
+            quantity, unit = _express(amount * factor, base, math.inf)
+            exact = amount * factor / _UNIT_SCALES[unit][1]
+            validate('amount', exact, max_value=1000.5, max_strict=True,
+                     help_msg=f'The scaled quantity of {ingredient.name.value} is too large for a single unit.')
+            if abs(quantity - exact) > exact * _ROUNDING_TOLERANCE:
+                rounded.append(Rounding(ingredient.name.value, exact, quantity, unit))
+            scaled.append(Ingredient(ingredient.name, Quantity(quantity), Unit(unit)))
+        return ScaledRecipe(Recipe.Builder(recipe.id, recipe.title, recipe.author, recipe.description,
+                                           recipe.created_at, recipe.updated_at).with_ingredients(scaled).build(),
+                            tuple(rounded))
+
+    @typechecked
+    def totals(self, names: list, quantities: list, units: list) -> list:
+        validate('rows', len(quantities), equals=len(names), help_msg='Every row needs a name, a quantity and a unit.')
+        validate('rows', len(units), equals=len(names), help_msg='Every row needs a name, a quantity and a unit.')
+        validate('units', set(units), custom=lambda v: v <= _UNIT_SCALES.keys(), help_msg='A unit is invalid.')
+        if self.vectorized and numpy is not None and names:
+            sums = self.__vectorized_sums(names, quantities, units)
+        else:
+            sums = {}
+            for name, quantity, unit in zip(names, quantities, units):
+                amount, base = _normalize(quantity, unit)
+                sums[name, base] = sums.get((name, base), 0) + amount
+        return [IngredientTotal(name, amount, base) for (name, base), amount in sorted(sums.items())]
+
+    @staticmethod
+    def __vectorized_sums(names: list, quantities: list, units: list) -> dict:
+        bases = len(_BASE_UNITS)
+        unit_index = {unit: index for index, unit in enumerate(_UNIT_SCALES)}
+        unit_bases = numpy.array([_BASE_UNITS.index(base) for base, _ in _UNIT_SCALES.values()], dtype='q')
+        unit_scales = numpy.array([scale for _, scale in _UNIT_SCALES.values()], dtype='q')
+        name_index = {name: index for index, name in enumerate(dict.fromkeys(names))}
+        rows = numpy.fromiter(map(name_index.__getitem__, names), 'q', len(names))
+        units = numpy.fromiter(map(unit_index.__getitem__, units), 'q', len(names))
+        keys = rows * bases + unit_bases[units]
+        groups = numpy.flatnonzero(numpy.bincount(keys))
+        sums = numpy.bincount(keys, weights=numpy.array(quantities, dtype='q') * unit_scales[units])[groups]
+        name_values = list(name_index)
+        return {(name_values[key // bases], _BASE_UNITS[key % bases]): int(amount)
+                for key, amount in zip(groups.tolist(), sums.round().tolist())}
+
+    @typechecked
+    def aggregate(self, recipes: Iterable[Any]) -> list:
+        names, quantities, units = [], [], []
+        for recipe in recipes:
+            if type(recipe) is dict:
+                for ingredient in recipe['ingredients']:
+                    names.append(ingredient['name'])
+                    quantities.append(ingredient['quantity'])
+                    units.append(ingredient['unit'])
+            else:
+                for ingredient in recipe.ingredients:
+                    names.append(ingredient.name.value)
+                    quantities.append(ingredient.quantity.value)
+                    units.append(ingredient.unit.value)
+        return self.totals(names, quantities, units)
+
+
+@typechecked
+@dataclass(frozen=True)
+class ShoppingList:
+    """Ingredient totals of many recipes, merged by name and base unit as the recipes arrive.
+
+    `fetch` takes recipe ids or recipes, such as a filter result; recipes that carry their ingredients are used
+    as they are and the others are fetched with `show_specific_recipe`, at most `concurrency` at a time. Each
+    recipe, or the error that replaced it, is yielded as soon as it is merged, in completion order. Memory use
+    is bounded by the requests in flight and the number of distinct ingredients.
+    """
+    dealer: Any
+    concurrency: int = field(default=4)
+    __sums: Dict[Tuple[str, str], int] = field(default_factory=dict, repr=False, init=False, compare=False)
+    __lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('concurrency', self.concurrency, min_value=1, help_msg='The concurrency is invalid.')
+
+    def add(self, recipe: dict) -> None:
+        ingredients = recipe['ingredients']
+        validate('ingredients.unit', {ingredient['unit'] for ingredient in ingredients},
+                 custom=lambda v: v <= _UNIT_SCALES.keys(), help_msg='A unit is invalid.')
+        with self.__lock:
+            sums = self.__sums
+            for ingredient in ingredients:
+                amount, base = _normalize(ingredient['quantity'], ingredient['unit'])
+                sums[ingredient['name'], base] = sums.get((ingredient['name'], base), 0) + amount
+
+    def totals(self) -> List[IngredientTotal]:
+        with self.__lock:
+            return [IngredientTotal(name, amount, base) for (name, base), amount in sorted(self.__sums.items())]
+
+    def __get(self, index: Id) -> Tuple[int, Any]:
+        try:
+            return index.id, self.dealer.show_specific_recipe(index)
+        except requests.RequestException as e:
+            return index.id, {'detail': str(e) or type(e).__name__}
+
+    def __merge(self, index: int, result: Any) -> Tuple[int, dict]:
+        if type(result) is not dict:
+            return index, {'detail': str(result)}
+        if 'ingredients' in result:
+            self.add(result)
+        return index, result
+
+    def fetch(self, recipes: Iterable[Any]) -> Iterator[Tuple[int, dict]]:
+        with futures.ThreadPoolExecutor(self.concurrency) as executor:
+            pending = set()
+            for recipe in recipes:
+                if type(recipe) is dict and 'ingredients' in recipe:
+                    yield self.__merge(recipe.get('id', 0), recipe)
+                    continue
+                index = recipe if type(recipe) is Id else Id(recipe['id'] if type(recipe) is dict else recipe)
+                pending.add(executor.submit(self.__get, index))
+                if len(pending) >= self.concurrency:
+                    done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield self.__merge(*future.result())
+            for future in futures.as_completed(pending):
+                yield self.__merge(*future.result())
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipeRenderer:
+    table: bool = field(default=False)
+    stream: Any = field(default=None, repr=False, compare=False)
+    __columns = ('Id', 'Title', 'Author', 'Created_at', 'Updated_at', 'Ingredients')
+
+    @staticmethod
+    def __row(recipe: Recipe) -> Tuple[str, ...]:
+        return (str(recipe.id.id), recipe.title.value, recipe.author.value, str(recipe.created_at),
+                str(recipe.updated_at or ''),
+                ', '.join(f'{i.name.value}: {i.quantity.value} {i.unit.value}' for i in recipe.ingredients))
+
+    @typechecked
+    def format(self, recipes: Iterable[Recipe]) -> str:
+        if not self.table:
+            return ''.join(recipe.format() for recipe in recipes)
+        rows = [self.__columns] + [self.__row(recipe) for recipe in recipes]
+        widths = [max(len(row[column]) for row in rows) for column in range(len(self.__columns))]
+        rows.insert(1, tuple('-' * width for width in widths))
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(' | '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+            buffer.write('\n')
+        return buffer.getvalue()
+
+    @typechecked
+    def render(self, recipes: Iterable[Recipe]) -> None:
+        text = self.format(recipes)
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+
+_TRUSTED_VALUES = {
+    Id: ('id', lambda v: type(v) is int and v >= 0),
+    Title: ('value', lambda v: type(v) is str and 1 <= len(v) <= 30 and _TITLE_PATTERN(v)),
+    Username: ('value', lambda v: type(v) is str and 4 <= len(v) <= 30 and _USERNAME_PATTERN(v)),
+    Description: ('value', lambda v: type(v) is str and 1 <= len(v) <= 500 and _DESCRIPTION_PATTERN(v)),
+    Name: ('value', lambda v: type(v) is str and 1 <= len(v) <= 30 and _NAME_PATTERN(v)),
+    Quantity: ('value', lambda v: type(v) is int and 1 <= v <= 1000),
+    Unit: ('value', lambda v: type(v) is str and v in Unit._my_units),
+}
+
+
 @typechecked
 @dataclass(frozen=True)
 class JsonHandler:
@@ -202,11 +540,283 @@ class JsonHandler:
         new_recipe = new_recipe.build()
         return new_recipe
 
+    @staticmethod
+    @typechecked
+    def create_recipes_from_json(items: List[dict]) -> List[Recipe]:
+        values, dates = {}, {}
+
+        def checked(cls: type, value: Any) -> Any:
+            name, is_valid = _TRUSTED_VALUES[cls]
+            if not is_valid(value):
+                raise ValueError(value)
+            result = object.__new__(cls)
+            object.__setattr__(result, name, value)
+            return result
+
+        def trusted(cls: type, value: Any) -> Any:
+            key = (cls, type(value), value)
+            result = values.get(key)
+            if result is None:
+                if type(cls) is _Interned:
+                    result = _intern(cls, value, lambda: checked(cls, value))
+                else:
+                    result = checked(cls, value)
+                values[key] = result
+            return result
+
+        def trusted_date(value: Any) -> date:
+            result = dates.get(value) if type(value) is str else None
+            if result is None:
+                result = dates[value] = datetime.strptime(value, '%Y-%m-%d').date()
+            return result
+
+        def trusted_ingredient(ingredient: dict) -> Ingredient:
+            result = object.__new__(Ingredient)
+            object.__setattr__(result, 'name', trusted(Name, ingredient['name']))
+            object.__setattr__(result, 'quantity', trusted(Quantity, ingredient['quantity']))
+            object.__setattr__(result, 'unit', trusted(Unit, ingredient['unit']))
+            return result
+
+        recipes = []
+        for item in items:
+            try:
+                new_recipe = Recipe.Builder(trusted(Id, item['id']), trusted(Title, item['title']),
+                                            trusted(Username, item['author']),
+                                            trusted(Description, item['description']),
+                                            trusted_date(item['created_at']),
+                                            trusted_date(item['updated_at']) if 'updated_at' in item else None)
+                new_recipe = new_recipe.with_ingredients([trusted_ingredient(i) for i in item['ingredients']])
+                recipes.append(new_recipe.build())
+            except Exception:
+                recipes.append(JsonHandler.create_recipe_from_json(item))
+        return recipes
+
+    @staticmethod
+    @typechecked
+    def create_recipes_from_stream(items: Iterable[Any]) -> Iterator[Recipe]:
+        for item in items:
+            if type(item) is not dict or 'title' not in item:
+                raise ValueError(item['detail'] if type(item) is dict and 'detail' in item else item)
+            yield JsonHandler.create_recipe_from_json(item)
+
+    @staticmethod
+    @typechecked
+    def iter_json(chunks: Iterable[bytes]) -> Iterator[Any]:
+        chunks = iter(chunks)
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8')()
+        buffer, position, finished = '', 0, False
+
+        def read_more() -> None:
+            nonlocal buffer, position, finished
+            chunk = next(chunks, None)
+            finished = chunk is None
+            buffer = buffer[position:] + text.decode(chunk or b'', final=finished)
+            position = 0
+
+        def next_char() -> str:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or finished:
+                    return buffer[position:position + 1]
+                read_more()
+
+        if next_char() != '[':
+            while not finished:
+                read_more()
+            yield json.loads(buffer)
+            return
+        position += 1
+        if next_char() == ']':
+            return
+        while True:
+            next_char()
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+                read_more()
+                continue
+            if not finished and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                read_more()
+                continue
+            position = end
+            yield value
+            separator = next_char()
+            position += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise json.JSONDecodeError('Expecting \',\' delimiter', buffer, position - 1)
+
+
+@typechecked
+@dataclass(frozen=True)
+class CachedResponse:
+    body: str
+    etag: Optional[str]
+    stored_at: float
+
+
+@typechecked
+@dataclass(frozen=True)
+class ResponseCache:
+    max_entries: int = field(default=128)
+    ttl: float = field(default=30.0)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    __entries: 'OrderedDict[Tuple[str, str], CachedResponse]' = field(default_factory=OrderedDict, repr=False,
+                                                                       init=False, compare=False)
+    __stats: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(
+        ('hits', 'misses', 'revalidated', 'evictions', 'invalidations'), 0), repr=False, init=False, compare=False)
+    __lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('max_entries', self.max_entries, min_value=1, help_msg='The cache size is invalid. Check the value.')
+        validate('ttl', self.ttl, min_value=0, help_msg='The cache TTL is invalid. Check the value.')
+
+    @staticmethod
+    @typechecked
+    def key(view: str, headers: dict) -> Tuple[str, str]:
+        identity = headers.get('Authorization', '')
+        return view, hashlib.sha256(identity.encode()).hexdigest() if identity else ''
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @typechecked
+    def lookup(self, key: Tuple[str, str]) -> Tuple[Optional[CachedResponse], bool]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__stats['misses'] += 1
+                return None, False
+            self.__entries.move_to_end(key)
+            if self.clock() - entry.stored_at < self.ttl:
+                self.__stats['hits'] += 1
+                return entry, True
+            self.__stats['misses'] += 1
+            if entry.etag is None:
+                del self.__entries[key]
+                return None, False
+            return entry, False
+
+    @typechecked
+    def store(self, key: Tuple[str, str], body: str, etag: Optional[str]) -> None:
+        with self.__lock:
+            self.__entries[key] = CachedResponse(body, etag, self.clock())
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.__stats['evictions'] += 1
+
+    @typechecked
+    def revalidated(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            self.__entries[key] = CachedResponse(entry.body, entry.etag, self.clock())
+            self.__stats['revalidated'] += 1
+            return entry
+
+    @typechecked
+    def invalidate(self) -> None:
+        with self.__lock:
+            if self.__entries:
+                self.__stats['invalidations'] += 1
+            self.__entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats, size=len(self.__entries))
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipePage:
+    items: List[dict]
+    number: int
+    page_size: int
+    count: Optional[int]
+    has_next: bool
+
+    @property
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    @property
+    def pages(self) -> Optional[int]:
+        if self.count is None:
+            return None
+        return max(1, -(-self.count // self.page_size))
+
+
+_MAX_ROLES = 10000
+
 
 @typechecked
 @dataclass(frozen=True)
 class DealerRecipes:
-    __api_server = 'http://localhost:8000/api/v1'
+    api_server: str = field(default='http://localhost:8000/api/v1')
+    pool_size: int = field(default=10)
+    max_retries: int = field(default=2)
+    backoff_factor: float = field(default=0.1)
+    timeout: float = field(default=10.0)
+    cache: Optional[ResponseCache] = field(default_factory=ResponseCache, repr=False, compare=False)
+    __session: Optional['requests.Session'] = field(default=None, repr=False, init=False, compare=False)
+    __session_lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+    __flights: Dict[Tuple[str, str], Any] = field(default_factory=dict, repr=False, init=False, compare=False)
+    __flights_lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+    __roles: OrderedDict = field(default_factory=OrderedDict, repr=False, init=False, compare=False)
+    __roles_lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+    __unpaginated: Set[str] = field(default_factory=set, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('api_server', self.api_server, custom=_API_SERVER_PATTERN,
+                 help_msg='The API server is invalid. Check the syntax.')
+        validate('pool_size', self.pool_size, min_value=1, max_value=100,
+                 help_msg='The pool size is invalid. Check the value.')
+        validate('max_retries', self.max_retries, min_value=0, max_value=10,
+                 help_msg='The number of retries is invalid. Check the value.')
+        validate('backoff_factor', self.backoff_factor, min_value=0, max_value=10,
+                 help_msg='The backoff factor is invalid. Check the value.')
+        validate('timeout', self.timeout, min_value=0, min_strict=True,
+                 help_msg='The timeout is invalid. Check the value.')
+
+    def __enter__(self) -> 'DealerRecipes':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _session(self) -> 'requests.Session':
+        session = self.__session
+        if session is not None:
+            return session
+        with self.__session_lock:
+            if self.__session is None:
+                from http.cookiejar import DefaultCookiePolicy
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                retry = Retry(total=self.max_retries, backoff_factor=self.backoff_factor,
+                              status_forcelist=(502, 503, 504), raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.headers['Connection'] = 'keep-alive'
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                object.__setattr__(self, '_DealerRecipes__session', session)
+            return self.__session
+
+    def close(self) -> None:
+        with self.__session_lock:
+            if self.__session is not None:
+                self.__session.close()
+                object.__setattr__(self, '_DealerRecipes__session', None)
 
     @typechecked
     def sign_up(self, username: Username, email: Email, password: Password, confirm_password: Password):
@@ -220,7 +830,7 @@ class DealerRecipes:
             'password1': password.value,
             'password2': confirm_password.value
         }
-        res = requests.post(url=f'{self.__api_server}/auth/registration/', data=my_data)
+        res = self._session().post(url=f'{self.api_server}/auth/registration/', data=my_data, timeout=self.timeout)
         if res.status_code != 201:
             return res.json()
         else:
@@ -230,8 +840,9 @@ class DealerRecipes:
     def login(self, username: Username, password: Password):
         validate('login.username', username)
         validate('login.password', password)
-        res = requests.post(url=f'{self.__api_server}/auth/login/',
-                            data={'username': username.value, 'password': password.value})
+        res = self._session().post(url=f'{self.api_server}/auth/login/',
+                                   data={'username': username.value, 'password': password.value},
+                                   timeout=self.timeout)
         if res.status_code != 200:
             return None
         _json = res.json()
@@ -239,7 +850,10 @@ class DealerRecipes:
 
     @typechecked
     def logout(self, key: str):
-        res = requests.post(url=f'{self.__api_server}/auth/logout/', headers={'Authorization': f'Token {key}'})
+        headers = {'Authorization': f'Token {key}'}
+        self.__forget_role(headers)
+        res = self._session().post(url=f'{self.api_server}/auth/logout/', headers=headers, timeout=self.timeout)
+        self.__invalidate_cache()
         if res.status_code == 200:
             return 'Logged out!'
         else:
@@ -255,18 +869,22 @@ class DealerRecipes:
             'description': description.value,
             'ingredients': ingredients
         }
-        res = requests.post(url=f'{self.__api_server}/personal-area/', headers={'Authorization': f'Token {key}',
-                                                                                'Content-Type': 'application/json'},
-                            data=json.dumps(data))
+        headers = {'Authorization': f'Token {key}', 'Content-Type': 'application/json'}
+        res = self._session().post(url=f'{self.api_server}/personal-area/', headers=headers, data=json.dumps(data),
+                                   timeout=self.timeout)
+        self.__check_authorized(res, headers)
+        self.__invalidate_cache()
         return res.json()
 
     @typechecked
     def delete_recipe(self, key: str, index: Id):
         validate('delete_recipe.id', index)
 
-        res = requests.delete(url=f'{self.__api_server}/personal-area/{index}/',
-                              headers={'Authorization': f'Token {key}'},
-                              data={'id': index.id})
+        headers = {'Authorization': f'Token {key}'}
+        res = self._session().delete(url=f'{self.api_server}/personal-area/{index}/', headers=headers,
+                                     data={'id': index.id}, timeout=self.timeout)
+        self.__check_authorized(res, headers)
+        self.__invalidate_cache()
         if res.status_code != 204:
             return res.json()['detail']
         else:
@@ -280,6 +898,32 @@ class DealerRecipes:
         validate('show_specific_recipe.index', index)
         return self.get_request(view=f'/recipes/{index.id}/')
 
+    @typechecked
+    def show_specific_recipes(self, indexes: Iterable[Id]) -> list:
+        with futures.ThreadPoolExecutor(self.pool_size) as executor:
+            return list(executor.map(self.show_specific_recipe, indexes))
+
+    @typechecked
+    def show_recipes_page(self, number: int, page_size: int = 10, view: str = '/recipes/'):
+        validate('page.number', number, min_value=1, help_msg='The page number is invalid. Check the value.')
+        validate('page.page_size', page_size, min_value=1, max_value=100,
+                 help_msg='The page size is invalid. Check the value.')
+        offset = (number - 1) * page_size
+        if view in self.__unpaginated:
+            result = self.get_request(view=view)
+        else:
+            result = self.get_request(view=f'{view}?limit={page_size}&offset={offset}')
+        if type(result) is list:
+            self.__unpaginated.add(view)
+            return RecipePage(result[offset:offset + page_size], number, page_size, len(result),
+                              offset + page_size < len(result))
+        if type(result) is dict and type(result.get('results')) is list:
+            return RecipePage(result['results'], number, page_size, result.get('count'), bool(result.get('next')))
+        return result
+
+    def stream_all_recipes(self) -> Iterator[Any]:
+        return self.stream_request(view='/recipes/')
+
     def sort_by_title(self):
         return self.get_request(view='/recipes/sort-by-title/')
 
@@ -311,28 +955,809 @@ class DealerRecipes:
 
     @typechecked
     def what_is_my_role(self, key: str):
-        result = self.get_request(view=f'/personal-area/account-type/', headers={'Authorization': f'Token {key}'})
+        headers = {'Authorization': f'Token {key}'}
+        identity = self.__identity(headers)
+        with self.__roles_lock:
+            role = self.__roles.get(identity)
+            if role is not None:
+                self.__roles.move_to_end(identity)
+                return role
+        result = self.get_request(view=f'/personal-area/account-type/', headers=headers)
         if 'detail' in result:
             return result['detail']
         else:
             if result['type-account'] == 0:
-                return 'You are logged as normal user'
+                role = 'You are logged as normal user'
             elif result['type-account'] == 1:
-                return 'You are logged as admin'
+                role = 'You are logged as admin'
             else:
-                return 'You are logged as moderator'
+                role = 'You are logged as moderator'
+            with self.__roles_lock:
+                self.__roles[identity] = role
+                while len(self.__roles) > _MAX_ROLES:
+                    self.__roles.popitem(last=False)
+            return role
+
+    @typechecked
+    def forget_role(self, key: str) -> None:
+        self.__forget_role({'Authorization': f'Token {key}'})
+
+    def __forget_role(self, headers: dict) -> None:
+        with self.__roles_lock:
+            self.__roles.pop(self.__identity(headers), None)
 
     @typechecked
     def update_my_recipe(self, key: str, index: Id, recipe_to_change: dict):
         validate('update_recipe.index', index)
-        res = requests.put(url=f'{self.__api_server}/personal-area/{index.id}/',
-                           headers={'Authorization': f'Token {key}', 'Content-Type': 'application/json'},
-                           data=json.dumps(recipe_to_change))
+        headers = {'Authorization': f'Token {key}', 'Content-Type': 'application/json'}
+        res = self._session().put(url=f'{self.api_server}/personal-area/{index.id}/', headers=headers,
+                                  data=json.dumps(recipe_to_change), timeout=self.timeout)
+        self.__check_authorized(res, headers)
+        self.__invalidate_cache()
         return res.json()
 
+    def __invalidate_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    @staticmethod
+    def __identity(headers: dict) -> str:
+        return ResponseCache.key('', headers)[1]
+
+    def __check_authorized(self, res, headers: dict) -> None:
+        if res.status_code in (401, 403):
+            self.__forget_role(headers)
+
+    @typechecked
+    def stream_request(self, view: str, chunk_size: int = 64 * 1024, **kwargs) -> Iterator[Any]:
+        headers = kwargs['headers'] if 'headers' in kwargs else {}
+        with self._session().get(url=f'{self.api_server}{view}', headers=headers, stream=True,
+                                 timeout=self.timeout) as res:
+            yield from JsonHandler.iter_json(res.iter_content(chunk_size=chunk_size))
+
     @typechecked
     def get_request(self, view: str, **kwargs):
         data = kwargs['data'] if 'data' in kwargs else {}
         headers = kwargs['headers'] if 'headers' in kwargs else {}
-        res = requests.get(url=f'{self.__api_server}{view}', headers=headers, data=data)
-        return res.json()
+        if data:
+            res = self._session().get(url=f'{self.api_server}{view}', headers=headers, data=data, timeout=self.timeout)
+            self.__check_authorized(res, headers)
+            return res.json()
+        key = ResponseCache.key(view, headers)
+        with self.__flights_lock:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = futures.Future()
+        if leader:
+            try:
+                flight.set_result(self.__get_body(view, headers, key))
+            except BaseException as e:
+                flight.set_exception(e)
+            finally:
+                with self.__flights_lock:
+                    del self.__flights[key]
+        body = flight.result()
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from None
+
+    def __get_body(self, view: str, headers: dict, key: Tuple[str, str]) -> str:
+        if self.cache is None:
+            res = self._session().get(url=f'{self.api_server}{view}', headers=headers, timeout=self.timeout)
+            self.__check_authorized(res, headers)
+            return res.text
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            return entry.body
+        if entry is not None:
+            headers = dict(headers, **{'If-None-Match': entry.etag})
+        res = self._session().get(url=f'{self.api_server}{view}', headers=headers, timeout=self.timeout)
+        self.__check_authorized(res, headers)
+        if res.status_code == 304 and entry is not None:
+            revalidated = self.cache.revalidated(key)
+            return (revalidated or entry).body
+        if res.status_code == 200:
+            self.cache.store(key, res.text, res.headers.get('ETag'))
+        return res.text
+
+
+def _checked_row(row: int, rows: int) -> int:
+    if row < 0:
+        row += rows
+    if not 0 <= row < rows:
+        raise IndexError('The recipe row is out of range.')
+    return row
+
+
+_SNAPSHOT_MAGIC = b'RCPSNAP1'
+_SNAPSHOT_HEADER = struct.Struct('<8s?7xqqq')
+
+
+def _snapshot_layout(recipes: int, ingredients: int, strings: int) -> List[Tuple[str, str, int]]:
+    return [('ids', 'q', recipes), ('created_at', 'q', recipes), ('updated_at', 'q', recipes),
+            ('titles', 'q', recipes), ('authors', 'q', recipes), ('descriptions', 'q', recipes),
+            ('offsets', 'q', recipes + 1), ('sorted_ids', 'q', recipes), ('sorted_rows', 'q', recipes),
+            ('names', 'q', ingredients), ('string_offsets', 'q', strings + 1), ('quantities', 'H', ingredients),
+            ('units', 'B', ingredients)]
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipeStore:
+    __ids: array = field(default_factory=lambda: array('q'), repr=False, init=False)
+    __created_at: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __updated_at: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __titles: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __authors: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __descriptions: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __offsets: array = field(default_factory=lambda: array('q', [0]), repr=False, init=False)
+    __names: array = field(default_factory=lambda: array('l'), repr=False, init=False)
+    __quantities: array = field(default_factory=lambda: array('H'), repr=False, init=False)
+    __units: array = field(default_factory=lambda: array('B'), repr=False, init=False)
+    __strings: List[str] = field(default_factory=list, repr=False, init=False)
+    __string_ids: Dict[str, int] = field(default_factory=dict, repr=False, init=False)
+    __rows: Dict[int, int] = field(default_factory=dict, repr=False, init=False)
+
+    @staticmethod
+    @typechecked
+    def from_recipes(recipes: Iterable[Recipe]) -> 'RecipeStore':
+        store = RecipeStore()
+        for recipe in recipes:
+            store.add(recipe)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def __string_id(self, value: str) -> int:
+        string_id = self.__string_ids.get(value)
+        if string_id is None:
+            string_id = self.__string_ids[value] = len(self.__strings)
+            self.__strings.append(value)
+        return string_id
+
+    @typechecked
+    def add(self, recipe: Recipe) -> None:
+        validate('recipe.id', recipe.id.id, custom=lambda v: v not in self.__rows,
+                 help_msg='The recipe is already in the store.')
+        self.__rows[recipe.id.id] = len(self.__ids)
+        self.__ids.append(recipe.id.id)
+        self.__created_at.append(recipe.created_at.toordinal())
+        self.__updated_at.append(recipe.updated_at.toordinal() if recipe.updated_at is not None else 0)
+        self.__titles.append(self.__string_id(recipe.title.value))
+        self.__authors.append(self.__string_id(recipe.author.value))
+        self.__descriptions.append(self.__string_id(recipe.description.value))
+        for ingredient in recipe.ingredients:
+            self.__names.append(self.__string_id(ingredient.name.value))
+            self.__quantities.append(ingredient.quantity.value)
+            self.__units.append(Unit._my_units.index(ingredient.unit.value))
+        self.__offsets.append(len(self.__names))
+
+    @typechecked
+    def __getitem__(self, row: int) -> Recipe:
+        row = _checked_row(row, len(self.__ids))
+        strings = self.__strings
+        updated_at = self.__updated_at[row]
+        new_recipe = Recipe.Builder(Id(self.__ids[row]), Title(strings[self.__titles[row]]),
+                                    Username(strings[self.__authors[row]]),
+                                    Description(strings[self.__descriptions[row]]),
+                                    date.fromordinal(self.__created_at[row]),
+                                    date.fromordinal(updated_at) if updated_at else None)
+        return new_recipe.with_ingredients([
+            Ingredient(Name(strings[self.__names[i]]), Quantity(self.__quantities[i]),
+                       Unit(Unit._my_units[self.__units[i]]))
+            for i in range(self.__offsets[row], self.__offsets[row + 1])
+        ]).build()
+
+    @typechecked
+    def get(self, index: Id) -> Optional[Recipe]:
+        row = self.__rows.get(index.id)
+        return None if row is None else self[row]
+
+    @typechecked
+    def recipes(self, rows: Iterable[int]) -> Iterator[Recipe]:
+        for row in rows:
+            yield self[row]
+
+    @typechecked
+    def save(self, path: str) -> None:
+        encoded = [value.encode() for value in self.__strings]
+        string_offsets = array('q', [0])
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+        by_id = sorted(range(len(self.__ids)), key=self.__ids.__getitem__)
+        columns = [self.__ids, array('q', self.__created_at), array('q', self.__updated_at),
+                   array('q', self.__titles), array('q', self.__authors), array('q', self.__descriptions),
+                   self.__offsets, array('q', (self.__ids[row] for row in by_id)), array('q', by_id),
+                   array('q', self.__names), string_offsets, self.__quantities, self.__units]
+        with open(path, 'wb') as file:
+            file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, sys.byteorder == 'big', len(self.__ids),
+                                             len(self.__names), len(encoded)))
+            for column in columns:
+                data = column.tobytes()
+                file.write(data + bytes(-len(data) % 8))
+            file.write(b''.join(encoded))
+
+    def __rows_equal_to(self, column: array, value: str) -> List[int]:
+        string_id = self.__string_ids.get(value)
+        if string_id is None:
+            return []
+        if numpy is not None:
+            return numpy.flatnonzero(numpy.frombuffer(column, dtype=column.typecode) == string_id).tolist()
+        return [row for row, current in enumerate(column) if current == string_id]
+
+    def sort_by_title(self) -> List[int]:
+        if numpy is not None:
+            titles, by_title = numpy.unique(numpy.frombuffer(self.__titles, dtype='l'), return_inverse=True)
+            ranks = numpy.empty(len(titles), dtype='l')
+            ranks[sorted(range(len(titles)), key=lambda k: self.__strings[titles[k]])] = numpy.arange(len(titles))
+            return numpy.lexsort((numpy.frombuffer(self.__ids, dtype='q'), ranks[by_title])).tolist()
+        ranks = {title: rank for rank, title in enumerate(sorted(set(self.__titles), key=self.__strings.__getitem__))}
+        return sorted(range(len(self.__ids)), key=lambda row: (ranks[self.__titles[row]], self.__ids[row]))
+
+    def sort_by_date(self) -> List[int]:
+        if numpy is not None:
+            order = numpy.lexsort((numpy.frombuffer(self.__ids, dtype='q'),
+                                   numpy.frombuffer(self.__created_at, dtype='l')))
+            return order[::-1].tolist()
+        return sorted(range(len(self.__ids)), key=lambda row: (self.__created_at[row], self.__ids[row]), reverse=True)
+
+    @typechecked
+    def filter_by_author(self, author: Username) -> List[int]:
+        return self.__rows_equal_to(self.__authors, author.value)
+
+    @typechecked
+    def filter_by_title(self, title: Title) -> List[int]:
+        return self.__rows_equal_to(self.__titles, title.value)
+
+    @typechecked
+    def filter_by_ingredient(self, ingredient: Name) -> List[int]:
+        matches = self.__rows_equal_to(self.__names, ingredient.value)
+        if numpy is not None:
+            offsets = numpy.frombuffer(self.__offsets, dtype='q')
+            return numpy.unique(numpy.searchsorted(offsets, matches, side='right') - 1).tolist()
+        return list(dict.fromkeys(bisect.bisect_right(self.__offsets, match) - 1 for match in matches))
+
+
+@typechecked
+@dataclass(frozen=True)
+class MappedRecipeStore:
+    """Read-only view of a file written by `RecipeStore.save`.
+
+    The file is mapped rather than read, so opening it takes the same time whatever its size, and only the
+    pages actually touched are loaded. A recipe and its strings are decoded when it is accessed, not before.
+    """
+    path: str
+    __state: Dict[str, Any] = field(default_factory=dict, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        with open(self.path, 'rb') as file:
+            header = file.read(_SNAPSHOT_HEADER.size)
+            validate('snapshot', header, custom=lambda v: len(v) == _SNAPSHOT_HEADER.size and v[:8] == _SNAPSHOT_MAGIC,
+                     help_msg='The file is not a recipe snapshot.')
+            magic, big_endian, recipes, ingredients, strings = _SNAPSHOT_HEADER.unpack(header)
+            validate('snapshot', big_endian, equals=(sys.byteorder == 'big'),
+                     help_msg='The snapshot was written on a machine with another byte order.')
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        position = _SNAPSHOT_HEADER.size
+        columns = {}
+        try:
+            for name, typecode, length in _snapshot_layout(recipes, ingredients, strings):
+                size = length * array(typecode).itemsize
+                validate('snapshot', position + size, max_value=len(mapped), help_msg='The snapshot is truncated.')
+                columns[name] = view[position:position + size].cast(typecode)
+                position += size + (-size % 8)
+            size = columns['string_offsets'][-1]
+            validate('snapshot', position + size, max_value=len(mapped), help_msg='The snapshot is truncated.')
+            columns['strings'] = view[position:position + size]
+        except Exception:
+            for column in columns.values():
+                column.release()
+            view.release()
+            mapped.close()
+            raise
+        self.__state.update(columns, map=mapped, view=view)
+
+    def __enter__(self) -> 'MappedRecipeStore':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        mapped = self.__state.pop('map', None)
+        for column in self.__state.values():
+            column.release()
+        self.__state.clear()
+        if mapped is not None:
+            mapped.close()
+
+    def __len__(self) -> int:
+        return len(self.__state['ids'])
+
+    def __string(self, string_id: int) -> str:
+        offsets = self.__state['string_offsets']
+        return str(self.__state['strings'][offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+
+    @typechecked
+    def __getitem__(self, row: int) -> Recipe:
+        columns = self.__state
+        row = _checked_row(row, len(columns['ids']))
+        updated_at = columns['updated_at'][row]
+        new_recipe = Recipe.Builder(Id(columns['ids'][row]), Title(self.__string(columns['titles'][row])),
+                                    Username(self.__string(columns['authors'][row])),
+                                    Description(self.__string(columns['descriptions'][row])),
+                                    date.fromordinal(columns['created_at'][row]),
+                                    date.fromordinal(updated_at) if updated_at else None)
+        names, quantities, units = columns['names'], columns['quantities'], columns['units']
+        return new_recipe.with_ingredients([
+            Ingredient(Name(self.__string(names[i])), Quantity(quantities[i]), Unit(Unit._my_units[units[i]]))
+            for i in range(columns['offsets'][row], columns['offsets'][row + 1])
+        ]).build()
+
+    @typechecked
+    def get(self, index: Id) -> Optional[Recipe]:
+        sorted_ids = self.__state['sorted_ids']
+        position = bisect.bisect_left(sorted_ids, index.id)
+        if position == len(sorted_ids) or sorted_ids[position] != index.id:
+            return None
+        return self[self.__state['sorted_rows'][position]]
+
+    @typechecked
+    def recipes(self, rows: Iterable[int]) -> Iterator[Recipe]:
+        for row in rows:
+            yield self[row]
+
+
+_BITS_OF_BYTE = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+@typechecked
+@dataclass(frozen=True)
+class IngredientIndex:
+    __ids: List[int] = field(default_factory=list, repr=False, init=False)
+    __positions: Dict[int, int] = field(default_factory=dict, repr=False, init=False)
+    __postings: Dict[str, List[int]] = field(default_factory=dict, repr=False, init=False)
+    __masks: Dict[str, int] = field(default_factory=dict, repr=False, init=False)
+
+    @staticmethod
+    @typechecked
+    def from_recipes(recipes: Iterable[Recipe]) -> 'IngredientIndex':
+        index = IngredientIndex()
+        for recipe in recipes:
+            index.add_recipe(recipe)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    @typechecked
+    def add_recipe(self, recipe: Recipe) -> None:
+        self.add(recipe.id.id, (ingredient.name.value for ingredient in recipe.ingredients))
+
+    @typechecked
+    def add(self, recipe_id: int, names: Iterable[str]) -> None:
+        self.__masks.clear()
+        position = self.__positions.get(recipe_id)
+        if position is None:
+            position = self.__positions[recipe_id] = len(self.__ids)
+            self.__ids.append(recipe_id)
+        else:
+            for postings in self.__postings.values():
+                if position in postings:
+                    postings.remove(position)
+        for key in {name.casefold() for name in names}:
+            postings = self.__postings.setdefault(key, [])
+            if postings and postings[-1] > position:
+                bisect.insort(postings, position)
+            else:
+                postings.append(position)
+
+    def __mask(self, name: Name) -> int:
+        key = name.value.casefold()
+        mask = self.__masks.get(key)
+        if mask is None:
+            bits = bytearray((len(self.__ids) + 7) // 8)
+            for position in self.__postings.get(key, ()):
+                bits[position >> 3] |= 1 << (position & 7)
+            mask = self.__masks[key] = int.from_bytes(bits, 'little')
+        return mask
+
+    @typechecked
+    def query(self, all_of: Iterable[Name] = (), any_of: Iterable[Name] = (),
+              none_of: Iterable[Name] = ()) -> List[int]:
+        all_of, any_of = list(all_of), list(any_of)
+        result = (1 << len(self.__ids)) - 1
+        for name in all_of:
+            result &= self.__mask(name)
+        if any_of:
+            alternatives = 0
+            for name in any_of:
+                alternatives |= self.__mask(name)
+            result &= alternatives
+        for name in none_of:
+            result &= ~self.__mask(name)
+        return [self.__ids[position] for position in self.__positions_of(result)]
+
+    @staticmethod
+    def __positions_of(mask: int) -> Iterable[int]:
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        for byte_number, byte in enumerate(data):
+            if byte:
+                base = byte_number * 8
+                for bit in _BITS_OF_BYTE[byte]:
+                    yield base + bit
+
+
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+_SEARCH_EXPANSIONS = 32
+_SEARCH_MIN_SIMILARITY = 0.6
+
+
+def _search_words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.casefold())
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f'  {term} '
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+@typechecked
+@dataclass(frozen=True)
+class TitleSearchIndex:
+    __ids: List[int] = field(default_factory=list, repr=False, init=False)
+    __positions: Dict[int, int] = field(default_factory=dict, repr=False, init=False)
+    __words: List[Tuple[frozenset, frozenset]] = field(default_factory=list, repr=False, init=False)
+    __titles: Dict[str, List[int]] = field(default_factory=dict, repr=False, init=False)
+    __descriptions: Dict[str, List[int]] = field(default_factory=dict, repr=False, init=False)
+    __trigrams: Dict[str, List[str]] = field(default_factory=dict, repr=False, init=False)
+    __terms: List[str] = field(default_factory=list, repr=False, init=False)
+
+    @staticmethod
+    @typechecked
+    def from_recipes(recipes: Iterable[Recipe]) -> 'TitleSearchIndex':
+        index = TitleSearchIndex()
+        index.add_many((recipe.id.id, recipe.title.value, recipe.description.value) for recipe in recipes)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    @typechecked
+    def add_recipe(self, recipe: Recipe) -> None:
+        self.add(recipe.id.id, recipe.title.value, recipe.description.value)
+
+    @typechecked
+    def add(self, recipe_id: int, title: str, description: str) -> None:
+        self.add_many([(recipe_id, title, description)])
+
+    @typechecked
+    def add_many(self, entries: Iterable[Tuple[int, str, str]]) -> None:
+        titles, descriptions, terms_added = self.__titles, self.__descriptions, []
+        for recipe_id, title, description in entries:
+            words = (frozenset(_search_words(title)), frozenset(_search_words(description)))
+            position = self.__positions.get(recipe_id)
+            if position is None:
+                position = self.__positions[recipe_id] = len(self.__ids)
+                self.__ids.append(recipe_id)
+                self.__words.append(words)
+            else:
+                for terms, postings in zip(self.__words[position], (titles, descriptions)):
+                    for term in terms:
+                        postings[term].remove(position)
+                self.__words[position] = words
+            for terms, postings in zip(words, (titles, descriptions)):
+                for term in terms:
+                    if term not in titles and term not in descriptions:
+                        terms_added.append(term)
+                        for gram in set(_trigrams(term)):
+                            self.__trigrams.setdefault(gram, []).append(term)
+                    term_postings = postings.setdefault(term, [])
+                    if term_postings and term_postings[-1] > position:
+                        bisect.insort(term_postings, position)
+                    else:
+                        term_postings.append(position)
+        if terms_added:
+            self.__terms.extend(terms_added)
+            self.__terms.sort()
+
+    @typechecked
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        validate('limit', limit, min_value=1)
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self.__terms, prefix)
+        res = []
+        for term in self.__terms[start:start + _SEARCH_EXPANSIONS]:
+            if not term.startswith(prefix) or len(res) == limit:
+                break
+            if self.__titles.get(term) or self.__descriptions.get(term):
+                res.append(term)
+        return res
+
+    def __similar(self, word: str) -> List[Tuple[str, float]]:
+        grams = _trigrams(word)
+        shared = {}
+        for gram in set(grams):
+            for term in self.__trigrams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        similar = [(term, 2 * count / (len(grams) + len(term) + 1)) for term, count in shared.items()]
+        similar = [(term, similarity) for term, similarity in similar if similarity >= _SEARCH_MIN_SIMILARITY]
+        return heapq.nlargest(_SEARCH_EXPANSIONS // 4, similar, key=lambda t: t[1])
+
+    def __expand(self, word: str, prefix: bool) -> List[Tuple[str, float]]:
+        res = [(word, 1.0)] if word in self.__titles or word in self.__descriptions else []
+        if prefix:
+            res += [(term, 0.9) for term in self.complete(word, _SEARCH_EXPANSIONS) if term != word]
+        if not res:
+            res = [(term, 0.8 * similarity) for term, similarity in self.__similar(word)]
+        return res
+
+    @typechecked
+    def search(self, text: str, limit: int = 10) -> List[int]:
+        validate('limit', limit, min_value=1)
+        words = _search_words(text)
+        scores = {}
+        for number, word in enumerate(words):
+            best = {}
+            for term, weight in self.__expand(word, prefix=number == len(words) - 1):
+                for postings, boost in ((self.__titles, 2.0), (self.__descriptions, 1.0)):
+                    score = weight * boost
+                    for position in postings.get(term, ()):
+                        if score > best.get(position, 0.0):
+                            best[position] = score
+            for position, score in best.items():
+                scores[position] = scores.get(position, 0.0) + score
+        ids = self.__ids
+        return [ids[position] for position in heapq.nsmallest(limit, scores,
+                                                               key=lambda p: (-scores[p], ids[p]))]
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipeSnapshot:
+    """In-memory copy of `/recipes/` answering sorts and filters locally.
+
+    The snapshot is fetched once and reused until it is older than `max_age` seconds or `invalidate()` is
+    called; writes made through the dealer must be followed by `invalidate()`. Between refreshes results may
+    lag the server. Filters match whole values ignoring case, and sort-by-date lists the newest recipes first.
+    The source is a `DealerRecipes` or anything else offering `show_all_recipes()`, such as a local database.
+    """
+    dealer: Any
+    max_age: float = field(default=60.0)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    __state: Dict[str, Any] = field(default_factory=dict, repr=False, init=False, compare=False)
+    __lock: Any = field(default_factory=threading.RLock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('max_age', self.max_age, min_value=0, help_msg='The snapshot age is invalid. Check the value.')
+
+    @staticmethod
+    def __index(recipes: list, values: Callable[[dict], Iterable[str]]) -> Dict[str, List[int]]:
+        index = {}
+        for position, recipe in enumerate(recipes):
+            for value in dict.fromkeys(v.casefold() for v in values(recipe)):
+                index.setdefault(value, []).append(position)
+        return index
+
+    @staticmethod
+    def __ingredient_index(recipes: list) -> IngredientIndex:
+        index = IngredientIndex()
+        for recipe in recipes:
+            index.add(recipe['id'], (i['name'] for i in recipe['ingredients']))
+        return index
+
+    def refresh(self) -> Any:
+        result = self.dealer.show_all_recipes()
+        if type(result) is not list:
+            return result
+        with self.__lock:
+            self.__state.clear()
+            self.__state.update(
+                recipes=result,
+                loaded_at=self.clock(),
+                by_title=sorted(range(len(result)),
+                                key=lambda i: (result[i]['title'].casefold(), result[i]['title'], result[i]['id'])),
+                by_date=sorted(range(len(result)), key=lambda i: (result[i]['created_at'], result[i]['id']),
+                               reverse=True),
+                title=self.__index(result, lambda r: [r['title']]),
+                author=self.__index(result, lambda r: [r['author']]),
+                positions={r['id']: position for position, r in enumerate(result)},
+                ingredients=self.__ingredient_index(result),
+            )
+        return result
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__state.clear()
+
+    def is_fresh(self) -> bool:
+        with self.__lock:
+            return bool(self.__state) and self.clock() - self.__state['loaded_at'] < self.max_age
+
+    def __query(self, answer: Callable[[Dict[str, Any]], List[int]]) -> Any:
+        with self.__lock:
+            if not self.is_fresh():
+                result = self.refresh()
+                if type(result) is not list:
+                    return result
+            recipes = self.__state['recipes']
+            return [recipes[i] for i in answer(self.__state)]
+
+    def show_all_recipes(self):
+        return self.__query(lambda state: range(len(state['recipes'])))
+
+    def sort_by_title(self):
+        return self.__query(lambda state: state['by_title'])
+
+    def sort_by_date(self):
+        return self.__query(lambda state: state['by_date'])
+
+    @typechecked
+    def filter_by_author(self, author: Username):
+        validate('filter.author', author)
+        return self.__query(lambda state: state['author'].get(author.value.casefold(), []))
+
+    @typechecked
+    def filter_by_title(self, title: Title):
+        validate('filter.title', title)
+        return self.__query(lambda state: state['title'].get(title.value.casefold(), []))
+
+    @typechecked
+    def filter_by_ingredient(self, ingredient: Name):
+        validate('filter.ingredient', ingredient)
+        return self.filter_by_ingredients(all_of=[ingredient])
+
+    @typechecked
+    def filter_by_ingredients(self, all_of: Iterable[Name] = (), any_of: Iterable[Name] = (),
+                              none_of: Iterable[Name] = ()):
+        all_of, any_of, none_of = list(all_of), list(any_of), list(none_of)
+        validate('filter.ingredients', all_of + any_of + none_of, min_len=1)
+        return self.__query(lambda state: [state['positions'][i]
+                                           for i in state['ingredients'].query(all_of, any_of, none_of)])
+
+    @staticmethod
+    def __search_index(state: Dict[str, Any]) -> TitleSearchIndex:
+        index = state.get('search')
+        if index is None:
+            index = state['search'] = TitleSearchIndex()
+            index.add_many((recipe['id'], recipe['title'], recipe['description']) for recipe in state['recipes'])
+        return index
+
+    @typechecked
+    def search(self, text: str, limit: int = 10):
+        validate('search.text', text, min_len=1)
+        return self.__query(lambda state: [state['positions'][i]
+                                           for i in self.__search_index(state).search(text, limit)])
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipePager:
+    dealer: Any
+    view: str = field(default='/recipes/')
+    page_size: int = field(default=10)
+    __pages: Dict[int, Any] = field(default_factory=dict, repr=False, init=False, compare=False)
+    __executor: Any = field(default_factory=lambda: futures.ThreadPoolExecutor(max_workers=1), repr=False, init=False,
+                            compare=False)
+    __lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('page_size', self.page_size, min_value=1, max_value=100,
+                 help_msg='The page size is invalid. Check the value.')
+
+    def __enter__(self) -> 'RecipePager':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __request(self, number: int) -> Any:
+        with self.__lock:
+            if number not in self.__pages:
+                self.__pages[number] = self.__executor.submit(self.dealer.show_recipes_page, number, self.page_size,
+                                                              self.view)
+            return self.__pages[number]
+
+    @typechecked
+    def page(self, number: int):
+        validate('page.number', number, min_value=1, help_msg='The page number is invalid. Check the value.')
+        result = self.__request(number).result()
+        with self.__lock:
+            for cached in [n for n in self.__pages if abs(n - number) > 1]:
+                self.__pages.pop(cached).cancel()
+            if type(result) is not RecipePage:
+                del self.__pages[number]
+        if type(result) is RecipePage and result.has_next:
+            self.__request(number + 1)
+        return result
+
+
+@typechecked
+@dataclass(frozen=True)
+class AsyncDealerRecipes:
+    """Awaitable DealerRecipes.
+
+    Each call runs the blocking DealerRecipes method on a thread pool of the dealer's `pool_size` workers, one per
+    pooled connection, instead of the event loop's default executor, whose size does not depend on the dealer.
+    """
+    dealer: DealerRecipes = field(default_factory=DealerRecipes)
+    __executor: Any = field(default=None, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_AsyncDealerRecipes__executor',
+                           futures.ThreadPoolExecutor(self.dealer.pool_size, thread_name_prefix='dealer'))
+
+    async def __aenter__(self) -> 'AsyncDealerRecipes':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+        self.dealer.close()
+
+    async def __call(self, method: Callable, *args, **kwargs):
+        call = functools.partial(contextvars.copy_context().run, method, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, call)
+
+    async def sign_up(self, username: Username, email: Email, password: Password, confirm_password: Password):
+        return await self.__call(self.dealer.sign_up, username, email, password, confirm_password)
+
+    async def login(self, username: Username, password: Password):
+        return await self.__call(self.dealer.login, username, password)
+
+    async def logout(self, key: str):
+        return await self.__call(self.dealer.logout, key)
+
+    async def add_new_recipe(self, key: str, title: Title, description: Description, ingredients: list[dict]):
+        return await self.__call(self.dealer.add_new_recipe, key, title, description, ingredients)
+
+    async def delete_recipe(self, key: str, index: Id):
+        return await self.__call(self.dealer.delete_recipe, key, index)
+
+    async def show_all_recipes(self):
+        return await self.__call(self.dealer.show_all_recipes)
+
+    async def show_specific_recipe(self, index: Id):
+        return await self.__call(self.dealer.show_specific_recipe, index)
+
+    async def show_specific_recipes(self, indexes: Iterable[Id]) -> list:
+        return list(await asyncio.gather(*(self.show_specific_recipe(index) for index in indexes)))
+
+    async def sort_by_title(self):
+        return await self.__call(self.dealer.sort_by_title)
+
+    async def sort_by_date(self):
+        return await self.__call(self.dealer.sort_by_date)
+
+    async def sort_my_recipes_by_title(self, key: str):
+        return await self.__call(self.dealer.sort_my_recipes_by_title, key)
+
+    async def sort_my_recipes_by_date(self, key: str):
+        return await self.__call(self.dealer.sort_my_recipes_by_date, key)
+
+    async def filter_by_author(self, author: Username):
+        return await self.__call(self.dealer.filter_by_author, author)
+
+    async def filter_by_title(self, title: Title):
+        return await self.__call(self.dealer.filter_by_title, title)
+
+    async def filter_by_ingredient(self, ingredient: Name):
+        return await self.__call(self.dealer.filter_by_ingredient, ingredient)
+
+    async def what_is_my_role(self, key: str):
+        return await self.__call(self.dealer.what_is_my_role, key)
+
+    async def update_my_recipe(self, key: str, index: Id, recipe_to_change: dict):
+        return await self.__call(self.dealer.update_my_recipe, key, index, recipe_to_change)
+
+    async def get_request(self, view: str, **kwargs):
+        return await self.__call(self.dealer.get_request, view, **kwargs)
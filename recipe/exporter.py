@@ -0,0 +1,117 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Iterable, List
+
+from validation import lazy_import, typechecked, validate
+
+pyarrow = lazy_import('pyarrow', optional=True)
+
+_CSV_FIELDS = ['id', 'title', 'description', 'author', 'created_at', 'updated_at', 'name', 'quantity', 'unit']
+
+
+@dataclass(frozen=True)
+class ExportReport:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+    def __str__(self) -> str:
+        return f'{self.rows} recipes exported in {self.seconds:.2f} s ({self.rows_per_second:.0f} recipes/s).'
+
+
+def _checked(chunk: List[Any]) -> List[dict]:
+    for item in chunk:
+        if type(item) is not dict or 'title' not in item:
+            detail = item.get('detail') if type(item) is dict else None
+            raise ValueError(detail or 'The server answered with something that is not a recipe.')
+    return chunk
+
+
+def _csv_rows(recipe: dict) -> Iterable[list]:
+    head = [recipe['id'], recipe['title'], recipe['description'], recipe['author'], recipe['created_at'],
+            recipe.get('updated_at', '')]
+    for ingredient in recipe['ingredients']:
+        yield head + [ingredient['name'], ingredient['quantity'], ingredient['unit']]
+        head = [''] * len(head)
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipeExporter:
+    """Writes recipes to a .jsonl, .csv or .parquet file.
+
+    Recipes are pulled from the source `chunk_size` at a time and each chunk is written with one call, so an
+    export never holds more than one chunk. The CSV layout, one row per ingredient, is the one the importer
+    reads back. Parquet needs `pyarrow`; each chunk becomes a row group.
+    """
+    chunk_size: int = field(default=1000)
+    clock: Callable[[], float] = field(default=time.perf_counter, repr=False, compare=False)
+
+    def __post_init__(self):
+        validate('chunk_size', self.chunk_size, min_value=1, help_msg='The chunk size is invalid.')
+
+    def __chunks(self, recipes: Iterable[Any]) -> Iterable[List[dict]]:
+        recipes = iter(recipes)
+        chunk = list(islice(recipes, self.chunk_size))
+        while chunk:
+            yield _checked(chunk)
+            chunk = list(islice(recipes, self.chunk_size))
+
+    @typechecked
+    def export(self, recipes: Iterable[Any], path: str) -> ExportReport:
+        if path.endswith('.jsonl'):
+            write = self.__write_jsonl
+        elif path.endswith('.csv'):
+            write = self.__write_csv
+        elif path.endswith('.parquet'):
+            validate('pyarrow', pyarrow, custom=lambda v: v is not None,
+                     help_msg='Exporting to Parquet needs the pyarrow package.')
+            write = self.__write_parquet
+        else:
+            raise ValueError('Only .jsonl, .csv and .parquet files can be written.')
+        start = self.clock()
+        rows = write(self.__chunks(recipes), path)
+        return ExportReport(rows, self.clock() - start)
+
+    @staticmethod
+    def __write_jsonl(chunks: Iterable[List[dict]], path: str) -> int:
+        rows = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.write(''.join(json.dumps(recipe) + '\n' for recipe in chunk))
+                rows += len(chunk)
+        return rows
+
+    @staticmethod
+    def __write_csv(chunks: Iterable[List[dict]], path: str) -> int:
+        rows = 0
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(_CSV_FIELDS)
+            for chunk in chunks:
+                writer.writerows(row for recipe in chunk for row in _csv_rows(recipe))
+                rows += len(chunk)
+        return rows
+
+    @staticmethod
+    def __write_parquet(chunks: Iterable[List[dict]], path: str) -> int:
+        import pyarrow.parquet
+        ingredient = pyarrow.struct([('name', pyarrow.string()), ('quantity', pyarrow.int64()),
+                                     ('unit', pyarrow.string())])
+        schema = pyarrow.schema([('id', pyarrow.int64()), ('title', pyarrow.string()),
+                                 ('description', pyarrow.string()), ('author', pyarrow.string()),
+                                 ('created_at', pyarrow.string()), ('updated_at', pyarrow.string()),
+                                 ('ingredients', pyarrow.list_(ingredient))])
+        rows = 0
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pyarrow.Table.from_pylist(
+                    [{name: recipe.get(name) for name in schema.names} for recipe in chunk], schema=schema))
+                rows += len(chunk)
+        return rows
@@ -0,0 +1,128 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from validation import lazy_import, typechecked, validate
+
+from .domain import DealerRecipes, JsonHandler, Title, Description, Name, Quantity, Unit
+
+futures = lazy_import('concurrent.futures')
+requests = lazy_import('requests')
+valid8 = lazy_import('valid8')
+
+
+@typechecked
+def read_records(path: str, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.json'):
+        with open(path, 'rb') as file:
+            yield from JsonHandler.iter_json(iter(lambda: file.read(chunk_size), b''))
+    elif path.endswith('.csv'):
+        with open(path, encoding='utf-8', newline='') as file:
+            record = None
+            for row in csv.DictReader(file):
+                if row.get('title'):
+                    if record is not None:
+                        yield record
+                    record = {'title': row['title'], 'description': row.get('description', ''), 'ingredients': []}
+                elif record is None:
+                    raise ValueError('The first row of the file must contain a title.')
+                if row.get('name'):
+                    record['ingredients'].append({'name': row['name'], 'quantity': row.get('quantity'),
+                                                  'unit': row.get('unit')})
+            if record is not None:
+                yield record
+    else:
+        raise ValueError('Only .json, .jsonl and .csv files can be imported.')
+
+
+def validate_record(record: Any) -> Tuple[Optional[dict], str]:
+    try:
+        ingredients = []
+        for ingredient in record['ingredients']:
+            quantity = ingredient['quantity']
+            ingredients.append({
+                'name': Name(ingredient['name']).value,
+                'quantity': Quantity(int(quantity) if type(quantity) is str else quantity).value,
+                'unit': Unit(ingredient['unit']).value,
+            })
+        validate('ingredients', ingredients, min_len=1, help_msg='A recipe needs at least one ingredient.')
+        return {'title': Title(record['title']).value, 'description': Description(record['description']).value,
+                'ingredients': ingredients}, ''
+    except valid8.ValidationError as e:
+        return None, e.help_msg
+    except KeyError as e:
+        return None, f'Missing field {e}.'
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    number: int
+    title: str
+    status: str
+    detail: str = field(default='')
+
+    def __str__(self) -> str:
+        return f'{self.number}: {self.status} {self.title!r}' + (f' - {self.detail}' if self.detail else '')
+
+
+@typechecked
+@dataclass(frozen=True)
+class RecipeImporter:
+    """Validates and uploads recipes read from a stream of records.
+
+    Records are handled `chunk_size` at a time: while a chunk is uploaded, with at most `concurrency` requests
+    in flight, the next one is validated by `workers` processes (in this process if `workers` is 0). Memory
+    use is bounded by two chunks whatever the number of records, and results come out in input order.
+    """
+    dealer: DealerRecipes
+    key: str
+    workers: int = field(default=2)
+    concurrency: int = field(default=4)
+    chunk_size: int = field(default=64)
+
+    def __post_init__(self):
+        validate('workers', self.workers, min_value=0, help_msg='The number of workers is invalid.')
+        validate('concurrency', self.concurrency, min_value=1, max_value=self.dealer.pool_size,
+                 help_msg='The concurrency must be positive and not exceed the connection pool size.')
+        validate('chunk_size', self.chunk_size, min_value=1, help_msg='The chunk size is invalid.')
+
+    def __upload(self, number: int, record: Any, validated: Tuple[Optional[dict], str]) -> ImportResult:
+        data, error = validated
+        title = str(record.get('title', '')) if type(record) is dict else ''
+        if data is None:
+            return ImportResult(number, title, 'invalid', error)
+        try:
+            result = self.dealer.add_new_recipe(self.key, Title(data['title']), Description(data['description']),
+                                                data['ingredients'])
+        except requests.RequestException as e:
+            return ImportResult(number, title, 'failed', str(e) or type(e).__name__)
+        if type(result) is dict and 'title' in result:
+            return ImportResult(number, title, 'added', f'id {result["id"]}' if 'id' in result else '')
+        return ImportResult(number, title, 'failed', str(result.get('detail', result)) if type(result) is dict
+                            else str(result))
+
+    @typechecked
+    def run(self, records: Iterable[Any]) -> Iterator[ImportResult]:
+        records = iter(records)
+        validators = futures.ProcessPoolExecutor(self.workers) if self.workers else futures.ThreadPoolExecutor(1)
+        with validators, futures.ThreadPoolExecutor(self.concurrency) as uploaders:
+            chunksize = max(1, self.chunk_size // max(1, self.workers))
+            number = 1
+            chunk = list(islice(records, self.chunk_size))
+            pending = validators.map(validate_record, chunk, chunksize=chunksize)
+            while chunk:
+                validated = list(pending)
+                next_chunk = list(islice(records, self.chunk_size))
+                pending = validators.map(validate_record, next_chunk, chunksize=chunksize)
+                yield from uploaders.map(self.__upload, range(number, number + len(chunk)), chunk, validated)
+                number += len(chunk)
+                chunk = next_chunk
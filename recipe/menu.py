@@ -1,10 +1,10 @@
 from dataclasses import field, InitVar, dataclass
 from typing import Callable, List, Dict, Optional, Any
 
-from typeguard import typechecked
-from valid8 import validate
+from validation import register, typechecked, validate
 
-from validation.regex import pattern
+_DESCRIPTION_PATTERN = register('menu.description', r'[0-9A-Za-z ;.,_-]*')
+_KEY_PATTERN = register('menu.key', r'[0-9A-Za-z_-]*')
 
 
 @typechecked
@@ -13,7 +13,7 @@ class Description:
     value: str
 
     def __post_init__(self):
-        validate('Description.value', self.value, min_len=1, max_len=1000, custom=pattern(r'[0-9A-Za-z ;.,_-]*'))
+        validate('Description.value', self.value, min_len=1, max_len=1000, custom=_DESCRIPTION_PATTERN)
 
     def __str__(self):
         return self.value
@@ -25,7 +25,7 @@ class Key:
     value: str
 
     def __post_init__(self):
-        validate('Key.value', self.value, min_len=1, max_len=10, custom=pattern(r'[0-9A-Za-z_-]*'))
+        validate('Key.value', self.value, min_len=1, max_len=10, custom=_KEY_PATTERN)
 
     def __str__(self):
         return self.value
@@ -38,11 +38,12 @@ class Entry:
     description: Description
     on_selected: Callable[[], None] = field(default=lambda: None)
     is_exit: bool = field(default=False)
+    is_visible: Callable[[], bool] = field(default=lambda: True)
 
     @staticmethod
     def create(key: str, description: str, on_selected: Callable[[], None] = lambda: None,
-               is_exit: bool = False) -> 'Entry':
-        return Entry(Key(key), Description(description), on_selected, is_exit)
+               is_exit: bool = False, is_visible: Callable[[], bool] = lambda: True) -> 'Entry':
+        return Entry(Key(key), Description(description), on_selected, is_exit, is_visible)
 
 
 @typechecked
@@ -69,12 +70,11 @@ class Menu:
     def __print(self) -> None:
         length = len(str(self.description))
         fmt = '***{}{}{}***'
-        print(fmt.format('*', '*' * length, '*'))
-        print(fmt.format(' ', self.description.value, ' '))
-        print(fmt.format('*', '*' * length, '*'))
+        print('\n'.join((fmt.format('*', '*' * length, '*'),
+                         fmt.format(' ', self.description.value, ' '),
+                         fmt.format('*', '*' * length, '*'))))
         self.auto_select()
-        for entry in self.__entries:
-            print(f'{entry.key}:\t{entry.description}')
+        print('\n'.join(f'{entry.key}:\t{entry.description}' for entry in self.__entries if entry.is_visible()))
 
     def __select_from_input(self) -> bool:
         while True:
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from validation import typechecked, validate
+
+from .domain import DealerRecipes, Title, Description, Id, Username, Password
+
+
+@typechecked
+@dataclass(frozen=True)
+class UserSession:
+    dealer: DealerRecipes
+    key: str = field(repr=False)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    __state: Dict[str, Any] = field(default_factory=dict, repr=False, init=False, compare=False)
+    __lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        self.__state.update(last_used=self.clock(), requests=0, errors=0, seconds=0.0, in_flight=0)
+
+    def __call(self, method: Callable, *args) -> Any:
+        start = self.clock()
+        with self.__lock:
+            self.__state['last_used'] = start
+            self.__state['in_flight'] += 1
+        failed = True
+        try:
+            result = method(self.key, *args)
+            failed = False
+            return result
+        finally:
+            end = self.clock()
+            with self.__lock:
+                self.__state['last_used'] = end
+                self.__state['in_flight'] -= 1
+                self.__state['requests'] += 1
+                self.__state['errors'] += failed
+                self.__state['seconds'] += end - start
+
+    def idle(self) -> float:
+        with self.__lock:
+            return 0.0 if self.__state['in_flight'] else self.clock() - self.__state['last_used']
+
+    def stats(self) -> Dict[str, float]:
+        with self.__lock:
+            state = self.__state
+            return {'requests': state['requests'], 'errors': state['errors'], 'seconds': state['seconds'],
+                    'in_flight': state['in_flight'],
+                    'average_seconds': state['seconds'] / state['requests'] if state['requests'] else 0.0}
+
+    def what_is_my_role(self) -> str:
+        return self.__call(self.dealer.what_is_my_role)
+
+    def logout(self):
+        return self.__call(self.dealer.logout)
+
+    @typechecked
+    def add_new_recipe(self, title: Title, description: Description, ingredients: list[dict]):
+        return self.__call(self.dealer.add_new_recipe, title, description, ingredients)
+
+    @typechecked
+    def delete_recipe(self, index: Id):
+        return self.__call(self.dealer.delete_recipe, index)
+
+    @typechecked
+    def update_my_recipe(self, index: Id, recipe_to_change: dict):
+        return self.__call(self.dealer.update_my_recipe, index, recipe_to_change)
+
+    def sort_my_recipes_by_title(self):
+        return self.__call(self.dealer.sort_my_recipes_by_title)
+
+    def sort_my_recipes_by_date(self):
+        return self.__call(self.dealer.sort_my_recipes_by_date)
+
+
+@typechecked
+@dataclass(frozen=True)
+class SessionManager:
+    """Authenticated sessions of many users sharing one `DealerRecipes`.
+
+    All sessions go through the same connection pool and response cache; the cache keeps users apart by
+    their token. A session is evicted, without logging out, once it has been idle for `max_idle` seconds or
+    when `max_sessions` is exceeded, starting from the least recently used. Every method is thread-safe.
+    """
+    dealer: DealerRecipes = field(default_factory=DealerRecipes)
+    max_idle: float = field(default=900.0)
+    max_sessions: int = field(default=10000)
+    clock: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+    __sessions: OrderedDict = field(default_factory=OrderedDict, repr=False, init=False, compare=False)
+    __counters: Dict[str, int] = field(default_factory=lambda: {'evictions': 0}, repr=False, init=False,
+                                       compare=False)
+    __lock: Any = field(default_factory=threading.Lock, repr=False, init=False, compare=False)
+
+    def __post_init__(self):
+        validate('max_idle', self.max_idle, min_value=0, min_strict=True,
+                 help_msg='The maximum idle time is invalid. Check the value.')
+        validate('max_sessions', self.max_sessions, min_value=1,
+                 help_msg='The maximum number of sessions is invalid. Check the value.')
+
+    def __enter__(self) -> 'SessionManager':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__sessions.clear()
+        self.dealer.close()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__sessions)
+
+    def __evict(self) -> None:
+        sessions = self.__sessions
+        while sessions and (len(sessions) > self.max_sessions or
+                            next(iter(sessions.values())).idle() >= self.max_idle):
+            key, _ = sessions.popitem(last=False)
+            self.dealer.forget_role(key)
+            self.__counters['evictions'] += 1
+
+    @typechecked
+    def open(self, key: str) -> UserSession:
+        validate('key', key, min_len=1, help_msg='The token is invalid.')
+        with self.__lock:
+            session = self.__sessions.get(key)
+            if session is None:
+                session = self.__sessions[key] = UserSession(self.dealer, key, self.clock)
+            else:
+                self.__sessions.move_to_end(key)
+            self.__evict()
+            return session
+
+    @typechecked
+    def get(self, key: str) -> Optional[UserSession]:
+        with self.__lock:
+            self.__evict()
+            session = self.__sessions.get(key)
+            if session is not None:
+                self.__sessions.move_to_end(key)
+            return session
+
+    @typechecked
+    def login(self, username: Username, password: Password) -> Optional[UserSession]:
+        key = self.dealer.login(username, password)
+        return None if key is None else self.open(key)
+
+    @typechecked
+    def logout(self, key: str):
+        session = self.discard(key)
+        return self.dealer.logout(key) if session is None else session.logout()
+
+    @typechecked
+    def discard(self, key: str) -> Optional[UserSession]:
+        self.dealer.forget_role(key)
+        with self.__lock:
+            return self.__sessions.pop(key, None)
+
+    def evict_idle(self) -> int:
+        with self.__lock:
+            idle = [key for key, session in self.__sessions.items() if session.idle() >= self.max_idle]
+            for key in idle:
+                del self.__sessions[key]
+                self.dealer.forget_role(key)
+            self.__counters['evictions'] += len(idle)
+            return len(idle)
+
+    def stats(self) -> Dict[str, float]:
+        with self.__lock:
+            sessions = list(self.__sessions.values())
+            evictions = self.__counters['evictions']
+        totals = {'sessions': len(sessions), 'evictions': evictions, 'requests': 0, 'errors': 0, 'in_flight': 0}
+        for session in sessions:
+            session_stats = session.stats()
+            for name in ('requests', 'errors', 'in_flight'):
+                totals[name] += session_stats[name]
+        return totals
@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+def json_recipe(_id: int, title: str = 'recipe', author: str = 'alice', created_at: str = '2022-10-01',
+                ingredients: list = (), updated_at=None) -> dict:
+    """A recipe as served by the API. Ingredients are names (1 n/a) or (name, quantity, unit) tuples."""
+    recipe = {
+        'id': _id,
+        'author': author,
+        'title': title,
+        'description': 'description',
+        'ingredients': [{'name': i, 'quantity': 1, 'unit': 'n/a'} if type(i) is str else
+                        {'name': i[0], 'quantity': i[1], 'unit': i[2]} for i in ingredients],
+        'created_at': created_at,
+    }
+    if updated_at is not None:
+        recipe['updated_at'] = updated_at
+    return recipe
+
+
+class CookieServer(ThreadingHTTPServer):
+    """A local API whose login answers with the user's key and a `sessionid` cookie, and which records the
+    Authorization and Cookie headers of every request."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _CookieHandler)
+        self.seen = []
+        self.api_server = f'http://127.0.0.1:{self.server_address[1]}/api/v1'
+
+    def __enter__(self) -> 'CookieServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _CookieHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def __answer(self, body, cookie=None) -> None:
+        self.server.seen.append((self.command, self.path, self.headers.get('Authorization'),
+                                 self.headers.get('Cookie')))
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if cookie is not None:
+            self.send_header('Set-Cookie', f'sessionid={cookie}; Path=/')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        username = form['username'][0]
+        self.__answer({'key': f'tok-{username}'}, cookie=f'sess-{username}')
+
+    def do_GET(self):
+        self.__answer([])
+
+    def log_message(self, *args):
+        pass
@@ -1,15 +1,34 @@
+import os
+import subprocess
+import sys
 from datetime import date
 from getpass import getpass
 
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, call
 
 from valid8 import ValidationError
 
+import requests
+
 from recipe.app import ApplicationForUser, main
+from recipe.database import LocalRecipeDatabase
+from recipe.exporter import ExportReport, RecipeExporter
+from recipe.importer import ImportResult, RecipeImporter
+from tests.recipe.helpers import json_recipe
 
 from recipe.domain import DealerRecipes, Username, Title, Description, Name, Quantity, Unit, Password, Id, JsonHandler, \
-    Recipe, Ingredient, Email
+    Recipe, Ingredient, Email, RecipeSnapshot, RecipePager, RecipePage, RecipeRenderer
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def import_times(code, typecheck='strict'):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True, env=dict(os.environ, SECURE_RECIPE_TYPECHECK=typecheck))
+    rows = [line.split('|') for line in result.stderr.splitlines() if line.startswith('import time:')]
+    return {module.strip(): int(cumulative) for _, cumulative, module in rows[1:]}
 
 
 @pytest.fixture
@@ -111,10 +130,10 @@ def test_add_new_recipe(mock_input):
             with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input',
                               side_effect=my_side_effects) as mock_read:
                 with patch.object(JsonHandler, 'create_recipe_from_json', return_value=my_recipe):
-                    with patch.object(Recipe, 'print') as mock_recipe_print:
+                    with patch.object(RecipeRenderer, 'render') as mock_render:
                         new_app.run()
                         mock_read.assert_called()
-                        mock_recipe_print.assert_called()
+                        mock_render.assert_called_once_with([my_recipe])
 
 
 @patch('builtins.input', side_effect=['9'])
@@ -176,7 +195,7 @@ def test_wrong_delete_recipe(mock_print, mock_input):
 @patch('builtins.print')
 def test_show_all_recipes_not_list(mock_print, mock_input):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'show_all_recipes', side_effect=[{'message': 'testing'}]):
+    with patch.object(DealerRecipes, 'stream_all_recipes', return_value=iter([{'message': 'testing'}])):
         new_app.run()
         mock_print.assert_called()
 
@@ -189,10 +208,10 @@ def test_show_specific_recipe_not_detail(mock_print, mock_input, fixture_recipe)
         with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input',
                           return_value=Id(123)) as mock_read:
             with patch.object(JsonHandler, 'create_recipe_from_json', side_effect=[fixture_recipe]):
-                with patch.object(Recipe, 'print') as mock_recipe_print:
+                with patch.object(RecipeRenderer, 'render') as mock_render:
                     new_app.run()
                     mock_print.assert_called()
-                    mock_recipe_print.assert_called()
+                    mock_render.assert_called_once_with([fixture_recipe])
 
 
 @patch('builtins.input', side_effect=['4'])
@@ -267,10 +286,11 @@ def test_sort_by_title_print_recipe(mock_print, mock_input):
         'updated_at': '2022-12-01',
     }]
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_by_title', side_effect=[my_list]):
-        with patch.object(Recipe, 'print') as mock_recipe_print:
+    with patch.object(RecipeSnapshot, 'sort_by_title', side_effect=[my_list]):
+        with patch.object(RecipeRenderer, 'render') as mock_render:
             new_app.run()
-            mock_recipe_print.assert_called()
+            mock_render.assert_called_once()
+            assert [r.title.value for r in mock_render.call_args.args[0]] == ['title']
 
 
 @pytest.mark.parametrize('result', ({'detail': 'testing'}))
@@ -278,7 +298,7 @@ def test_sort_by_title_print_recipe(mock_print, mock_input):
 @patch('builtins.print')
 def test_sort_by_title_print_detail(mock_print, mock_input, result):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_by_title', return_value=[result]):
+    with patch.object(RecipeSnapshot, 'sort_by_title', return_value=[result]):
         new_app.run()
         mock_print.assert_called()
 
@@ -288,7 +308,7 @@ def test_sort_by_title_print_detail(mock_print, mock_input, result):
 @patch('builtins.print')
 def test_sort_by_date(mock_print, mock_input, result):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_by_date', return_value=[result]):
+    with patch.object(RecipeSnapshot, 'sort_by_date', return_value=[result]):
         new_app.run()
         mock_print.assert_called()
 
@@ -298,9 +318,11 @@ def test_sort_by_date(mock_print, mock_input, result):
 @patch('builtins.print')
 def test_sort_my_recipes_by_date(mock_print, mock_input, result):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_my_recipes_by_date', return_value=[result]):
-        new_app.run()
-        mock_print.assert_called()
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch.object(DealerRecipes, 'sort_my_recipes_by_date', return_value=[result]) as mock_sort:
+            new_app.run()
+            mock_sort.assert_called_once()
+            mock_print.assert_called()
 
 
 @pytest.mark.parametrize('result', ({'detail': 'forbidden'}))
@@ -308,9 +330,11 @@ def test_sort_my_recipes_by_date(mock_print, mock_input, result):
 @patch('builtins.print')
 def test_sort_my_recipes_by_title(mock_print, mock_input, result):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_my_recipes_by_title', return_value=[result]):
-        new_app.run()
-        mock_print.assert_called()
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch.object(DealerRecipes, 'sort_my_recipes_by_title', return_value=[result]) as mock_sort:
+            new_app.run()
+            mock_sort.assert_called_once()
+            mock_print.assert_called()
 
 
 @patch('builtins.input', side_effect=['5'])
@@ -330,10 +354,11 @@ def test_sort_by_date_print_recipe(mock_print, mock_input):
         'updated_at': '2022-12-01',
     }]
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'sort_by_date', side_effect=[my_list]):
-        with patch.object(Recipe, 'print') as mock_recipe_print:
+    with patch.object(RecipeSnapshot, 'sort_by_date', side_effect=[my_list]):
+        with patch.object(RecipeRenderer, 'render') as mock_render:
             new_app.run()
-            mock_recipe_print.assert_called()
+            mock_render.assert_called_once()
+            assert [r.title.value for r in mock_render.call_args.args[0]] == ['title']
 
 
 @patch('builtins.input', side_effect=['11'])
@@ -342,7 +367,7 @@ def test_filter_by_author(mock_print, mock_input):
     new_app = ApplicationForUser()
     with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input',
                       return_value=Username('username')) as mock_read:
-        with patch.object(DealerRecipes, 'filter_by_author', return_value={'detail': 'testing'}):
+        with patch.object(RecipeSnapshot, 'filter_by_author', return_value={'detail': 'testing'}):
             with patch.object(ApplicationForUser, '_ApplicationForUser__print_result_from_request') as mock_app_print:
                 new_app.run()
                 mock_read.assert_called()
@@ -355,7 +380,7 @@ def test_filter_by_title(mock_print, mock_input):
     new_app = ApplicationForUser()
     with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input',
                       return_value=Title('title')) as mock_read:
-        with patch.object(DealerRecipes, 'filter_by_title', return_value={'detail': 'testing'}):
+        with patch.object(RecipeSnapshot, 'filter_by_title', return_value={'detail': 'testing'}):
             with patch.object(ApplicationForUser, '_ApplicationForUser__print_result_from_request') as mock_app_print:
                 new_app.run()
                 mock_read.assert_called()
@@ -368,7 +393,7 @@ def test_filter_by_ingredient(mock_print, mock_input):
     new_app = ApplicationForUser()
     with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input',
                       return_value=Name('name')) as mock_read:
-        with patch.object(DealerRecipes, 'filter_by_ingredient', return_value={'detail': 'testing'}):
+        with patch.object(RecipeSnapshot, 'filter_by_ingredient', return_value={'detail': 'testing'}):
             with patch.object(ApplicationForUser, '_ApplicationForUser__print_result_from_request') as mock_app_print:
                 new_app.run()
                 mock_read.assert_called()
@@ -379,7 +404,7 @@ def test_filter_by_ingredient(mock_print, mock_input):
 @patch('builtins.print')
 def test_condition_in_print_from_result(mock_print, mock_input):
     new_app = ApplicationForUser()
-    with patch.object(DealerRecipes, 'show_all_recipes', side_effect=[{'detail': 'testing'}]):
+    with patch.object(DealerRecipes, 'stream_all_recipes', return_value=iter([{'detail': 'testing'}])):
         with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input') as mock_read:
             new_app.run()
             mock_read.assert_not_called()
@@ -469,4 +494,367 @@ def test_sign_up_with_error_show_help_msg(mock_input, mock_print):
     with patch.object(ApplicationForUser, '_ApplicationForUser__error') as mock_error:
         new_app.run()
         mock_error.assert_called()
-        mock_print.assert_called()
\ No newline at end of file
+        mock_print.assert_called()
+
+@patch('builtins.input', side_effect=['0'])
+@patch('builtins.print')
+def test_run_closes_dealer(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'close') as mock_close:
+        new_app.run()
+        mock_close.assert_called_once()
+
+
+@patch('builtins.input', side_effect=['10'])
+@patch('builtins.print')
+def test_delete_recipe_invalidates_snapshot(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input', return_value=Id(123)):
+            with patch.object(DealerRecipes, 'delete_recipe', return_value='The recipe is cancelled!'):
+                with patch.object(RecipeSnapshot, 'invalidate') as mock_invalidate:
+                    new_app.run()
+                    mock_invalidate.assert_called_once()
+
+
+@patch('builtins.input', side_effect=['16', 'y', 'eggs', 'y', 'flour', 'n', 'n', 'y', 'salt', 'n'])
+@patch('builtins.print')
+def test_filter_by_ingredients(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(RecipeSnapshot, 'filter_by_ingredients', return_value=[]) as mock_filter:
+        new_app.run()
+        mock_filter.assert_called_once_with([Name('eggs'), Name('flour')], [], [Name('salt')])
+
+
+@patch('builtins.input', side_effect=['16', 'n', 'n', 'n'])
+@patch('builtins.print')
+def test_filter_by_ingredients_without_ingredients(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(RecipeSnapshot, 'filter_by_ingredients') as mock_filter:
+        with patch.object(ApplicationForUser, '_ApplicationForUser__error') as mock_error:
+            new_app.run()
+            mock_error.assert_called()
+            mock_filter.assert_not_called()
+
+
+@patch('builtins.input', side_effect=['3'])
+@patch('builtins.print')
+def test_show_all_recipes_prints_while_streaming(mock_print, mock_input, fixture_recipe):
+    printed = []
+
+    def stream():
+        yield {'title': 'first'}
+        assert printed == [1]
+        yield {'title': 'second'}
+
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'stream_all_recipes', return_value=stream()):
+        with patch.object(JsonHandler, 'create_recipe_from_json', return_value=fixture_recipe):
+            with patch.object(RecipeRenderer, 'render', side_effect=lambda recipes: printed.append(len(recipes))):
+                with patch.object(ApplicationForUser, '_ApplicationForUser__error') as mock_error:
+                    new_app.run()
+                    mock_error.assert_not_called()
+    assert printed == [1, 1]
+
+
+@patch('builtins.input', side_effect=['18', '3', '0'])
+@patch('builtins.print')
+def test_show_all_recipes_renders_table_in_chunks(mock_print, mock_input, fixture_recipe):
+    stream = [{'title': 'recipe'}] * 45 + [{'detail': 'testing'}, {'title': 'recipe'}]
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'stream_all_recipes', return_value=iter(stream)):
+        with patch.object(JsonHandler, 'create_recipe_from_json', return_value=fixture_recipe):
+            with patch.object(RecipeRenderer, 'render') as mock_render:
+                new_app.run()
+    assert [len(c.args[0]) for c in mock_render.call_args_list] == [20, 20, 5, 1]
+    mock_print.assert_any_call('testing')
+
+
+def recipe_page(number: int, has_next: bool) -> RecipePage:
+    return RecipePage([{'title': f'page {number}'}], number, 1, 3, has_next)
+
+
+@patch('builtins.input', side_effect=['17', 't', 'n', 'p', '3', 'q'])
+@patch('builtins.print')
+def test_browse_recipes(mock_print, mock_input, fixture_recipe):
+    new_app = ApplicationForUser()
+    pages = [recipe_page(1, True), recipe_page(2, True), recipe_page(1, True), recipe_page(3, False)]
+    with patch.object(RecipePager, 'page', side_effect=pages) as mock_page:
+        with patch.object(JsonHandler, 'create_recipe_from_json', return_value=fixture_recipe):
+            with patch.object(RecipeRenderer, 'render') as mock_render:
+                new_app.run()
+                assert mock_page.mock_calls == [call(1), call(2), call(1), call(3)]
+                assert mock_render.call_count == 4
+                mock_print.assert_any_call('Page 3 of 3')
+
+
+@patch('builtins.input', side_effect=['17', 'x', 'a'])
+@patch('builtins.print')
+def test_browse_recipes_with_error(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(RecipePager, 'page', return_value={'detail': 'testing'}):
+        with patch.object(ApplicationForUser, '_ApplicationForUser__error') as mock_error:
+            new_app.run()
+            assert mock_error.mock_calls == [call('Invalid selection.'), call('testing')]
+
+
+@patch('builtins.input', side_effect=['18', '6', '18'])
+@patch('builtins.print')
+def test_switch_view(mock_print, mock_input):
+    my_list = [{
+        'id': 1,
+        'author': 'author1',
+        'title': 'title',
+        'description': 'description1',
+        'ingredients': [{'name': 'ingredient', 'quantity': 1, 'unit': 'n/a'}],
+        'created_at': '2022-12-01',
+    }]
+    new_app = ApplicationForUser()
+    with patch.object(RecipeSnapshot, 'sort_by_title', return_value=my_list):
+        with patch.object(RecipeRenderer, 'format', return_value='') as mock_format:
+            new_app.run()
+            mock_format.assert_called_once()
+    mock_print.assert_any_call('Recipes are now shown as a table.')
+    mock_print.assert_any_call('Recipes are now shown in detail.')
+
+
+@patch('builtins.input', side_effect=['3', '0'])
+@patch('builtins.print')
+def test_show_all_recipes_reads_local_database(mock_print, mock_input):
+    new_app = ApplicationForUser(database_path=':memory:')
+    with patch.object(LocalRecipeDatabase, 'show_all_recipes', return_value=[]) as mock_all:
+        with patch.object(DealerRecipes, 'stream_all_recipes') as mock_stream:
+            new_app.run()
+            mock_all.assert_called_once()
+            mock_stream.assert_not_called()
+
+
+@patch('builtins.input', side_effect=['10', '0'])
+@patch('builtins.print')
+def test_write_reports_unreachable_server(mock_print, mock_input):
+    new_app = ApplicationForUser(database_path=':memory:')
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input', return_value=Id(123)):
+            with patch.object(DealerRecipes, 'delete_recipe', side_effect=requests.ConnectionError):
+                new_app.run()
+                mock_print.assert_any_call('The server is unreachable. Recipes can only be read until it is back.')
+                mock_print.assert_any_call('Bye bye!')
+
+
+@patch('builtins.input', side_effect=['2', '0'])
+@patch('builtins.print')
+def test_login_reports_unreachable_server(mock_print, mock_input):
+    new_app = ApplicationForUser(database_path=':memory:')
+    with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input', return_value=Username('alice')):
+        with patch.object(DealerRecipes, 'login', side_effect=requests.ConnectionError):
+            new_app.run()
+    mock_print.assert_any_call('The server is unreachable. Recipes can only be read until it is back.')
+    mock_print.assert_any_call('Bye bye!')
+
+
+@patch('builtins.input', side_effect=['17', 't', 'n', 'q', '0'])
+@patch('builtins.print')
+def test_browse_recipes_from_mirror_when_server_is_down(mock_print, mock_input, tmp_path):
+    path = str(tmp_path / 'recipes.db')
+    recipes = [json_recipe(index, title, ingredients=['eggs']) for index, title in
+               enumerate(['Omelette', 'Bread', 'Cake', 'Pancakes', 'Salad', 'Soup', 'Tart', 'Rice', 'Pasta', 'Pie',
+                          'Apple Pie'], start=1)]
+    with patch.object(DealerRecipes, 'get_request', return_value=recipes):
+        with LocalRecipeDatabase(DealerRecipes(), path) as database:
+            assert database.sync()
+    new_app = ApplicationForUser(database_path=path)
+    with patch.object(DealerRecipes, 'get_request', side_effect=requests.ConnectionError):
+        with patch.object(RecipeRenderer, 'render') as mock_render:
+            new_app.run()
+    pages = [[recipe.title.value for recipe in c.args[0]] for c in mock_render.call_args_list]
+    assert pages == [['Apple Pie', 'Bread', 'Cake', 'Omelette', 'Pancakes', 'Pasta', 'Pie', 'Rice', 'Salad', 'Soup'],
+                     ['Tart']]
+    mock_print.assert_any_call('Page 2 of 2')
+    mock_print.assert_any_call('Bye bye!')
+
+
+@patch('builtins.input', side_effect=['19', 'pancaks', '19', 'zzz', '0'])
+@patch('builtins.print')
+def test_search_recipes(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(RecipeSnapshot, 'search', side_effect=[[{'id': 1}], []]) as mock_search:
+        with patch.object(JsonHandler, 'create_recipes_from_json', return_value=[]):
+            with patch.object(RecipeRenderer, 'render') as mock_render:
+                new_app.run()
+                mock_render.assert_called_once_with([])
+        assert mock_search.mock_calls == [call('pancaks'), call('zzz')]
+        mock_print.assert_any_call('No recipe matches the search.')
+
+
+@patch('builtins.input', side_effect=['20', 'recipes.jsonl', '0'])
+@patch('builtins.print')
+def test_import_recipes(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    results = [ImportResult(1, 'pancakes', 'added', 'id 1'), ImportResult(2, 'bread', 'invalid', 'Wrong title.')]
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch('recipe.app.read_records', return_value=iter([])) as mock_read:
+            with patch.object(RecipeImporter, 'run', return_value=iter(results)):
+                with patch.object(RecipeSnapshot, 'invalidate') as mock_invalidate:
+                    new_app.run()
+                    mock_read.assert_called_once_with('recipes.jsonl')
+                    mock_invalidate.assert_called_once()
+                    mock_print.assert_any_call(results[1])
+                    mock_print.assert_any_call('1 added, 1 invalid')
+
+
+@patch('builtins.input', side_effect=['20', 'missing.jsonl', '0'])
+@patch('builtins.print')
+def test_import_recipes_from_missing_file(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(ApplicationForUser, '_ApplicationForUser__is_logged', return_value=True):
+        with patch.object(ApplicationForUser, '_ApplicationForUser__error') as mock_error:
+            new_app.run()
+            mock_error.assert_called_once()
+            mock_print.assert_any_call('No recipe to import.')
+
+
+@patch('builtins.input', side_effect=['21', 'recipes.jsonl', '21', 'recipes.xml', '0'])
+@patch('builtins.print')
+def test_export_recipes(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    report = ExportReport(3, 1.0)
+    with patch.object(DealerRecipes, 'stream_all_recipes', return_value=iter([])) as mock_stream:
+        with patch.object(RecipeExporter, 'export', side_effect=[report, ValueError('Wrong file.')]) as mock_export:
+            new_app.run()
+            assert mock_stream.call_count == 2
+            assert mock_export.call_args_list[0].args[1] == 'recipes.jsonl'
+            mock_print.assert_any_call(report)
+            mock_print.assert_any_call('Export interrupted.\n Wrong file.')
+
+
+@patch('builtins.input', side_effect=['7', '8', '0'])
+@patch('builtins.print')
+def test_sort_my_recipes_without_login(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'sort_my_recipes_by_date') as mock_by_date:
+        with patch.object(DealerRecipes, 'sort_my_recipes_by_title') as mock_by_title:
+            new_app.run()
+            mock_by_date.assert_not_called()
+            mock_by_title.assert_not_called()
+            mock_print.assert_any_call('You can not perform this action without login.')
+
+
+@patch('builtins.input', side_effect=['2', 'username1', '0'])
+@patch('builtins.print')
+def test_menu_shows_entries_for_login_state(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch('getpass.getpass', return_value='password1'):
+        with patch.object(DealerRecipes, 'login', return_value='Token1234'):
+            with patch.object(DealerRecipes, 'what_is_my_role', return_value='You are logged as normal user'):
+                new_app.run()
+    listings = [c.args[0] for c in mock_print.mock_calls if c.args and '\t' in str(c.args[0])]
+    assert '1:\tSign up' in listings[0] and '15:\tLog out' not in listings[0]
+    assert '1:\tSign up' not in listings[1] and '15:\tLog out' in listings[1]
+    assert '9:\tAdd recipe' in listings[1] and '2:\tLogin' not in listings[1]
+
+
+def test_startup_defers_the_network_and_storage_stacks():
+    loaded = import_times('import recipe.app; recipe.app.ApplicationForUser()')
+    assert not {'requests', 'urllib3', 'getpass', 'sqlite3', 'mmap'} & loaded.keys()
+
+
+def test_startup_without_typechecks_defers_typeguard_and_asyncio():
+    loaded = import_times('import recipe.app; recipe.app.ApplicationForUser()', typecheck='off')
+    assert not {'typeguard', 'unittest.mock', 'asyncio', 'concurrent.futures', 'sqlite3', 'mmap'} & loaded.keys()
+
+
+def test_applications_keep_their_own_menu():
+    first, second = ApplicationForUser(), ApplicationForUser()
+    assert first._ApplicationForUser__menu is not second._ApplicationForUser__menu
+    with patch.object(ApplicationForUser, '_ApplicationForUser__read_from_input', return_value=Id(1)):
+        with patch.object(DealerRecipes, 'login', return_value='key') as mock_login, \
+                patch.object(DealerRecipes, 'what_is_my_role', return_value='You are logged as normal user'):
+            with patch('builtins.input', side_effect=['2', '0']), patch('builtins.print') as first_print:
+                first.run()
+            with patch('builtins.input', side_effect=['0']), patch('builtins.print') as second_print:
+                second.run()
+    mock_login.assert_called_once()
+    assert 'Log out' in str(first_print.call_args_list)
+    assert 'Log out' not in str(second_print.call_args_list)
+
+
+def test_menu_table_keeps_every_entry():
+    with patch('builtins.input', side_effect=['0']), patch('builtins.print') as mock_print:
+        ApplicationForUser().run()
+    printed = ' '.join(str(c) for c in mock_print.call_args_list)
+    for description in ('Sign up', 'Login', 'Show all the recipes', 'Export all the recipes to a file', 'Exit'):
+        assert description in printed
+
+
+PANCAKES = {'id': 1, 'title': 'Pancakes', 'author': 'alice', 'description': 'Easy pancakes.',
+            'created_at': '2024-01-01', 'ingredients': [{'name': 'flour', 'quantity': 250, 'unit': 'g'},
+                                                        {'name': 'milk', 'quantity': 50, 'unit': 'cl'},
+                                                        {'name': 'eggs', 'quantity': 2, 'unit': 'n/a'}]}
+CREPES = {'id': 2, 'title': 'Crepes', 'author': 'bob', 'description': 'Thin crepes.', 'created_at': '2024-01-02',
+          'ingredients': [{'name': 'flour', 'quantity': 1, 'unit': 'kg'},
+                          {'name': 'milk', 'quantity': 300, 'unit': 'ml'}]}
+
+
+@patch('builtins.input', side_effect=['22', '1', '2', '6', '0'])
+@patch('builtins.print')
+def test_scale_recipe(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'show_specific_recipe', return_value=PANCAKES):
+        with patch.object(RecipeRenderer, 'render') as mock_render:
+            new_app.run()
+            recipe = mock_render.call_args.args[0][0]
+            assert [(i.name.value, i.quantity.value, i.unit.value) for i in recipe.ingredients] == [
+                ('flour', 750, 'g'), ('milk', 150, 'cl'), ('eggs', 6, 'n/a')]
+
+
+@patch('builtins.input', side_effect=['22', '1', '4', '3', '0'])
+@patch('builtins.print')
+def test_scale_recipe_reports_rounding(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'show_specific_recipe', return_value=PANCAKES):
+        with patch.object(RecipeRenderer, 'render') as mock_render:
+            new_app.run()
+    recipe = mock_render.call_args.args[0][0]
+    assert [(i.name.value, i.quantity.value, i.unit.value) for i in recipe.ingredients] == [
+        ('flour', 188, 'g'), ('milk', 375, 'ml'), ('eggs', 2, 'n/a')]
+    mock_print.assert_any_call('Rounded eggs from 1.5 n/a to 2 n/a.')
+
+
+@patch('builtins.input', side_effect=['22', '1', '0'])
+@patch('builtins.print')
+def test_scale_missing_recipe(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(DealerRecipes, 'show_specific_recipe', return_value={'detail': 'Not found.'}):
+        new_app.run()
+        mock_print.assert_any_call('Not found.')
+
+
+@patch('builtins.input', side_effect=['23', 'i', '1', 'y', '2', 'y', '3', 'n', '0'])
+@patch('builtins.print')
+def test_shopping_list(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    recipes = {1: PANCAKES, 2: CREPES, 3: {'detail': 'Not found.'}}
+    with patch.object(DealerRecipes, 'show_specific_recipe', side_effect=lambda index: recipes[index.id]) as mock_show:
+        new_app.run()
+        assert sorted(c.args[0].id for c in mock_show.call_args_list) == [1, 2, 3]
+    mock_print.assert_any_call('Added Pancakes.')
+    mock_print.assert_any_call('Added Crepes.')
+    mock_print.assert_any_call('Recipe 3: Not found.')
+    mock_print.assert_any_call('Shopping list:')
+    mock_print.assert_any_call('\t-eggs: 2 n/a')
+    mock_print.assert_any_call('\t-flour: 1.25 kg')
+    mock_print.assert_any_call('\t-milk: 80 cl')
+
+
+@patch('builtins.input', side_effect=['23', 'a', 'alice', '23', 'n', 'saffron', '0'])
+@patch('builtins.print')
+def test_shopping_list_from_filters(mock_print, mock_input):
+    new_app = ApplicationForUser()
+    with patch.object(RecipeSnapshot, 'filter_by_author', return_value=[PANCAKES, CREPES]) as mock_author:
+        with patch.object(RecipeSnapshot, 'filter_by_ingredient', return_value=[]):
+            with patch.object(DealerRecipes, 'show_specific_recipe') as mock_show:
+                new_app.run()
+                mock_author.assert_called_once_with(Username('alice'))
+                mock_show.assert_not_called()
+    mock_print.assert_any_call('\t-flour: 1.25 kg')
+    mock_print.assert_any_call('No ingredient to buy.')
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+
+from recipe.domain import AsyncDealerRecipes, DealerRecipes, Id, Username, Password
+
+
+class AsyncStubServer:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.hits = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.port = None
+        self.__loop = asyncio.new_event_loop()
+        self.__ready = threading.Event()
+        self.__thread = threading.Thread(target=self.__serve, daemon=True)
+
+    def __enter__(self) -> 'AsyncStubServer':
+        self.__thread.start()
+        self.__ready.wait()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/api/v1'
+
+    def __serve(self) -> None:
+        asyncio.set_event_loop(self.__loop)
+        server = self.__loop.run_until_complete(asyncio.start_server(self.__handle, '127.0.0.1', 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self.__ready.set()
+        self.__loop.run_forever()
+        server.close()
+        self.__loop.run_until_complete(server.wait_closed())
+        self.__loop.close()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            lines = head.decode().split('\r\n')
+            length = 0
+            for line in lines[1:]:
+                if line.lower().startswith('content-length:'):
+                    length = int(line.split(':')[1])
+            if length:
+                await reader.readexactly(length)
+            path = lines[0].split(' ')[1]
+            self.hits.append(path)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.delay)
+            self.in_flight -= 1
+            body = json.dumps(self.__body_for(path)).encode()
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                         + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+            await writer.drain()
+        writer.close()
+
+    @staticmethod
+    def __body_for(path: str):
+        parts = [p for p in path.split('/') if p]
+        if parts[-2:-1] == ['recipes'] and parts[-1].isdigit():
+            return {'id': int(parts[-1]), 'title': f'title {parts[-1]}'}
+        return {'detail': 'Not found.'}
+
+
+def test_show_specific_recipes_are_fetched_concurrently():
+    with AsyncStubServer() as server:
+        async def fetch():
+            async with AsyncDealerRecipes(DealerRecipes(api_server=server.url)) as dealer:
+                return await dealer.show_specific_recipes([Id(1), Id(2), Id(3), Id(4)])
+
+        result = asyncio.run(fetch())
+    assert [r['id'] for r in result] == [1, 2, 3, 4]
+    assert sorted(server.hits) == [f'/api/v1/recipes/{i}/' for i in range(1, 5)]
+    assert server.max_in_flight > 1
+
+
+def test_show_specific_recipes_respect_pool_size():
+    with AsyncStubServer() as server:
+        async def fetch():
+            async with AsyncDealerRecipes(DealerRecipes(api_server=server.url, pool_size=2)) as dealer:
+                return await dealer.show_specific_recipes([Id(i) for i in range(6)])
+
+        asyncio.run(fetch())
+    assert len(server.hits) == 6
+    assert server.max_in_flight <= 2
+
+
+def test_concurrency_follows_pool_size_not_the_default_executor():
+    with AsyncStubServer() as server:
+        async def fetch():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(1))
+            async with AsyncDealerRecipes(DealerRecipes(api_server=server.url, pool_size=4)) as dealer:
+                return await dealer.show_specific_recipes([Id(i) for i in range(1, 5)])
+
+        asyncio.run(fetch())
+    assert server.max_in_flight == 4
+
+
+def test_gather_independent_calls():
+    with AsyncStubServer() as server:
+        async def fetch():
+            async with AsyncDealerRecipes(DealerRecipes(api_server=server.url)) as dealer:
+                return await asyncio.gather(dealer.show_specific_recipe(Id(7)), dealer.show_all_recipes())
+
+        recipe, all_recipes = asyncio.run(fetch())
+    assert recipe == {'id': 7, 'title': 'title 7'}
+    assert all_recipes == {'detail': 'Not found.'}
+
+
+def test_sync_facade_for_specific_recipes():
+    with AsyncStubServer() as server:
+        with DealerRecipes(api_server=server.url) as dealer:
+            result = dealer.show_specific_recipes([Id(5), Id(6)])
+    assert result == [{'id': 5, 'title': 'title 5'}, {'id': 6, 'title': 'title 6'}]
+
+
+def test_sync_facade_inside_a_running_loop():
+    with AsyncStubServer() as server:
+        async def fetch():
+            with DealerRecipes(api_server=server.url) as dealer:
+                return dealer.show_specific_recipes([Id(5), Id(6)])
+
+        result = asyncio.run(fetch())
+    assert result == [{'id': 5, 'title': 'title 5'}, {'id': 6, 'title': 'title 6'}]
+
+
+@pytest.mark.parametrize('key, role', [('token', 'You are logged as admin')])
+def test_async_methods_delegate_to_dealer(key, role):
+    async def run():
+        dealer = AsyncDealerRecipes()
+        with patch.object(DealerRecipes, 'login', return_value=key) as mock_login:
+            with patch.object(DealerRecipes, 'what_is_my_role', return_value=role):
+                token = await dealer.login(Username('username'), Password('password1234'))
+                assert await dealer.what_is_my_role(token) == role
+                mock_login.assert_called_once()
+
+    asyncio.run(run())
+
+
+def test_async_close_releases_the_dealer():
+    async def run():
+        with patch.object(DealerRecipes, 'close') as mock_close:
+            async with AsyncDealerRecipes():
+                pass
+            mock_close.assert_called_once()
+
+    asyncio.run(run())
+
+
+def test_async_get_request_with_mocker():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/by-author/author/', json=[{'id': 1}])
+        assert asyncio.run(AsyncDealerRecipes().filter_by_author(Username('author'))) == [{'id': 1}]
+
+
+def concurrent_get_requests(dealer: DealerRecipes, callers: int, headers=lambda number: {}) -> list:
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def call(number: int):
+        barrier.wait()
+        try:
+            results[number] = dealer.get_request('/recipes/', headers=headers(number))
+        except Exception as e:
+            results[number] = e
+
+    threads = [threading.Thread(target=call, args=(number,)) for number in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_identical_concurrent_gets_share_one_request(cache):
+    with AsyncStubServer(delay=0.3) as server:
+        with DealerRecipes(api_server=server.url, pool_size=50, **({} if cache else {'cache': None})) as dealer:
+            results = concurrent_get_requests(dealer, 50)
+            assert server.hits == ['/api/v1/recipes/']
+            assert results == [{'detail': 'Not found.'}] * 50
+            results[0]['detail'] = 'changed'
+            assert results[1] == {'detail': 'Not found.'}
+            concurrent_get_requests(dealer, 10)
+            assert len(server.hits) == (1 if cache else 2)
+
+
+def test_concurrent_gets_of_different_users_are_not_shared():
+    with AsyncStubServer(delay=0.3) as server:
+        with DealerRecipes(api_server=server.url, pool_size=20, cache=None) as dealer:
+            concurrent_get_requests(dealer, 20, headers=lambda number: {'Authorization': f'Token {number % 2}'})
+            assert len(server.hits) == 2
+
+
+def test_failed_shared_request_raises_for_every_caller():
+    def failing_get(*args, **kwargs):
+        threading.Event().wait(0.3)
+        raise requests.ConnectionError('Server down.')
+
+    with patch.object(requests.Session, 'get', side_effect=failing_get) as mock_get:
+        results = concurrent_get_requests(DealerRecipes(cache=None), 10)
+        assert mock_get.call_count == 1
+        assert all(type(result) is requests.ConnectionError for result in results)
@@ -0,0 +1,178 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+from valid8 import ValidationError
+
+from recipe.database import LocalRecipeDatabase
+from recipe.domain import DealerRecipes, Id, Name, Title, Username, RecipeSnapshot
+from tests.recipe.helpers import json_recipe
+
+API = 'http://localhost:8000/api/v1'
+
+
+@pytest.fixture
+def fixture_recipes():
+    return [
+        json_recipe(1, 'pancakes', 'alice', '2022-10-01', ['eggs', 'flour', 'milk']),
+        json_recipe(2, 'Omelette', 'bobby', '2022-12-01', ['eggs', 'salt']),
+        json_recipe(3, 'bread', 'Alice', '2022-11-01', ['Flour', 'water', 'salt']),
+    ]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_database_sync_interval_cannot_be_negative():
+    with pytest.raises(ValidationError):
+        LocalRecipeDatabase(DealerRecipes(), sync_interval=-1.0)
+
+
+def test_database_serves_reads_locally(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        with LocalRecipeDatabase(DealerRecipes(), clock=FakeClock()) as database:
+            assert [r['id'] for r in database.show_all_recipes()] == [1, 2, 3]
+            assert [r['id'] for r in database.sort_by_title()] == [3, 2, 1]
+            assert [r['id'] for r in database.sort_by_date()] == [2, 3, 1]
+            assert [r['id'] for r in database.filter_by_author(Username('alice'))] == [1, 3]
+            assert [r['id'] for r in database.filter_by_title(Title('OMELETTE'))] == [2]
+            assert [r['id'] for r in database.filter_by_ingredient(Name('flour'))] == [1, 3]
+            assert database.show_specific_recipe(Id(2)) == fixture_recipes[1]
+            assert database.show_specific_recipe(Id(9)) == {'detail': 'Not found.'}
+        assert m.call_count == 1
+
+
+def test_database_iterates_recipes_in_batches(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        database = LocalRecipeDatabase(DealerRecipes(), clock=FakeClock())
+        recipes = database.iter_all_recipes(batch_size=2)
+        assert next(recipes) == fixture_recipes[0]
+        database.forget(Id(3))
+        assert list(recipes) == fixture_recipes[1:2]
+        assert list(database.iter_all_recipes(batch_size=3)) == fixture_recipes[:2]
+        assert m.call_count == 1
+    with pytest.raises(ValidationError):
+        next(database.iter_all_recipes(batch_size=0))
+
+
+def test_database_pages_recipes_in_each_order(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        with LocalRecipeDatabase(DealerRecipes(), clock=FakeClock()) as database:
+            first = database.show_recipes_page(1, 2)
+            assert [r['id'] for r in first.items] == [1, 2]
+            assert (first.number, first.count, first.has_next) == (1, 3, True)
+            last = database.show_recipes_page(2, 2, '/recipes/sort-by-title/')
+            assert [r['id'] for r in last.items] == [1]
+            assert not last.has_next
+            assert [r['id'] for r in database.show_recipes_page(1, 3, '/recipes/sort-by-date/').items] == [2, 3, 1]
+            with pytest.raises(ValidationError):
+                database.show_recipes_page(1, view='/recipes/mine/')
+
+
+def test_database_syncs_only_deltas(fixture_recipes):
+    clock = FakeClock()
+    changed = json_recipe(2, 'Scrambled eggs', 'bobby', '2022-12-01', ['eggs'], updated_at='2023-01-01')
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        m.get(f'{API}/recipes/?updated_since=2022-12-01', json=[changed], complete_qs=True)
+        database = LocalRecipeDatabase(DealerRecipes(), sync_interval=10.0, clock=clock)
+        database.show_all_recipes()
+        clock.now = 5.0
+        database.show_all_recipes()
+        assert m.call_count == 1
+        clock.now = 10.0
+        assert database.show_all_recipes()[1] == changed
+        assert m.last_request.qs == {'updated_since': ['2022-12-01']}
+        assert database.filter_by_ingredient(Name('salt')) == [fixture_recipes[2]]
+        assert m.call_count == 2
+
+
+def test_database_full_sync_drops_missing_recipes(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', [{'json': fixture_recipes}, {'json': fixture_recipes[:1]}])
+        database = LocalRecipeDatabase(DealerRecipes(cache=None), clock=FakeClock())
+        database.show_all_recipes()
+        assert database.sync(full=True)
+        assert database.show_all_recipes() == fixture_recipes[:1]
+        assert database.filter_by_ingredient(Name('salt')) == []
+
+
+def test_database_persists_between_sessions(fixture_recipes, tmp_path):
+    path = str(tmp_path / 'recipes.db')
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        with LocalRecipeDatabase(DealerRecipes(), path) as database:
+            database.sync()
+    with LocalRecipeDatabase(DealerRecipes(), path) as database:
+        with requests_mock.Mocker() as m:
+            m.get(f'{API}/recipes/', exc=requests.ConnectionError)
+            assert database.show_all_recipes() == fixture_recipes
+            assert not database.is_online()
+
+
+def test_database_works_read_only_when_offline(fixture_recipes):
+    clock = FakeClock()
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        database = LocalRecipeDatabase(DealerRecipes(), sync_interval=0.0, clock=clock)
+        database.show_all_recipes()
+        assert database.is_online()
+    with requests_mock.Mocker() as m:
+        m.get(requests_mock.ANY, exc=requests.ConnectionError)
+        assert database.sort_by_title() == [fixture_recipes[2], fixture_recipes[1], fixture_recipes[0]]
+        assert not database.is_online()
+
+
+def test_database_goes_offline_on_html_error_page(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        database = LocalRecipeDatabase(DealerRecipes())
+        database.show_all_recipes()
+    database.invalidate()
+    with requests_mock.Mocker() as m:
+        m.get(requests_mock.ANY, status_code=502, text='<html><body>Bad Gateway</body></html>')
+        assert database.show_all_recipes() == fixture_recipes
+        assert not database.is_online()
+
+
+def test_database_mirrors_personal_area(fixture_recipes):
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        m.get(f'{API}/personal-area/sort-by-title/', json=[fixture_recipes[0], fixture_recipes[2]])
+        database = LocalRecipeDatabase(DealerRecipes(), clock=FakeClock())
+        assert [r['id'] for r in database.sort_my_recipes_by_title('key1')] == [3, 1]
+        assert [r['id'] for r in database.sort_my_recipes_by_date('key1')] == [3, 1]
+        assert m.request_history[0].headers['Authorization'] == 'Token key1'
+        assert database.sort_my_recipes_by_title('key2') == [fixture_recipes[2], fixture_recipes[0]]
+        assert m.call_count == 2
+
+
+def test_database_forget_and_invalidate(fixture_recipes):
+    clock = FakeClock()
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/recipes/', json=fixture_recipes)
+        m.get(f'{API}/recipes/?updated_since=2022-12-01', json=[], complete_qs=True)
+        database = LocalRecipeDatabase(DealerRecipes(), clock=clock)
+        database.show_all_recipes()
+        database.forget(Id(2))
+        assert [r['id'] for r in database.show_all_recipes()] == [1, 3]
+        database.invalidate()
+        database.show_all_recipes()
+        assert m.call_count == 2
+        assert m.last_request.qs == {'updated_since': ['2022-12-01']}
+
+
+def test_database_feeds_snapshot(fixture_recipes):
+    with patch.object(DealerRecipes, 'get_request', return_value=fixture_recipes) as mock_get:
+        snapshot = RecipeSnapshot(LocalRecipeDatabase(DealerRecipes(), clock=FakeClock()))
+        assert [r['id'] for r in snapshot.filter_by_ingredients([Name('salt')], [], [])] == [2, 3]
+        mock_get.assert_called_once_with('/recipes/')
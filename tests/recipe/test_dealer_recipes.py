@@ -1,9 +1,13 @@
-from unittest.mock import patch
+from unittest.mock import patch, call
 
 import pytest
+import requests
 import requests_mock
+from valid8 import ValidationError
 
-from recipe.domain import DealerRecipes, Username, Email, Password, Title, Description, Id, Name
+from recipe.domain import DealerRecipes, Username, Email, Password, Title, Description, Id, Name, ResponseCache
+from recipe.domain import RecipePage, RecipePager
+from tests.recipe.helpers import CookieServer
 
 
 @pytest.fixture
@@ -391,3 +395,329 @@ def test_sign_up_wrong(username, email, password1, password2, result):
         my_dealer = DealerRecipes()
         m.post(f'http://localhost:8000/api/v1/auth/registration/', json={'email': 'email not valid'}, status_code=400)
         assert my_dealer.sign_up(username, email, password1, password2) == result
+
+
+def test_dealer_reuses_the_same_session():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        m.get('http://localhost:8000/api/v1/recipes/sort-by-title/', json=[])
+        with patch('requests.Session.close') as mock_close:
+            my_dealer.show_all_recipes()
+            session = my_dealer._session()
+            my_dealer.sort_by_title()
+            assert my_dealer._session() is session
+            mock_close.assert_not_called()
+
+
+def test_dealer_session_is_configured_from_fields():
+    my_dealer = DealerRecipes(pool_size=4, max_retries=3, backoff_factor=0.5, timeout=2.5)
+    adapter = my_dealer._session().get_adapter('http://localhost:8000/api/v1/recipes/')
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.backoff_factor == 0.5
+    my_dealer.close()
+
+
+def test_dealer_passes_timeout_to_every_request():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes(timeout=3.0)
+        m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        my_dealer.show_all_recipes()
+        assert m.last_request.timeout == 3.0
+
+
+def test_dealer_close_releases_the_session():
+    my_dealer = DealerRecipes()
+    session = my_dealer._session()
+    with patch.object(session, 'close') as mock_close:
+        my_dealer.close()
+        mock_close.assert_called_once()
+    assert my_dealer._session() is not session
+    my_dealer.close()
+
+
+def test_dealer_as_context_manager():
+    with patch.object(DealerRecipes, 'close') as mock_close:
+        with DealerRecipes() as my_dealer:
+            assert isinstance(my_dealer, DealerRecipes)
+        mock_close.assert_called_once()
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'pool_size': 0},
+    {'max_retries': -1},
+    {'backoff_factor': -0.1},
+    {'timeout': 0.0}
+])
+def test_dealer_wrong_connection_settings(kwargs):
+    with pytest.raises(ValidationError):
+        DealerRecipes(**kwargs)
+
+
+@pytest.mark.parametrize('api_server', ['localhost:8000', 'http://local host', 'http://localhost/api/'])
+def test_dealer_wrong_api_server(api_server):
+    with pytest.raises(ValidationError):
+        DealerRecipes(api_server=api_server)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_serves_repeated_reads_without_network():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json=[{'id': 1}])
+        assert my_dealer.show_all_recipes() == [{'id': 1}]
+        assert my_dealer.show_all_recipes() == [{'id': 1}]
+        assert adapter.call_count == 1
+        assert my_dealer.cache.stats()['hits'] == 1
+        assert my_dealer.cache.stats()['misses'] == 1
+
+
+def test_cache_returns_independent_copies():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        m.get('http://localhost:8000/api/v1/recipes/1/', json={'id': 1, 'title': 'title'})
+        first = my_dealer.show_specific_recipe(Id(1))
+        first['title'] = 'changed'
+        assert my_dealer.show_specific_recipe(Id(1))['title'] == 'title'
+
+
+def test_cache_is_keyed_on_auth_identity():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        adapter = m.get('http://localhost:8000/api/v1/personal-area/sort-by-title/',
+                        [{'json': [{'id': 1}]}, {'json': [{'id': 2}]}])
+        assert my_dealer.sort_my_recipes_by_title('key1') == [{'id': 1}]
+        assert my_dealer.sort_my_recipes_by_title('key2') == [{'id': 2}]
+        assert my_dealer.sort_my_recipes_by_title('key1') == [{'id': 1}]
+        assert adapter.call_count == 2
+
+
+def test_cache_does_not_store_errors():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json={'detail': 'testing'}, status_code=500)
+        my_dealer.show_all_recipes()
+        my_dealer.show_all_recipes()
+        assert adapter.call_count == 2
+        assert len(my_dealer.cache) == 0
+
+
+def test_cache_entries_expire_after_ttl():
+    clock = FakeClock()
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes(cache=ResponseCache(ttl=5.0, clock=clock))
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        my_dealer.show_all_recipes()
+        clock.now = 4.9
+        my_dealer.show_all_recipes()
+        clock.now = 5.0
+        my_dealer.show_all_recipes()
+        assert adapter.call_count == 2
+
+
+def test_cache_evicts_least_recently_used():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes(cache=ResponseCache(max_entries=2))
+        recipes = m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        by_title = m.get('http://localhost:8000/api/v1/recipes/sort-by-title/', json=[])
+        m.get('http://localhost:8000/api/v1/recipes/sort-by-date/', json=[])
+        my_dealer.show_all_recipes()
+        my_dealer.sort_by_title()
+        my_dealer.show_all_recipes()
+        my_dealer.sort_by_date()
+        my_dealer.show_all_recipes()
+        my_dealer.sort_by_title()
+        assert recipes.call_count == 1
+        assert by_title.call_count == 2
+        assert my_dealer.cache.stats()['evictions'] == 2
+
+
+def test_cache_revalidates_with_etag():
+    clock = FakeClock()
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes(cache=ResponseCache(ttl=1.0, clock=clock))
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', [
+            {'json': [{'id': 1}], 'headers': {'ETag': '"v1"'}},
+            {'status_code': 304},
+        ])
+        assert my_dealer.show_all_recipes() == [{'id': 1}]
+        clock.now = 2.0
+        assert my_dealer.show_all_recipes() == [{'id': 1}]
+        assert adapter.call_count == 2
+        assert adapter.last_request.headers['If-None-Match'] == '"v1"'
+        assert my_dealer.cache.stats()['revalidated'] == 1
+        clock.now = 2.5
+        assert my_dealer.show_all_recipes() == [{'id': 1}]
+        assert adapter.call_count == 2
+
+
+@pytest.mark.parametrize('write', [
+    lambda dealer: dealer.add_new_recipe('key', Title('title'), Description('description'), []),
+    lambda dealer: dealer.delete_recipe('key', Id(1)),
+    lambda dealer: dealer.update_my_recipe('key', Id(1), {}),
+    lambda dealer: dealer.logout('key'),
+])
+def test_cache_is_invalidated_by_writes(write):
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes()
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        m.post('http://localhost:8000/api/v1/personal-area/', json={})
+        m.delete(f'http://localhost:8000/api/v1/personal-area/{Id(1)}/', status_code=204)
+        m.put('http://localhost:8000/api/v1/personal-area/1/', json={})
+        m.post('http://localhost:8000/api/v1/auth/logout/', status_code=200)
+        my_dealer.show_all_recipes()
+        write(my_dealer)
+        my_dealer.show_all_recipes()
+        assert adapter.call_count == 2
+        assert my_dealer.cache.stats()['invalidations'] == 1
+
+
+def test_dealer_without_cache():
+    with requests_mock.Mocker() as m:
+        my_dealer = DealerRecipes(cache=None)
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json=[])
+        my_dealer.show_all_recipes()
+        my_dealer.show_all_recipes()
+        assert adapter.call_count == 2
+
+
+def test_cache_key_hides_token():
+    view, identity = ResponseCache.key('/recipes/', {'Authorization': 'Token secret'})
+    assert view == '/recipes/'
+    assert 'secret' not in identity
+    assert ResponseCache.key('/recipes/', {}) == ('/recipes/', '')
+
+
+def test_show_recipes_page_paginated_server():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/?limit=2&offset=2',
+              json={'count': 5, 'next': 'next', 'previous': 'previous', 'results': [{'id': 3}, {'id': 4}]})
+        page = DealerRecipes().show_recipes_page(2, page_size=2)
+        assert page == RecipePage([{'id': 3}, {'id': 4}], 2, 2, 5, True)
+        assert page.has_previous
+        assert page.pages == 3
+        assert m.last_request.qs == {'limit': ['2'], 'offset': ['2']}
+
+
+def test_show_recipes_page_unpaginated_server():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/sort-by-title/', json=[{'id': i} for i in range(1, 6)])
+        my_dealer = DealerRecipes()
+        last = my_dealer.show_recipes_page(3, page_size=2, view='/recipes/sort-by-title/')
+        assert last == RecipePage([{'id': 5}], 3, 2, 5, False)
+        assert not RecipePage([], 1, 2, None, False).has_previous
+        assert RecipePage([], 1, 2, None, False).pages is None
+
+
+def test_show_recipes_page_unpaginated_server_is_downloaded_once():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/', json=[{'id': i} for i in range(1, 8)])
+        my_dealer = DealerRecipes()
+        pages = [my_dealer.show_recipes_page(number, page_size=3) for number in (1, 2, 3, 2)]
+        assert [[r['id'] for r in page.items] for page in pages] == [[1, 2, 3], [4, 5, 6], [7], [4, 5, 6]]
+        assert m.call_count == 2
+        assert m.last_request.qs == {}
+
+
+def test_show_recipes_page_error():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/', json={'detail': 'testing'}, status_code=500)
+        assert DealerRecipes().show_recipes_page(1) == {'detail': 'testing'}
+    with pytest.raises(ValidationError):
+        DealerRecipes().show_recipes_page(0)
+
+
+def test_pager_prefetches_next_page():
+    with requests_mock.Mocker() as m:
+        adapter = m.get('http://localhost:8000/api/v1/recipes/', json=[{'id': i} for i in range(1, 6)])
+        my_dealer = DealerRecipes(cache=None)
+        with patch.object(DealerRecipes, 'show_recipes_page', wraps=my_dealer.show_recipes_page) as mock_page:
+            with RecipePager(my_dealer, page_size=2) as pager:
+                assert pager.page(1).items == [{'id': 1}, {'id': 2}]
+                assert pager.page(2).items == [{'id': 3}, {'id': 4}]
+                assert pager.page(3).items == [{'id': 5}]
+                assert pager.page(2).items == [{'id': 3}, {'id': 4}]
+            assert mock_page.mock_calls == [call(1, 2, '/recipes/'), call(2, 2, '/recipes/'), call(3, 2, '/recipes/')]
+        assert adapter.call_count == 3
+
+
+def test_pager_keeps_only_neighbour_pages():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/', json=[{'id': i} for i in range(1, 11)])
+        my_dealer = DealerRecipes()
+        with patch.object(DealerRecipes, 'show_recipes_page', wraps=my_dealer.show_recipes_page) as mock_page:
+            with RecipePager(my_dealer, page_size=2) as pager:
+                pager.page(1)
+                pager.page(5)
+                pager.page(1)
+            assert [c.args[0] for c in mock_page.mock_calls].count(1) == 2
+
+
+def test_pager_does_not_keep_errors():
+    with patch.object(DealerRecipes, 'show_recipes_page', side_effect=[{'detail': 'testing'}, {'detail': 'again'}]):
+        with RecipePager(DealerRecipes()) as pager:
+            assert pager.page(1) == {'detail': 'testing'}
+            assert pager.page(1) == {'detail': 'again'}
+
+
+def test_role_is_cached_until_logout():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/personal-area/account-type/', json={'type-account': 2})
+        m.post('http://localhost:8000/api/v1/auth/logout/', status_code=200)
+        dealer = DealerRecipes(cache=None)
+        assert dealer.what_is_my_role('key1') == 'You are logged as moderator'
+        assert dealer.what_is_my_role('key1') == 'You are logged as moderator'
+        assert m.call_count == 1
+        dealer.what_is_my_role('key2')
+        assert m.call_count == 2
+        dealer.logout('key1')
+        dealer.what_is_my_role('key1')
+        dealer.what_is_my_role('key2')
+        assert m.call_count == 4
+
+
+@pytest.mark.parametrize('status_code', [401, 403])
+def test_role_is_forgotten_when_the_token_is_rejected(status_code):
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/personal-area/account-type/',
+              [{'json': {'type-account': 1}}, {'json': {'detail': 'Invalid token.'}, 'status_code': 401}])
+        m.get('http://localhost:8000/api/v1/personal-area/sort-by-title/',
+              json={'detail': 'Invalid token.'}, status_code=status_code)
+        dealer = DealerRecipes(cache=None)
+        assert dealer.what_is_my_role('key1') == 'You are logged as admin'
+        assert dealer.sort_my_recipes_by_title('key1') == {'detail': 'Invalid token.'}
+        assert dealer.what_is_my_role('key1') == 'Invalid token.'
+        assert dealer.what_is_my_role('key1') == 'Invalid token.'
+        assert m.call_count == 4
+
+
+def test_role_errors_are_not_cached():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/personal-area/account-type/',
+              [{'json': {'detail': 'Invalid token.'}}, {'json': {'type-account': 0}}])
+        dealer = DealerRecipes(cache=None)
+        assert dealer.what_is_my_role('key1') == 'Invalid token.'
+        assert dealer.what_is_my_role('key1') == 'You are logged as normal user'
+
+
+def test_get_request_reports_non_json_body_as_request_exception():
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/', status_code=502, text='<html>Bad Gateway</html>')
+        with pytest.raises(requests.RequestException):
+            DealerRecipes().get_request('/recipes/')
+
+
+def test_session_does_not_keep_cookies():
+    with CookieServer() as server, DealerRecipes(api_server=server.api_server, cache=None) as dealer:
+        assert dealer.login(Username('alice'), Password('password1')) == 'tok-alice'
+        dealer.show_all_recipes()
+        dealer.sort_my_recipes_by_title('tok-alice')
+    assert [cookie for _, _, _, cookie in server.seen] == [None, None, None]
@@ -1,12 +1,21 @@
+import io
+import json
+import threading
+import time
 from datetime import date
 from unittest import mock
 from unittest.mock import patch
 
 from recipe.domain import Recipe, Description, Title, Name, Quantity, Unit, Ingredient, Password, Username, Email, Id
-from recipe.domain import JsonHandler
+from recipe.domain import JsonHandler, DealerRecipes, RecipeSnapshot, IngredientIndex, RecipeRenderer, RecipeStore
+from recipe.domain import MappedRecipeStore, TitleSearchIndex, QuantityEngine, IngredientTotal, ShoppingList, Rounding
 import pytest
+import requests
+import requests_mock
 from valid8 import ValidationError
 
+from tests.recipe.helpers import json_recipe
+
 
 def test_new_name():
     wrong_values = ['new!name', 'new_name', 'newname' * 20]
@@ -84,6 +93,211 @@ def test_new_recipe():
     assert new_recipe.updated_at == date.today()
 
 
+def new_builder():
+    return Recipe.Builder(Id(1), Title('title'), Username('username'), Description('description1'), date.today(),
+                          date.today())
+
+
+def new_ingredient(name, quantity, unit):
+    return Ingredient(Name(name), Quantity(quantity), Unit(unit))
+
+
+def test_with_ingredients_adds_in_order():
+    ingredients = [new_ingredient(f'ingredient {chr(97 + i % 26)}{chr(97 + i // 26)}', i + 1, 'g') for i in range(300)]
+    recipe = new_builder().with_ingredient(new_ingredient('salt', 1, 'g')).with_ingredients(ingredients).build()
+    assert recipe.ingredients == (new_ingredient('salt', 1, 'g'), *ingredients)
+
+
+def test_with_ingredients_rejects_duplicates():
+    builder = new_builder().with_ingredient(new_ingredient('salt', 1, 'g'))
+    with pytest.raises(ValidationError):
+        builder.with_ingredients([new_ingredient('sugar', 1, 'g'), new_ingredient('sugar', 2, 'g')])
+    with pytest.raises(ValidationError):
+        builder.with_ingredients([new_ingredient('salt', 2, 'g')])
+    with pytest.raises(TypeError):
+        builder.with_ingredients(['sugar'])
+    assert builder.build().ingredients == (new_ingredient('salt', 1, 'g'),)
+
+
+@pytest.mark.parametrize('ingredients, expected', [
+    ([('flour', 200, 'g'), ('flour', 300, 'g')], ('flour', 500, 'g')),
+    ([('flour', 500, 'g'), ('flour', 500, 'g')], ('flour', 1, 'kg')),
+    ([('flour', 750, 'g'), ('flour', 250, 'g')], ('flour', 1, 'kg')),
+    ([('flour', 2, 'kg'), ('flour', 1, 'kg')], ('flour', 3, 'kg')),
+    ([('milk', 1, 'l'), ('milk', 50, 'cl')], ('milk', 150, 'cl')),
+    ([('milk', 20, 'cl'), ('milk', 300, 'ml')], ('milk', 50, 'cl')),
+    ([('eggs', 2, 'n/a'), ('eggs', 1, 'n/a')], ('eggs', 3, 'n/a')),
+])
+def test_with_ingredients_merges_compatible_units(ingredients, expected):
+    recipe = new_builder().with_ingredients([new_ingredient(*i) for i in ingredients], merge=True).build()
+    assert recipe.ingredients == (new_ingredient(*expected),)
+
+
+@pytest.mark.parametrize('ingredients', [
+    [('flour', 200, 'g'), ('flour', 1, 'l')],
+    [('flour', 1, 'cup'), ('flour', 100, 'g')],
+    [('flour', 999, 'g'), ('flour', 2, 'g')],
+    [('flour', 1, 'kg'), ('flour', 250, 'g')],
+    [('milk', 1, 'l'), ('milk', 50, 'cl'), ('milk', 5, 'ml')],
+    [('flour', 800, 'kg'), ('flour', 300, 'kg')],
+    [('eggs', 800, 'n/a'), ('eggs', 300, 'n/a')],
+])
+def test_with_ingredients_rejects_merges_without_a_single_unit(ingredients):
+    builder = new_builder().with_ingredient(new_ingredient('salt', 1, 'g'))
+    with pytest.raises(ValidationError):
+        builder.with_ingredients([new_ingredient(*i) for i in ingredients], merge=True)
+    assert builder.build().ingredients == (new_ingredient('salt', 1, 'g'),)
+
+
+def test_with_ingredients_merges_into_added_ingredients():
+    recipe = new_builder().with_ingredient(new_ingredient('flour', 1, 'kg')) \
+        .with_ingredient(new_ingredient('salt', 1, 'g')) \
+        .with_ingredients([new_ingredient('flour', 1, 'kg')], merge=True).build()
+    assert recipe.ingredients == (new_ingredient('flour', 2, 'kg'), new_ingredient('salt', 1, 'g'))
+
+
+@pytest.mark.parametrize('quantity, unit, expected', [
+    (2, 'kg', (2000, 'g')),
+    (250, 'g', (250, 'g')),
+    (3, 'l', (3000, 'ml')),
+    (25, 'cl', (250, 'ml')),
+    (1, 'cup', (1, 'cup')),
+    (4, 'n/a', (4, 'n/a')),
+])
+def test_quantity_engine_normalize(quantity, unit, expected):
+    assert QuantityEngine.normalize(Quantity(quantity), Unit(unit)) == expected
+
+
+@pytest.mark.parametrize('amount, base, expected', [
+    (2000, 'g', (2, 'kg')),
+    (999.6, 'g', (1, 'kg')),
+    (999, 'g', (999, 'g')),
+    (1004, 'g', (1, 'kg')),
+    (1500, 'ml', (150, 'cl')),
+    (1505, 'ml', (151, 'cl')),
+    (7.02, 'n/a', (7, 'n/a')),
+])
+def test_quantity_engine_express(amount, base, expected):
+    assert QuantityEngine.express(amount, base) == (Quantity(expected[0]), Unit(expected[1]))
+
+
+@pytest.mark.parametrize('amount, base', [(2000, 'cup'), (1, 'kg'), (2000000, 'g'), (1250, 'g'), (1500, 'g'),
+                                          (0.2, 'g'), (7.5, 'n/a'), (0, 'ml')])
+def test_quantity_engine_express_wrong(amount, base):
+    with pytest.raises(ValidationError):
+        QuantityEngine.express(amount, base)
+
+
+def test_quantity_engine_scale():
+    recipe = new_builder().with_ingredients([new_ingredient('flour', 250, 'g'), new_ingredient('milk', 1, 'l'),
+                                             new_ingredient('eggs', 4, 'n/a')]).build()
+    scaled = QuantityEngine().scale(recipe, 1.5)
+    assert scaled.recipe.title == recipe.title and scaled.recipe.id == recipe.id
+    assert scaled.recipe.ingredients == (new_ingredient('flour', 375, 'g'), new_ingredient('milk', 150, 'cl'),
+                                         new_ingredient('eggs', 6, 'n/a'))
+    assert scaled.rounded == ()
+    with pytest.raises(ValidationError):
+        QuantityEngine().scale(recipe, 0)
+    with pytest.raises(ValidationError):
+        QuantityEngine().scale(recipe, 5000)
+
+
+@pytest.mark.parametrize('factor, expected, rounded', [
+    (0.5, [('eggs', 1, 'n/a'), ('flour', 100, 'g'), ('milk', 2, 'cup')], [Rounding('milk', 1.5, 2, 'cup')]),
+    (0.75, [('eggs', 2, 'n/a'), ('flour', 150, 'g'), ('milk', 2, 'cup')],
+     [Rounding('eggs', 1.5, 2, 'n/a'), Rounding('milk', 2.25, 2, 'cup')]),
+    (1.5, [('eggs', 3, 'n/a'), ('flour', 300, 'g'), ('milk', 5, 'cup')], [Rounding('milk', 4.5, 5, 'cup')]),
+])
+def test_quantity_engine_scale_rounds_counted_units(factor, expected, rounded):
+    recipe = new_builder().with_ingredients([new_ingredient('eggs', 2, 'n/a'), new_ingredient('flour', 200, 'g'),
+                                             new_ingredient('milk', 3, 'cup')]).build()
+    scaled = QuantityEngine().scale(recipe, factor)
+    assert [(i.name.value, i.quantity.value, i.unit.value) for i in scaled.recipe.ingredients] == expected
+    assert list(scaled.rounded) == rounded
+
+
+def test_quantity_engine_scale_refuses_too_large_quantities():
+    recipe = new_builder().with_ingredients([new_ingredient('flour', 250, 'g')]).build()
+    assert str(QuantityEngine().scale(recipe, 0.001).rounded[0]) == 'flour from 0.25 g to 1 g'
+    with pytest.raises(ValidationError):
+        QuantityEngine().scale(recipe, 5000)
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_quantity_engine_aggregate(vectorized):
+    recipe = new_builder().with_ingredients([new_ingredient('flour', 1, 'kg'), new_ingredient('eggs', 2, 'n/a')]) \
+        .build()
+    data = {'ingredients': [{'name': 'flour', 'quantity': 500, 'unit': 'g'},
+                            {'name': 'milk', 'quantity': 25, 'unit': 'cl'},
+                            {'name': 'milk', 'quantity': 1, 'unit': 'cup'}]}
+    totals = QuantityEngine(vectorized).aggregate([recipe, data, data])
+    assert totals == [IngredientTotal('eggs', 2, 'n/a'), IngredientTotal('flour', 2000, 'g'),
+                      IngredientTotal('milk', 2, 'cup'), IngredientTotal('milk', 500, 'ml')]
+    assert [total.format() for total in totals] == ['eggs: 2 n/a', 'flour: 2 kg', 'milk: 2 cup', 'milk: 50 cl']
+    assert QuantityEngine(vectorized).aggregate([]) == []
+
+
+def test_quantity_engine_totals_paths_agree():
+    names = [f'name {chr(97 + i % 7)}' for i in range(1000)]
+    quantities = [i % 1000 + 1 for i in range(1000)]
+    units = [('g', 'kg', 'ml', 'cl', 'l', 'cup', 'n/a')[i % 5 + i % 3] for i in range(1000)]
+    assert QuantityEngine(True).totals(names, quantities, units) == \
+        QuantityEngine(False).totals(names, quantities, units)
+    with patch('recipe.domain.numpy', None):
+        assert QuantityEngine(True).totals(names, quantities, units) == \
+            QuantityEngine(False).totals(names, quantities, units)
+    with pytest.raises(ValidationError):
+        QuantityEngine().totals(['flour'], [1], ['lb'])
+    with pytest.raises(ValidationError):
+        QuantityEngine().totals(['flour'], [1, 2], ['g'])
+
+
+class SlowDealer:
+    def __init__(self, recipes, delays):
+        self.recipes, self.delays = recipes, delays
+        self.lock = threading.Lock()
+        self.in_flight = self.most_in_flight = 0
+
+    def show_specific_recipe(self, index):
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(self.delays.get(index.id, 0.01))
+        with self.lock:
+            self.in_flight -= 1
+        recipe = self.recipes.get(index.id)
+        if recipe is None:
+            raise requests.ConnectionError('The server is down.')
+        return recipe
+
+
+def test_shopping_list_fetches_concurrently_and_streams():
+    recipes = {i: json_recipe(i, ingredients=[('flour', 100, 'g'), ('milk', 10, 'cl')]) for i in range(1, 21)}
+    recipes[1] = json_recipe(1, ingredients=[('flour', 1, 'kg')])
+    dealer = SlowDealer(recipes, {1: 0.2})
+    shopping_list = ShoppingList(dealer, concurrency=4)
+    arrived = [index for index, _ in shopping_list.fetch(range(1, 21))]
+    assert sorted(arrived) == list(range(1, 21))
+    assert arrived[-1] == 1
+    assert dealer.most_in_flight == 4
+    assert shopping_list.totals() == [IngredientTotal('flour', 2900, 'g'), IngredientTotal('milk', 1900, 'ml')]
+
+
+def test_shopping_list_accepts_filter_results_and_reports_errors():
+    dealer = SlowDealer({2: json_recipe(2, 'crepes', ingredients=[('eggs', 2, 'n/a')]),
+                         3: {'detail': 'Not found.'}}, {})
+    shopping_list = ShoppingList(dealer)
+    results = dict(shopping_list.fetch([json_recipe(1, 'pancakes', ingredients=[('eggs', 1, 'n/a')]), {'id': 2}, Id(3), 4]))
+    assert results[1]['title'] == 'pancakes' and results[2]['title'] == 'crepes'
+    assert results[3] == {'detail': 'Not found.'}
+    assert results[4] == {'detail': 'The server is down.'}
+    assert shopping_list.totals() == [IngredientTotal('eggs', 3, 'n/a')]
+    with pytest.raises(ValidationError):
+        shopping_list.add(json_recipe(5, ingredients=[('eggs', 1, 'dozen')]))
+    with pytest.raises(ValidationError):
+        ShoppingList(dealer, concurrency=0)
+
+
 @pytest.mark.parametrize('name, quantity, unit', [
     ('water', 1, 'l'),
     ('water', 10, 'kg')
@@ -202,6 +416,402 @@ def test_print_recipe(mock_print):
                                 date.today()).with_ingredient(Ingredient(Name('name'), Quantity(10),
                                                                          Unit('n/a'))).build()
     new_recipe.print()
-    mock_print.assert_any_call('title')
-    mock_print.assert_any_call('Description: description1')
-    mock_print.assert_any_call('Author: username')
+    mock_print.assert_called_once()
+    lines = mock_print.call_args.args[0].split('\n')
+    assert 'title' in lines
+    assert 'Description: description1' in lines
+    assert 'Author: username' in lines
+    assert '\t-name: 10 n/a' in lines
+
+
+@pytest.fixture
+def fixture_snapshot_recipes():
+    return [
+        json_recipe(1, 'pancakes', 'alice', '2022-10-01', ['eggs', 'flour', 'milk']),
+        json_recipe(2, 'Omelette', 'bobby', '2022-12-01', ['eggs', 'salt']),
+        json_recipe(3, 'bread', 'Alice', '2022-11-01', ['flour', 'water', 'salt']),
+    ]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_snapshot_sorts_locally(fixture_snapshot_recipes):
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value=fixture_snapshot_recipes) as mock_all:
+        snapshot = RecipeSnapshot(DealerRecipes())
+        assert [r['id'] for r in snapshot.sort_by_title()] == [3, 2, 1]
+        assert [r['id'] for r in snapshot.sort_by_date()] == [2, 3, 1]
+        assert [r['id'] for r in snapshot.show_all_recipes()] == [1, 2, 3]
+        mock_all.assert_called_once()
+
+
+def test_snapshot_filters_with_indexes(fixture_snapshot_recipes):
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value=fixture_snapshot_recipes) as mock_all:
+        snapshot = RecipeSnapshot(DealerRecipes())
+        assert [r['id'] for r in snapshot.filter_by_author(Username('alice'))] == [1, 3]
+        assert [r['id'] for r in snapshot.filter_by_title(Title('omelette'))] == [2]
+        assert [r['id'] for r in snapshot.filter_by_ingredient(Name('Salt'))] == [2, 3]
+        assert snapshot.filter_by_ingredient(Name('sugar')) == []
+        mock_all.assert_called_once()
+
+
+def test_snapshot_refresh_policy(fixture_snapshot_recipes):
+    clock = FakeClock()
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value=fixture_snapshot_recipes) as mock_all:
+        snapshot = RecipeSnapshot(DealerRecipes(), max_age=10.0, clock=clock)
+        assert not snapshot.is_fresh()
+        snapshot.sort_by_title()
+        assert snapshot.is_fresh()
+        clock.now = 9.0
+        snapshot.sort_by_date()
+        assert mock_all.call_count == 1
+        clock.now = 10.0
+        snapshot.sort_by_date()
+        assert mock_all.call_count == 2
+        snapshot.invalidate()
+        assert not snapshot.is_fresh()
+        snapshot.sort_by_date()
+        assert mock_all.call_count == 3
+
+
+def test_snapshot_returns_server_errors():
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value={'detail': 'testing'}):
+        snapshot = RecipeSnapshot(DealerRecipes())
+        assert snapshot.sort_by_title() == {'detail': 'testing'}
+        assert not snapshot.is_fresh()
+
+
+def parsed_recipe(_id: int, ingredients: list) -> Recipe:
+    return JsonHandler.create_recipe_from_json(json_recipe(_id, 'title', 'author', '2022-10-01', ingredients))
+
+
+def test_ingredient_index_queries():
+    index = IngredientIndex.from_recipes([
+        parsed_recipe(10, ['eggs', 'flour', 'milk']),
+        parsed_recipe(20, ['eggs', 'salt']),
+        parsed_recipe(30, ['flour', 'water', 'salt']),
+    ])
+    assert len(index) == 3
+    assert index.query(all_of=[Name('eggs'), Name('flour')]) == [10]
+    assert index.query(any_of=[Name('milk'), Name('water')]) == [10, 30]
+    assert index.query(none_of=[Name('eggs')]) == [30]
+    assert index.query(all_of=[Name('Salt')], none_of=[Name('water')]) == [20]
+    assert index.query(all_of=[Name('sugar')]) == []
+    assert index.query() == [10, 20, 30]
+
+
+def test_ingredient_index_replaces_recipe_on_add():
+    index = IngredientIndex()
+    index.add(1, ['eggs'])
+    index.add(2, ['eggs', 'milk'])
+    index.add(1, ['milk'])
+    assert len(index) == 2
+    assert index.query(all_of=[Name('eggs')]) == [2]
+    assert index.query(all_of=[Name('milk')]) == [1, 2]
+
+
+def test_ingredient_index_over_many_positions():
+    index = IngredientIndex()
+    for i in range(1000):
+        index.add(i, ['salt'] if i % 7 == 0 else ['sugar'])
+    assert index.query(all_of=[Name('salt')]) == list(range(0, 1000, 7))
+
+
+def test_snapshot_filters_by_many_ingredients(fixture_snapshot_recipes):
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value=fixture_snapshot_recipes):
+        snapshot = RecipeSnapshot(DealerRecipes())
+        result = snapshot.filter_by_ingredients(all_of=[Name('flour')], none_of=[Name('milk')])
+        assert [r['id'] for r in result] == [3]
+        with pytest.raises(ValidationError):
+            snapshot.filter_by_ingredients()
+
+
+def chunked(data: bytes, size: int) -> list:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 4096])
+def test_iter_json_array_in_chunks(size):
+    data = [{'id': i, 'title': 'crème brûlée' * i} for i in range(20)] + [1, 2.5, -3e10, 'x', None, True, [1, [2]], {}]
+    encoded = json.dumps(data, ensure_ascii=False).encode()
+    assert list(JsonHandler.iter_json(chunked(encoded, size))) == data
+
+
+@pytest.mark.parametrize('chunks, result', [
+    ([b' [ ', b' ] '], []),
+    ([b'{"detail":', b' "x"}'], [{'detail': 'x'}]),
+    ([b'[12', b'34]'], [1234]),
+])
+def test_iter_json_edge_cases(chunks, result):
+    assert list(JsonHandler.iter_json(chunks)) == result
+
+
+@pytest.mark.parametrize('chunks', [[b'[1 2]'], [b'[1,'], [b''], [b'[1,]']])
+def test_iter_json_malformed(chunks):
+    with pytest.raises(json.JSONDecodeError):
+        list(JsonHandler.iter_json(chunks))
+
+
+def test_iter_json_is_lazy():
+    def chunks():
+        yield b'[{"id": 1}, '
+        raise AssertionError('the second chunk must not be read before the first item is consumed')
+
+    assert next(JsonHandler.iter_json(chunks())) == {'id': 1}
+
+
+def test_create_recipes_from_stream(fixture_snapshot_recipes):
+    recipes = JsonHandler.create_recipes_from_stream(iter(fixture_snapshot_recipes))
+    assert [r.id.id for r in recipes] == [1, 2, 3]
+    with pytest.raises(ValueError, match='testing'):
+        list(JsonHandler.create_recipes_from_stream([{'detail': 'testing'}]))
+
+
+def test_stream_all_recipes(fixture_snapshot_recipes):
+    with requests_mock.Mocker() as m:
+        m.get('http://localhost:8000/api/v1/recipes/', json=fixture_snapshot_recipes)
+        stream = DealerRecipes().stream_all_recipes()
+        assert [r['id'] for r in stream] == [1, 2, 3]
+        assert m.last_request.timeout == 10.0
+
+
+def test_create_recipes_from_json_matches_single_path(fixture_snapshot_recipes):
+    items = fixture_snapshot_recipes + [dict(fixture_snapshot_recipes[0], id=4, updated_at='2022-12-02')]
+    recipes = JsonHandler.create_recipes_from_json(items)
+    expected = [JsonHandler.create_recipe_from_json(item) for item in items]
+    assert recipes == expected
+    assert [r.ingredients for r in recipes] == [r.ingredients for r in expected]
+    assert [r.updated_at for r in recipes] == [None, None, None, date(2022, 12, 2)]
+
+
+@pytest.mark.parametrize('change, error', [
+    ({'title': 'title!'}, ValidationError),
+    ({'title': 1}, TypeError),
+    ({'author': 'bob'}, ValidationError),
+    ({'id': -1}, ValidationError),
+    ({'created_at': '2022/12/01'}, ValueError),
+    ({'ingredients': []}, ValidationError),
+    ({'ingredients': [{'name': 'salt', 'quantity': 0, 'unit': 'g'}]}, ValidationError),
+    ({'ingredients': [{'name': 'salt', 'quantity': '1', 'unit': 'g'}]}, TypeError),
+    ({'ingredients': [{'name': 'salt', 'quantity': 1, 'unit': 'grams'}]}, ValidationError),
+    ({'ingredients': [{'name': 'salt', 'quantity': 1, 'unit': 'g'}, {'name': 'salt', 'quantity': 2, 'unit': 'g'}]},
+     ValidationError),
+    ({'ingredients': {'name': 'salt', 'quantity': 1, 'unit': 'g'}}, TypeError),
+])
+def test_create_recipes_from_json_rejects_like_single_path(fixture_snapshot_recipes, change, error):
+    wrong = dict(fixture_snapshot_recipes[0], **change)
+    with pytest.raises(error) as single_error:
+        JsonHandler.create_recipe_from_json(wrong)
+    with pytest.raises(error) as batch_error:
+        JsonHandler.create_recipes_from_json([fixture_snapshot_recipes[1], wrong])
+    assert str(batch_error.value) == str(single_error.value)
+
+
+def test_create_recipes_from_json_missing_key(fixture_snapshot_recipes):
+    wrong = dict(fixture_snapshot_recipes[0])
+    del wrong['title']
+    with pytest.raises(KeyError):
+        JsonHandler.create_recipes_from_json([wrong])
+
+
+def test_renderer_writes_once_per_batch(fixture_snapshot_recipes):
+    recipes = JsonHandler.create_recipes_from_json(fixture_snapshot_recipes)
+    stream = mock.Mock()
+    RecipeRenderer(stream=stream).render(recipes)
+    stream.write.assert_called_once_with(''.join(recipe.format() for recipe in recipes))
+    stream.flush.assert_called_once()
+
+
+def test_renderer_table(fixture_snapshot_recipes):
+    recipes = JsonHandler.create_recipes_from_json(fixture_snapshot_recipes[:2])
+    stream = io.StringIO()
+    RecipeRenderer(table=True, stream=stream).render(recipes)
+    assert stream.getvalue().split('\n') == [
+        'Id | Title    | Author | Created_at | Updated_at | Ingredients',
+        '-- | -------- | ------ | ---------- | ---------- | ' + '-' * 38,
+        '1  | pancakes | alice  | 2022-10-01 |            | eggs: 1 n/a, flour: 1 n/a, milk: 1 n/a',
+        '2  | Omelette | bobby  | 2022-12-01 |            | eggs: 1 n/a, salt: 1 n/a',
+        '',
+    ]
+
+
+@pytest.mark.parametrize('cls, value', [(Name, 'salt'), (Unit, 'g'), (Username, 'username'), (Title, 'title')])
+def test_value_objects_are_interned(cls, value):
+    assert cls(value) is cls(value)
+    assert cls(value=value) is cls(value)
+    assert not hasattr(cls(value), '__dict__')
+
+
+def test_interning_validates_once_per_value():
+    with patch('recipe.domain.validate') as mock_validate:
+        Name('interned once')
+        Name('interned once')
+        Name('interned once')
+        mock_validate.assert_called_once()
+
+
+def test_invalid_values_are_not_interned():
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            Unit('grams')
+        with pytest.raises(TypeError):
+            Title(1)
+
+
+def test_parsed_recipes_share_interned_values(fixture_snapshot_recipes):
+    first, second = JsonHandler.create_recipes_from_json(fixture_snapshot_recipes[:2])
+    assert first.ingredients[0].name is second.ingredients[0].name is Name('eggs')
+    assert first.ingredients[0].unit is Unit('n/a')
+    single = JsonHandler.create_recipe_from_json(fixture_snapshot_recipes[0])
+    assert single.author is first.author
+
+
+@pytest.fixture
+def fixture_store_recipes(fixture_snapshot_recipes):
+    recipes = fixture_snapshot_recipes + [
+        dict(json_recipe(4, 'bread', 'carol', '2022-11-01', ['flour', 'yeast']), updated_at='2022-12-24'),
+    ]
+    return JsonHandler.create_recipes_from_json(recipes)
+
+
+def test_store_materializes_equal_recipes(fixture_store_recipes):
+    store = RecipeStore.from_recipes(fixture_store_recipes)
+    assert len(store) == 4
+    assert list(store.recipes(range(len(store)))) == fixture_store_recipes
+    assert [r.ingredients for r in store.recipes(range(4))] == [r.ingredients for r in fixture_store_recipes]
+    assert store.get(Id(4)).updated_at == date(2022, 12, 24)
+    assert store.get(Id(5)) is None
+    with pytest.raises(ValidationError):
+        store.add(fixture_store_recipes[0])
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_store_rows_count_from_the_end_and_are_bounded(fixture_store_recipes, tmp_path, mapped):
+    store = RecipeStore.from_recipes(fixture_store_recipes)
+    if mapped:
+        store.save(str(tmp_path / 'catalog.bin'))
+        store = MappedRecipeStore(str(tmp_path / 'catalog.bin'))
+    assert store[-1] == store[3] == fixture_store_recipes[3]
+    assert store[-4] == fixture_store_recipes[0]
+    for row in (4, -5):
+        with pytest.raises(IndexError):
+            store[row]
+    assert list(store.recipes([-2])) == [fixture_store_recipes[2]]
+    if mapped:
+        store.close()
+
+
+def test_store_sorts_and_filters(fixture_store_recipes):
+    store = RecipeStore.from_recipes(fixture_store_recipes)
+    ids = lambda rows: [store[row].id.id for row in rows]
+    assert ids(store.sort_by_title()) == [2, 3, 4, 1]
+    assert ids(store.sort_by_date()) == [2, 4, 3, 1]
+    assert ids(store.filter_by_author(Username('alice'))) == [1]
+    assert ids(store.filter_by_title(Title('bread'))) == [3, 4]
+    assert ids(store.filter_by_ingredient(Name('flour'))) == [1, 3, 4]
+    assert store.filter_by_ingredient(Name('sugar')) == []
+
+
+def test_store_without_numpy(fixture_store_recipes):
+    with patch('recipe.domain.numpy', None):
+        test_store_sorts_and_filters(fixture_store_recipes)
+
+
+def test_store_with_numpy(fixture_store_recipes):
+    pytest.importorskip('numpy')
+    test_store_sorts_and_filters(fixture_store_recipes)
+
+
+def test_mapped_store_round_trips_json(fixture_store_recipes, fixture_snapshot_recipes, tmp_path):
+    items = fixture_snapshot_recipes + [
+        dict(json_recipe(4, 'bread', 'carol', '2022-11-01', ['flour', 'yeast']), updated_at='2022-12-24'),
+        dict(json_recipe(2000, 'creme brulee', 'carol', '2023-01-05', ['crème', 'sucre']),
+             description='À la française, très bon!'),
+    ]
+    path = str(tmp_path / 'catalog.bin')
+    RecipeStore.from_recipes(JsonHandler.create_recipes_from_json(items)).save(path)
+    with MappedRecipeStore(path) as mapped:
+        assert len(mapped) == len(items)
+        for row, item in enumerate(items):
+            assert mapped[row] == JsonHandler.create_recipe_from_json(item)
+            assert mapped[row].ingredients == JsonHandler.create_recipe_from_json(item).ingredients
+        assert mapped.get(Id(2000)).description.value == 'À la française, très bon!'
+        assert mapped.get(Id(4)).updated_at == date(2022, 12, 24)
+        assert mapped.get(Id(5)) is None
+        assert [r.id.id for r in mapped.recipes([2, 0])] == [3, 1]
+
+
+def test_mapped_store_of_empty_store(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    RecipeStore().save(path)
+    with MappedRecipeStore(path) as mapped:
+        assert len(mapped) == 0
+        assert mapped.get(Id(1)) is None
+
+
+def test_mapped_store_rejects_other_files(fixture_store_recipes, tmp_path):
+    path = tmp_path / 'catalog.bin'
+    path.write_bytes(b'[{"id": 1}]')
+    with pytest.raises(ValidationError):
+        MappedRecipeStore(str(path))
+    RecipeStore.from_recipes(fixture_store_recipes).save(str(path))
+    path.write_bytes(path.read_bytes()[:-10])
+    with pytest.raises(ValidationError):
+        MappedRecipeStore(str(path))
+
+
+@pytest.fixture
+def fixture_search_index():
+    index = TitleSearchIndex()
+    index.add(1, 'pancakes', 'soft pancakes with maple syrup')
+    index.add(2, 'Omelette', 'eggs and a pinch of salt')
+    index.add(3, 'bread', 'crusty bread, à la française')
+    index.add(4, 'pan fried eggs', 'quick breakfast')
+    return index
+
+
+def test_search_ranks_title_matches_first(fixture_search_index):
+    assert fixture_search_index.search('eggs') == [4, 2]
+    assert fixture_search_index.search('pan') == [4, 1]
+    assert fixture_search_index.search('fried eggs') == [4, 2]
+    assert fixture_search_index.search('française') == [3]
+    assert fixture_search_index.search('eggs', limit=1) == [4]
+    assert fixture_search_index.search('') == []
+
+
+def test_search_tolerates_typos(fixture_search_index):
+    assert fixture_search_index.search('pancaks') == [1]
+    assert fixture_search_index.search('omelete') == [2]
+    assert fixture_search_index.search('xyz') == []
+
+
+def test_search_completes_prefixes(fixture_search_index):
+    assert fixture_search_index.complete('pa') == ['pan', 'pancakes']
+    assert fixture_search_index.complete('BR') == ['bread', 'breakfast']
+    assert fixture_search_index.complete('b', limit=1) == ['bread']
+    assert fixture_search_index.complete('q') == ['quick']
+    with pytest.raises(ValidationError):
+        fixture_search_index.complete('b', limit=0)
+
+
+def test_search_replaces_readded_recipes(fixture_search_index):
+    fixture_search_index.add(1, 'waffles', 'crispy waffles')
+    assert len(fixture_search_index) == 4
+    assert fixture_search_index.search('pancakes') == []
+    assert fixture_search_index.search('waffles') == [1]
+    assert fixture_search_index.complete('pa') == ['pan']
+
+
+def test_snapshot_search(fixture_snapshot_recipes):
+    with patch.object(DealerRecipes, 'show_all_recipes', return_value=fixture_snapshot_recipes) as mock_all:
+        snapshot = RecipeSnapshot(DealerRecipes())
+        assert [r['id'] for r in snapshot.search('omlette')] == [2]
+        assert [r['id'] for r in snapshot.search('descr')] == [1, 2, 3]
+        with pytest.raises(ValidationError):
+            snapshot.search('')
+        mock_all.assert_called_once()
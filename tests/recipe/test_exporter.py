@@ -0,0 +1,73 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from valid8 import ValidationError
+
+from recipe.exporter import RecipeExporter, ExportReport
+from recipe.importer import read_records, validate_record
+from tests.recipe.helpers import json_recipe
+
+
+@pytest.fixture
+def fixture_recipes():
+    return [json_recipe(1, 'pancakes', ingredients=['eggs', 'flour']),
+            json_recipe(2, 'omelette', ingredients=['eggs']),
+            dict(json_recipe(3, 'bread', ingredients=['flour', 'water']), updated_at='2022-12-24')]
+
+
+class FakeClock:
+    def __init__(self, *times):
+        self.times = list(times)
+
+    def __call__(self) -> float:
+        return self.times.pop(0)
+
+
+def test_export_report():
+    assert ExportReport(100, 0.5).rows_per_second == 200
+    assert str(ExportReport(100, 0.5)) == '100 recipes exported in 0.50 s (200 recipes/s).'
+    assert ExportReport(3, 0.0).rows_per_second == 3
+
+
+def test_export_to_jsonl(fixture_recipes, tmp_path):
+    path = str(tmp_path / 'recipes.jsonl')
+    report = RecipeExporter(chunk_size=2, clock=FakeClock(1.0, 3.0)).export(iter(fixture_recipes), path)
+    assert report == ExportReport(3, 2.0)
+    assert [json.loads(line) for line in open(path)] == fixture_recipes
+
+
+def test_export_to_csv_is_read_back_by_the_importer(fixture_recipes, tmp_path):
+    path = str(tmp_path / 'recipes.csv')
+    assert RecipeExporter(chunk_size=2).export(fixture_recipes, path).rows == 3
+    assert open(path).readline().strip() == 'id,title,description,author,created_at,updated_at,name,quantity,unit'
+    assert [validate_record(record)[0] for record in read_records(path)] == \
+           [validate_record(recipe)[0] for recipe in fixture_recipes]
+
+
+def test_export_pulls_one_chunk_at_a_time(fixture_recipes, tmp_path):
+    recipes = iter(fixture_recipes + [{'detail': 'Server error.'}])
+    path = tmp_path / 'recipes.jsonl'
+    with pytest.raises(ValueError, match='Server error.'):
+        RecipeExporter(chunk_size=2).export(recipes, str(path))
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_export_rejects_other_files(fixture_recipes, tmp_path):
+    with pytest.raises(ValueError):
+        RecipeExporter().export(fixture_recipes, str(tmp_path / 'recipes.xml'))
+    with pytest.raises(ValidationError):
+        RecipeExporter(chunk_size=0)
+    with patch('recipe.exporter.pyarrow', None):
+        with pytest.raises(ValidationError):
+            RecipeExporter().export(fixture_recipes, str(tmp_path / 'recipes.parquet'))
+
+
+def test_export_to_parquet(fixture_recipes, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'recipes.parquet')
+    assert RecipeExporter(chunk_size=2).export(fixture_recipes, path).rows == 3
+    table = parquet.read_table(path)
+    assert table.column('title').to_pylist() == ['pancakes', 'omelette', 'bread']
+    assert table.column('ingredients').to_pylist()[2] == fixture_recipes[2]['ingredients']
+    assert parquet.ParquetFile(path).num_row_groups == 2
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+from valid8 import ValidationError
+
+from recipe.domain import DealerRecipes
+from recipe.importer import RecipeImporter, ImportResult, read_records, validate_record
+
+API = 'http://localhost:8000/api/v1'
+
+
+def record(title: str, *ingredients) -> dict:
+    return {
+        'title': title,
+        'description': 'description',
+        'ingredients': [{'name': name, 'quantity': 1, 'unit': 'n/a'} for name in ingredients],
+    }
+
+
+@pytest.fixture
+def fixture_records():
+    return [record('pancakes', 'eggs', 'flour'), record('omelette', 'eggs'), record('bread', 'flour')]
+
+
+def test_read_records_from_json_and_jsonl(fixture_records, tmp_path):
+    (tmp_path / 'recipes.json').write_text(json.dumps(fixture_records))
+    (tmp_path / 'recipes.jsonl').write_text('\n'.join(json.dumps(r) for r in fixture_records) + '\n\n')
+    assert list(read_records(str(tmp_path / 'recipes.json'), chunk_size=7)) == fixture_records
+    assert list(read_records(str(tmp_path / 'recipes.jsonl'))) == fixture_records
+
+
+def test_read_records_from_csv(tmp_path):
+    path = tmp_path / 'recipes.csv'
+    path.write_text('title,description,name,quantity,unit\n'
+                    'pancakes,description,eggs,1,n/a\n'
+                    ',,flour,1,n/a\n'
+                    'omelette,description,eggs,1,n/a\n')
+    assert list(read_records(str(path))) == [
+        {'title': 'pancakes', 'description': 'description', 'ingredients': [
+            {'name': 'eggs', 'quantity': '1', 'unit': 'n/a'}, {'name': 'flour', 'quantity': '1', 'unit': 'n/a'}]},
+        {'title': 'omelette', 'description': 'description', 'ingredients': [
+            {'name': 'eggs', 'quantity': '1', 'unit': 'n/a'}]},
+    ]
+
+
+def test_read_records_rejects_other_files(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_records(str(tmp_path / 'recipes.xml')))
+    path = tmp_path / 'recipes.csv'
+    path.write_text('title,description,name,quantity,unit\n,,eggs,1,n/a\n')
+    with pytest.raises(ValueError):
+        list(read_records(str(path)))
+
+
+def test_validate_record(fixture_records):
+    assert validate_record(fixture_records[0]) == (fixture_records[0], '')
+    csv_record = dict(fixture_records[1], ingredients=[{'name': 'eggs', 'quantity': '2', 'unit': 'n/a'}])
+    assert validate_record(csv_record)[0]['ingredients'] == [{'name': 'eggs', 'quantity': 2, 'unit': 'n/a'}]
+    for invalid in [record('pancakes'), record('pancakes!', 'eggs'), dict(record('bread', 'flour'), title=1),
+                    {'title': 'bread'}, ['bread'], dict(csv_record, ingredients=[dict(name='eggs', quantity='two',
+                                                                                      unit='n/a')])]:
+        data, error = validate_record(invalid)
+        assert data is None and error
+
+
+def test_importer_invalid_settings():
+    with pytest.raises(ValidationError):
+        RecipeImporter(DealerRecipes(), 'key', workers=-1)
+    with pytest.raises(ValidationError):
+        RecipeImporter(DealerRecipes(pool_size=2), 'key', concurrency=3)
+    with pytest.raises(ValidationError):
+        RecipeImporter(DealerRecipes(), 'key', chunk_size=0)
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_importer_reports_each_record_in_order(fixture_records, workers):
+    records = fixture_records + [record('waffles')]
+    responses = [{'json': dict(r, id=i)} for i, r in enumerate(fixture_records[:2], start=1)]
+    with requests_mock.Mocker() as m:
+        m.post(f'{API}/personal-area/', [*responses, {'json': {'detail': 'Invalid token.'}, 'status_code': 401}])
+        results = list(RecipeImporter(DealerRecipes(), 'key', workers=workers, concurrency=1, chunk_size=2)
+                        .run(records))
+        assert m.call_count == 3
+        assert m.request_history[0].headers['Authorization'] == 'Token key'
+    assert [(r.number, r.title, r.status) for r in results] == [
+        (1, 'pancakes', 'added'), (2, 'omelette', 'added'), (3, 'bread', 'failed'), (4, 'waffles', 'invalid')]
+    assert results[0].detail == 'id 1'
+    assert results[2].detail == 'Invalid token.'
+    assert str(results[2]) == "3: failed 'bread' - Invalid token."
+
+
+def test_importer_reports_unreachable_server(fixture_records):
+    with requests_mock.Mocker() as m:
+        m.post(f'{API}/personal-area/', exc=requests.ConnectionError)
+        results = list(RecipeImporter(DealerRecipes(max_retries=0), 'key', workers=0).run(fixture_records))
+    assert [r.status for r in results] == ['failed'] * 3
+
+
+def test_importer_bounds_concurrency_and_read_ahead(fixture_records):
+    running, peak, pulled = [0], [0], [0]
+    lock = threading.Lock()
+
+    def add_new_recipe(key, title, description, ingredients):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return {'id': 1, 'title': title.value}
+
+    def records():
+        for number in range(100):
+            pulled[0] += 1
+            yield fixture_records[number % 3]
+
+    with patch.object(DealerRecipes, 'add_new_recipe', side_effect=add_new_recipe):
+        results = RecipeImporter(DealerRecipes(), 'key', workers=0, concurrency=3, chunk_size=10).run(records())
+        next(results)
+        assert pulled[0] <= 20
+        assert len(list(results)) == 99
+    assert peak[0] == 3
@@ -113,3 +113,17 @@ def test_menu_selection_on_wrong_key(mocked_print, mocked_input):
     menu.run()
     mocked_print.assert_any_call('Invalid selection. Please, try again...')
     mocked_input.assert_called()
+
+
+@patch('builtins.input', side_effect=['2', '0'])
+@patch('builtins.print')
+def test_menu_hides_invisible_entries_but_keeps_them_selectable(mocked_print, mocked_input):
+    menu = Menu.Builder(Description('a description'))\
+        .with_entry(Entry.create('1', 'first entry'))\
+        .with_entry(Entry.create('2', 'hidden entry', on_selected=lambda: print('hidden entry selected'),
+                                 is_visible=lambda: False))\
+        .with_entry(Entry.create('0', 'exit', is_exit=True))\
+        .build()
+    menu.run()
+    mocked_print.assert_any_call('1:\tfirst entry\n0:\texit')
+    mocked_print.assert_any_call('hidden entry selected')
@@ -0,0 +1,205 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+import requests_mock
+from valid8 import ValidationError
+
+from recipe.domain import DealerRecipes, Username, Password, Title, Description, Id
+from recipe.sessions import SessionManager, UserSession
+from tests.recipe.helpers import CookieServer
+
+API = 'http://localhost:8000/api/v1'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_session_manager_invalid_settings():
+    with pytest.raises(ValidationError):
+        SessionManager(max_idle=0.0)
+    with pytest.raises(ValidationError):
+        SessionManager(max_sessions=0)
+    with pytest.raises(ValidationError):
+        SessionManager().open('')
+
+
+def test_session_manager_login_and_logout():
+    with requests_mock.Mocker() as m:
+        m.post(f'{API}/auth/login/', json={'key': 'token1'})
+        m.post(f'{API}/auth/logout/', status_code=200)
+        with SessionManager() as manager:
+            session = manager.login(Username('username1'), Password('password1'))
+            assert session.key == 'token1'
+            assert manager.get('token1') is session
+            assert manager.open('token1') is session
+            assert manager.logout('token1') == 'Logged out!'
+            assert manager.get('token1') is None
+            assert m.last_request.headers['Authorization'] == 'Token token1'
+
+
+def test_session_manager_failed_login():
+    with requests_mock.Mocker() as m:
+        m.post(f'{API}/auth/login/', status_code=400, json={})
+        manager = SessionManager()
+        assert manager.login(Username('username1'), Password('password1')) is None
+        assert len(manager) == 0
+
+
+def test_session_caches_role():
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/personal-area/account-type/', [{'json': {'detail': 'Invalid token.'}},
+                                                    {'json': {'type-account': 1}}])
+        session = SessionManager(DealerRecipes(cache=None)).open('token1')
+        assert session.what_is_my_role() == 'Invalid token.'
+        assert session.what_is_my_role() == 'You are logged as admin'
+        assert session.what_is_my_role() == 'You are logged as admin'
+        assert m.call_count == 2
+
+
+def test_session_manager_drops_roles_of_removed_sessions():
+    clock = FakeClock()
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/personal-area/account-type/', json={'type-account': 1})
+        manager = SessionManager(DealerRecipes(cache=None), max_idle=10.0, max_sessions=1, clock=clock)
+        for key in ('token1', 'token2', 'token1', 'token1'):
+            manager.open(key).what_is_my_role()
+        assert m.call_count == 3
+        manager.discard('token1')
+        manager.dealer.what_is_my_role('token1')
+        assert m.call_count == 4
+        manager.open('token2').what_is_my_role()
+        clock.now = 10.0
+        assert manager.evict_idle() == 1
+        manager.dealer.what_is_my_role('token2')
+        assert m.call_count == 6
+
+
+def test_dealer_role_cache_is_bounded():
+    with requests_mock.Mocker() as m:
+        m.get(f'{API}/personal-area/account-type/', json={'type-account': 0})
+        dealer = DealerRecipes(cache=None)
+        with patch('recipe.domain._MAX_ROLES', 2):
+            for key in ('token1', 'token2', 'token1', 'token3', 'token1', 'token2'):
+                dealer.what_is_my_role(key)
+        assert m.call_count == 4
+
+
+def test_session_passes_its_token_and_counts_requests():
+    clock = FakeClock()
+
+    def sort_my_recipes_by_title(key):
+        clock.now += 0.5
+        return [{'key': key}]
+
+    with patch.object(DealerRecipes, 'sort_my_recipes_by_title', side_effect=sort_my_recipes_by_title):
+        with patch.object(DealerRecipes, 'delete_recipe', side_effect=ConnectionError) as mock_delete:
+            session = SessionManager(clock=clock).open('token1')
+            assert session.sort_my_recipes_by_title() == [{'key': 'token1'}]
+            with pytest.raises(ConnectionError):
+                session.delete_recipe(Id(3))
+            mock_delete.assert_called_once_with('token1', Id(3))
+    assert session.stats() == {'requests': 2, 'errors': 1, 'seconds': 0.5, 'in_flight': 0, 'average_seconds': 0.25}
+
+
+def test_session_delegates_writes():
+    with patch.object(DealerRecipes, 'add_new_recipe', return_value={'id': 1}) as mock_add:
+        with patch.object(DealerRecipes, 'update_my_recipe', return_value={'id': 1}) as mock_update:
+            with patch.object(DealerRecipes, 'sort_my_recipes_by_date', return_value=[]) as mock_sort:
+                session = UserSession(DealerRecipes(), 'token1')
+                session.add_new_recipe(Title('title'), Description('description'), [])
+                session.update_my_recipe(Id(1), {'title': 'title'})
+                session.sort_my_recipes_by_date()
+                mock_add.assert_called_once_with('token1', Title('title'), Description('description'), [])
+                mock_update.assert_called_once_with('token1', Id(1), {'title': 'title'})
+                mock_sort.assert_called_once_with('token1')
+
+
+def test_session_manager_evicts_idle_sessions():
+    clock = FakeClock()
+    manager = SessionManager(max_idle=60.0, clock=clock)
+    first, second = manager.open('token1'), manager.open('token2')
+    clock.now = 30.0
+    with patch.object(DealerRecipes, 'sort_my_recipes_by_date', return_value=[]):
+        second.sort_my_recipes_by_date()
+    clock.now = 60.0
+    assert manager.get('token1') is None
+    assert manager.get('token2') is second
+    clock.now = 200.0
+    assert manager.evict_idle() == 1
+    assert manager.stats() == {'sessions': 0, 'evictions': 2, 'requests': 0, 'errors': 0, 'in_flight': 0}
+
+
+def test_session_manager_evicts_least_recently_used():
+    manager = SessionManager(max_sessions=2)
+    manager.open('token1')
+    manager.open('token2')
+    manager.get('token1')
+    manager.open('token3')
+    assert [manager.get(key) is not None for key in ('token1', 'token2', 'token3')] == [True, False, True]
+    assert manager.stats()['evictions'] == 1
+
+
+def test_session_manager_is_thread_safe():
+    manager = SessionManager(max_sessions=50)
+    barrier = threading.Barrier(20)
+
+    def use(number: int):
+        barrier.wait()
+        for round in range(100):
+            session = manager.open(f'token{(number * 100 + round) % 80}')
+            session.sort_my_recipes_by_title()
+
+    with patch.object(DealerRecipes, 'sort_my_recipes_by_title', return_value=[]):
+        threads = [threading.Thread(target=use, args=(number,)) for number in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    stats = manager.stats()
+    assert stats['sessions'] == 50
+    assert stats['evictions'] > 0
+    assert stats['in_flight'] == 0
+
+
+def test_session_manager_sends_no_cookie_across_users():
+    with CookieServer() as server, SessionManager(DealerRecipes(api_server=server.api_server, cache=None)) as manager:
+        alice = manager.login(Username('alice'), Password('password1'))
+        bobby = manager.login(Username('bobby'), Password('password2'))
+        alice.sort_my_recipes_by_title()
+        bobby.sort_my_recipes_by_title()
+        manager.dealer.show_all_recipes()
+    assert [(authorization, cookie) for _, _, authorization, cookie in server.seen] == [
+        (None, None), (None, None), ('Token tok-alice', None), ('Token tok-bobby', None), (None, None)]
+
+
+def test_dealer_creates_one_session_under_concurrency():
+    dealer = DealerRecipes()
+    barrier = threading.Barrier(8)
+    new_session = requests.Session
+
+    def slow_session():
+        time.sleep(0.05)
+        return new_session()
+
+    def first_session():
+        barrier.wait()
+        sessions.append(dealer._session())
+
+    sessions = []
+    threads = [threading.Thread(target=first_session) for _ in range(8)]
+    with patch('requests.Session', side_effect=slow_session) as mock_session:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert mock_session.call_count == 1
+    assert len({id(session) for session in sessions}) == 1
+    dealer.close()
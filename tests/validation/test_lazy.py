@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+from valid8 import ValidationError
+
+from validation import LazyModule, lazy_import, register, validate
+
+
+def test_lazy_import_defers_the_import():
+    sys.modules.pop('colorsys', None)
+    colorsys = lazy_import('colorsys')
+    assert isinstance(colorsys, LazyModule)
+    assert 'colorsys' not in sys.modules
+    assert colorsys.rgb_to_hsv(0, 0, 0) == (0, 0, 0)
+    assert 'colorsys' in sys.modules
+
+
+def test_lazy_import_of_missing_optional_module():
+    assert lazy_import('no_such_module_here', optional=True) is None
+    assert lazy_import('no_such_module_here') is not None
+
+
+@pytest.mark.parametrize('value, kwargs', [
+    (5, {'min_value': 0}),
+    (5, {'min_value': 5}),
+    (5, {'max_value': 5, 'min_value': 1, 'min_strict': True}),
+    ('abc', {'min_len': 1, 'max_len': 3}),
+    ('abc', {'equals': 'abc'}),
+    ('abc', {'custom': lambda v: v.isalpha()}),
+    ('abc', {'custom': lambda v: None}),
+])
+def test_validate_accepts(value, kwargs):
+    validate('value', value, help_msg='Invalid.', **kwargs)
+
+
+@pytest.mark.parametrize('value, kwargs', [
+    (None, {}),
+    (5, {'min_value': 5, 'min_strict': True}),
+    (5, {'max_value': 4}),
+    (5, {'max_value': 5, 'max_strict': True}),
+    ('', {'min_len': 1}),
+    ('abcd', {'max_len': 3}),
+    ('abc', {'equals': 'abd'}),
+    ('abc', {'custom': lambda v: v.isdigit()}),
+    ('abc', {'custom': lambda v: 1}),
+    (5, {'instance_of': str}),
+])
+def test_validate_rejects_like_valid8(value, kwargs):
+    with pytest.raises(ValidationError) as e:
+        validate('value', value, help_msg='Invalid.', **kwargs)
+    assert e.value.help_msg == 'Invalid.'
+
+
+def test_validate_calls_a_raising_check_once():
+    digits = register('test.lazy.digits', r'\d+')
+    before = digits.calls
+    with pytest.raises(ValidationError):
+        validate('value', 5, custom=digits, help_msg='Invalid.')
+    assert digits.calls == before + 1
@@ -1,4 +1,6 @@
-from validation.regex import pattern
+import pytest
+
+from validation import pattern, register, validator, validate_many, call_counts
 
 
 def test_regex_for_int():
@@ -9,3 +11,42 @@ def test_regex_for_int():
 def test_regex_for_single_word():
     assert pattern(r'\w+')('abc')
     assert not pattern(r'\w+')('abc abc')
+
+
+def test_pattern_is_shared():
+    assert pattern(r'[a-z]+') is pattern(r'[a-z]+')
+    assert pattern(r'[a-z]+').__name__ == 'pattern([a-z]+)'
+
+
+def test_register_compiles_once_per_kind():
+    digits = register('test.digits', r'\d+')
+    assert register('test.digits', r'\d+') is digits
+    assert validator('test.digits') is digits
+    with pytest.raises(ValueError):
+        register('test.digits', r'\w+')
+    with pytest.raises(KeyError):
+        validator('test.unknown')
+
+
+def test_validator_counts_calls():
+    letters = register('test.letters', r'[a-z]+')
+    before = letters.calls
+    assert letters('abc')
+    assert not letters('ABC')
+    assert letters.calls == before + 2
+    assert call_counts()['test.letters'] == before + 2
+
+
+def test_validate_many():
+    words = register('test.words', r'\w+')
+    before = words.calls
+    assert validate_many('test.words', ['abc', 'abc abc', '']) == [True, False, False]
+    assert words.calls == before + 3
+
+
+def test_domain_validators_are_registered():
+    from recipe.domain import Title
+    title = validator('recipe.title')
+    before = title.calls
+    Title('a title')
+    assert title.calls == before + 1
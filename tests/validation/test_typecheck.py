@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from validation import typechecked
+
+
+def double(value: int) -> int:
+    return value * 2
+
+
+def test_strict_mode_checks_every_call():
+    checked = typechecked(double, mode='strict')
+    assert checked(2) == 4
+    with pytest.raises(TypeError):
+        checked('a')
+
+
+def test_off_mode_returns_the_target():
+    assert typechecked(double, mode='off') is double
+
+
+def test_sample_mode_checks_one_call_out_of_every():
+    sampled = typechecked(double, mode='sample', every=3)
+    with pytest.raises(TypeError):
+        sampled('a')
+    assert sampled('a') == 'aa'
+    assert sampled('a') == 'aa'
+    with pytest.raises(TypeError):
+        sampled('a')
+
+
+def test_sample_mode_on_classes():
+    @typechecked(mode='sample', every=2)
+    class Doubler:
+        def double(self, value: int) -> int:
+            return value * 2
+
+        @staticmethod
+        def triple(value: int) -> int:
+            return value * 3
+
+    with pytest.raises(TypeError):
+        Doubler().double('a')
+    assert Doubler().double('a') == 'aa'
+    with pytest.raises(TypeError):
+        Doubler.triple('a')
+    assert Doubler.triple('a') == 'aaa'
+
+
+def test_mode_is_read_from_the_environment():
+    code = 'import validation; print(validation.TYPECHECK_MODE)'
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', code], env={'SECURE_RECIPE_TYPECHECK': 'off'}, cwd=root,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'off'
+    result = subprocess.run([sys.executable, '-c', code], env={'SECURE_RECIPE_TYPECHECK': 'fast'}, cwd=root,
+                            capture_output=True, text=True)
+    assert result.returncode != 0 and 'SECURE_RECIPE_TYPECHECK' in result.stderr
+
+
+def test_strict_mode_on_class_properties():
+    @typechecked(mode='strict')
+    class Box:
+        def __init__(self):
+            self.__value = 0
+
+        @property
+        def value(self) -> int:
+            return self.__value
+
+        @value.setter
+        def value(self, value: int) -> None:
+            self.__value = value
+
+    box = Box()
+    box.value = 2
+    assert box.value == 2
+    with pytest.raises(TypeError):
+        box.value = 'a'
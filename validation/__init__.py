@@ -1 +1,3 @@
-from .regex import pattern
+from .lazy import LazyModule, lazy_import, validate
+from .regex import pattern, register, validator, validate_many, call_counts
+from .typecheck import TYPECHECK_MODE, TYPECHECK_MODES, typechecked
@@ -0,0 +1,30 @@
+import importlib
+import importlib.util
+from typing import Any, Optional
+
+
+class LazyModule:
+    """A module that is imported the first time one of its attributes is read."""
+
+    def __init__(self, name: str):
+        self.__name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(importlib.import_module(self.__name), attr)
+
+    def __repr__(self) -> str:
+        return f'<lazy module {self.__name!r}>'
+
+
+def lazy_import(name: str, optional: bool = False) -> Optional[LazyModule]:
+    if optional and importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
+
+valid8 = lazy_import('valid8')
+
+
+def validate(name: str, value: Any, **kwargs) -> None:
+    """Same as `valid8.validate`; valid8 is imported by the first call."""
+    valid8.validate(name, value, **kwargs)
@@ -1,15 +1,60 @@
 import re
-from typing import Callable
+from typing import Callable, Dict, Iterable, List
 
-from typeguard import typechecked
+from .typecheck import typechecked
 
+Validator = Callable[[str], bool]
+
+_validators: Dict[str, Validator] = {}
+_patterns: Dict[str, Validator] = {}
 
-@typechecked
-def pattern(regex: str) -> Callable[[str], bool]:
-    r = re.compile(regex)
+
+def _compile(kind: str, regex: str) -> Validator:
+    fullmatch = re.compile(regex).fullmatch
 
     def res(value):
-        return bool(r.fullmatch(value))
+        res.calls += 1
+        return fullmatch(value) is not None
 
     res.__name__ = f'pattern({regex})'
+    res.kind = kind
+    res.regex = regex
+    res.calls = 0
+    res.fullmatch = fullmatch
+    return res
+
+
+@typechecked
+def register(kind: str, regex: str) -> Validator:
+    res = _validators.get(kind)
+    if res is None:
+        res = _validators[kind] = _compile(kind, regex)
+    elif res.regex != regex:
+        raise ValueError(f'The validator {kind} is already registered with another pattern.')
+    return res
+
+
+@typechecked
+def validator(kind: str) -> Validator:
+    return _validators[kind]
+
+
+@typechecked
+def validate_many(kind: str, values: Iterable[str]) -> List[bool]:
+    res = _validators[kind]
+    fullmatch = res.fullmatch
+    results = [fullmatch(value) is not None for value in values]
+    res.calls += len(results)
+    return results
+
+
+def call_counts() -> Dict[str, int]:
+    return {kind: res.calls for kind, res in _validators.items()}
+
+
+@typechecked
+def pattern(regex: str) -> Callable[[str], bool]:
+    res = _patterns.get(regex)
+    if res is None:
+        res = _patterns[regex] = _compile(regex, regex)
     return res
@@ -0,0 +1,88 @@
+import functools
+import inspect
+import itertools
+import os
+import sys
+from typing import Any, Callable, Dict, Optional
+
+from .lazy import lazy_import
+
+typeguard = lazy_import('typeguard')
+
+TYPECHECK_MODES = ('strict', 'sample', 'off')
+
+
+def _mode_from_environment() -> str:
+    mode = os.environ.get('SECURE_RECIPE_TYPECHECK', 'strict').strip().lower() or 'strict'
+    if mode not in TYPECHECK_MODES:
+        raise ValueError(f'SECURE_RECIPE_TYPECHECK must be one of {", ".join(TYPECHECK_MODES)}, not {mode!r}.')
+    return mode
+
+
+def _every_from_environment() -> int:
+    every = int(os.environ.get('SECURE_RECIPE_TYPECHECK_EVERY', '100'))
+    if every < 1:
+        raise ValueError('SECURE_RECIPE_TYPECHECK_EVERY must be positive.')
+    return every
+
+
+TYPECHECK_MODE = _mode_from_environment()
+TYPECHECK_EVERY = _every_from_environment()
+
+
+def _deferred(func: Callable, localns: Dict[str, Any], every: int) -> Callable:
+    if hasattr(func, 'typecheck_every') or not getattr(func, '__annotations__', None):
+        return func
+    counter = itertools.count()
+    checked = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal checked
+        if every > 1 and next(counter) % every:
+            return func(*args, **kwargs)
+        if checked is None:
+            checked = typeguard.typechecked(func, _localns=localns)
+        return checked(*args, **kwargs)
+
+    wrapper.typecheck_every = every
+    return wrapper
+
+
+def _instrument_class(cls: type, every: int) -> type:
+    prefix = cls.__qualname__ + '.'
+    localns = cls.__dict__
+    for key, attr in list(cls.__dict__.items()):
+        if inspect.isclass(attr):
+            if attr.__qualname__.startswith(prefix):
+                _instrument_class(attr, every)
+        elif inspect.isfunction(attr):
+            if attr.__qualname__.startswith(prefix):
+                setattr(cls, key, _deferred(attr, localns, every))
+        elif isinstance(attr, (classmethod, staticmethod)):
+            setattr(cls, key, type(attr)(_deferred(attr.__func__, localns, every)))
+        elif isinstance(attr, property):
+            setattr(cls, key, type(attr)(*(None if f is None else _deferred(f, localns, every)
+                                           for f in (attr.fget, attr.fset, attr.fdel)), attr.__doc__))
+    return cls
+
+
+def typechecked(target: Optional[Any] = None, *, mode: Optional[str] = None, every: Optional[int] = None,
+                _localns: Optional[Dict[str, Any]] = None) -> Any:
+    """`typeguard.typechecked` whose cost depends on the mode chosen with SECURE_RECIPE_TYPECHECK.
+
+    'strict' (the default) checks every call, 'off' returns the target untouched, and 'sample' checks one call
+    out of SECURE_RECIPE_TYPECHECK_EVERY (100 by default) to each decorated function. The mode is read once, at
+    import time, and typeguard itself is only imported by the first checked call.
+    """
+    mode = mode or TYPECHECK_MODE
+    every = 1 if mode == 'strict' else every or TYPECHECK_EVERY
+    if target is None:
+        return functools.partial(typechecked, mode=mode, every=every, _localns=sys._getframe(1).f_locals)
+    if mode == 'off':
+        return target
+    if inspect.isclass(target):
+        return _instrument_class(target, every)
+    if _localns is None:
+        _localns = sys._getframe(1).f_locals
+    return _deferred(target, _localns, every)